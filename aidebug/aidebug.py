@@ -1,28 +1,44 @@
 import re
 import os
 import cmd
+import copy
+import shlex
+import threading
 import sys
-import subprocess
 import platform
 
-# Platform specific imports
-if platform.system() == 'Windows':
-    import pyreadline
-else:
-    import readline
-
-from PyQt5.QtWidgets import QApplication
 from colorama import Fore, init
 
-from .core.gui.select_dirs import DirectoryBrowser
-from .core.utils.files_data import scrape_contents
+from .core.utils.file_index import FileIndex
+from .core.utils.file_store import FileStore
+from .core.utils.file_walker import select_files
+from .core.utils.update_codebase import update_codebase, format_changes
+from .core.utils.context_packer import context_budget, estimate_tokens, pack_context
+from .core.utils.symbol_index import SymbolIndex
+from .core.utils.minifier import MARKER_NOTE, MINIFY_CONTEXT, Minifier, format_savings
+from .core.utils.git_context import diff_context, head_changes, save_snapshot, snapshot_changes
+from .core.utils.traceback_parser import DEFAULT_CONTEXT_LINES, traceback_context, trim_error
+from .core.utils.highlight_code import Highlighter, page
+from .core.utils.response_cache import DISABLE_CACHE, ResponseCache
+from .core.utils.workspace import DISABLE_WORKSPACE, Workspace
+from .core.utils.file_watcher import FileWatcher
+from .core.utils.files_data import scrapeable_files
+from .core.utils.stream_printer import render_stream
+from .core.utils.process_runner import run_process
 from .core.utils.error_handler import error_handler
-from .core.clientv2.openai_client import OpenAIClient
-from .core.clientv2.google_client import GoogleClient
+from .core.utils.metrics import metrics
+from .core.utils.timer import function_timer
+from .core.commands.chat import CHAT_HISTORY_TOKENS, ChatSession
+from .core.clientv2.cached_client import CachedClient
+from .core.clientv2.cancel import CancelScope
+from .core.clientv2.metered_client import MeteredClient
+from .core.clientv2.registry import api_key_env, client_types, load_client
 
 # Initialize colorama
 init(autoreset=True)
 
+PROJECT_RUN_TIMEOUT = float(os.getenv("PROJECT_RUN_TIMEOUT", "0")) or None
+
 class CodeDebuggerShell(cmd.Cmd):
     intro = f"""{Fore.BLUE}
       █████████   █████    ██████████            █████
@@ -41,6 +57,13 @@ class CodeDebuggerShell(cmd.Cmd):
     """
     prompt = f'{Fore.GREEN}AIDebug{Fore.RESET} {Fore.YELLOW}> {Fore.RESET}'
 
+    # Attributes kept in the project workspace between sessions (never the API key)
+    WORKSPACE_SETTINGS = (
+        'project_language', 'project_type', 'project_framework', 'project_base_directory', 'project_run_command',
+        'project_context_lines', 'project_run_timeout', 'project_context_mode', 'project_diff_base', 'project_minify',
+        'client_type', 'openai_model', 'openai_model_temperature', 'context_budgets', 'use_cache',
+    )
+
     def __init__(self):
         super().__init__()
         self.venv_path = ""
@@ -48,47 +71,60 @@ class CodeDebuggerShell(cmd.Cmd):
         self.use_venv = False
 
         self.files = []
-        self.files_and_content = []
+        self.file_store = FileStore()
+        self.file_index = FileIndex()
         self.project_language = ""
         self.project_type = ""
         self.project_framework = ""
         self.project_base_directory = ""
         self.project_run_command = ""
-
-        self.messages = []
+        self.project_context_lines = DEFAULT_CONTEXT_LINES
+        self.project_run_timeout = PROJECT_RUN_TIMEOUT
+        self.project_context_mode = 'files'
+        self.project_diff_base = 'head'
+        self.project_minify = MINIFY_CONTEXT
+        self.minifier = Minifier()
+        self.highlighter = Highlighter()
+        self.symbol_index = None
+        self.last_run_error = ""
+        self.watcher = None
+        self.watch_auto_debug = False
+        # Serialises refreshing the store and running the project between the REPL and the watcher's thread
+        self.project_lock = threading.RLock()
+        # The thread and cancel scope of a debug started by the watcher, if one is running
+        self.auto_debug_task = None
+        self.auto_debug_lock = threading.Lock()
+
+        self.chat_session = None
 
         self.client = None
         self.client_type = "openai"  # Default client type
         self.api_key = os.getenv("OPENAI_API_KEY")
         self.openai_model = "gpt-4o"
         self.openai_model_temperature = 1.0
+        self.context_budgets = {}
 
-        self.configure_client()
-
-    def configure_client(self):
-        if self.client_type == "openai":
-            self.api_key = os.getenv("OPENAI_API_KEY")
+        self.response_cache = ResponseCache()
+        self.use_cache = not DISABLE_CACHE
 
-            api_host = os.getenv("OPENAI_API_HOST", "https://api.openai.com")
-            self.client = OpenAIClient(api_host, self.api_key)
-        elif self.client_type == "google":
-            self.api_key = os.getenv("GOOGLE_API_KEY")
+        self.workspace = None
+        # Only settings changed from these defaults are kept, so the rest keep following their env vars
+        self.default_settings = copy.deepcopy({name: getattr(self, name) for name in self.WORKSPACE_SETTINGS})
+        self.saved_settings = {}
 
-            self.client = GoogleClient(self.api_key)
-        elif self.client_type == "open_source":
-            self.client = OpenSourceClient()
-        else:
-            raise ValueError("Unknown client type")
+        self.configure_client()
 
-    def highlight_code(self, path, code):
-        from pygments import highlight
-        from pygments.lexers import get_lexer_for_filename
-        from pygments.formatters import TerminalFormatter
+    def configure_client(self, api_key=None):
+        """Point `self.client` at the selected backend, importing it on first use."""
+        key_env = api_key_env(self.client_type)
+        self.api_key = api_key or (os.getenv(key_env) if key_env else None)
 
-        lexer = get_lexer_for_filename(path, stripall=True)
-        formatter = TerminalFormatter()
-        highlighted_code = highlight(code, lexer, formatter)
-        print(highlighted_code)
+        client_class = load_client(self.client_type)
+        if isinstance(self.client, client_class) and self.client.reconfigure(self.api_key):
+            return
+        if self.client is not None:
+            self.client.close()
+        self.client = client_class.from_env(self.api_key)
 
     @error_handler
     def do_update_codebase(self, line):
@@ -97,14 +133,76 @@ class CodeDebuggerShell(cmd.Cmd):
         Usage:
         update_codebase
 
-        This command reads the contents of each selected file and updates the stored contents.
+        This command re-reads the selected files that changed on disk since they were last read
+        and reports which files were added, changed or removed.
         The updated contents can be accessed using the 'project files contents' command.
         """
-        for file_info in self.files_and_content:
-            for path, _ in file_info.items():
-                with open(path, 'r') as file:
-                    content = file.read()
-                file_info[path] = content
+        changes = self.refresh_codebase()
+        print(f"Codebase updated: {format_changes(changes)}")
+
+    def refresh_codebase(self, changed=None):
+        """Re-read only the selected files whose mtime or size changed, or only `changed` when given."""
+        with self.project_lock:
+            changes = update_codebase(self.files, self.file_store, self.file_index, changed)
+            updated, removed = self.file_index.take_dirty()
+            if self.workspace is not None:
+                self.workspace.save_files(self.files, updated, removed)
+        return changes
+
+    def restore_workspace(self):
+        """Reopen this project's workspace: its selection, settings and snapshot of file metadata.
+
+        Only files whose mtime or size changed since the snapshot are read again.
+        """
+        if DISABLE_WORKSPACE:
+            return
+        self.workspace = Workspace()
+        settings = self.workspace.load_settings()
+        for name in self.WORKSPACE_SETTINGS:
+            if name in settings:
+                setattr(self, name, settings[name])
+        self.saved_settings = copy.deepcopy(settings)
+        if settings.get('client_type', 'openai') != 'openai':
+            self.configure_client()
+
+        self.files = self.workspace.load_selection()
+        if not self.files:
+            return
+        # Contents are read from disk only when first needed
+        entries = self.workspace.load_entries(self.files)
+        for path, entry in entries.items():
+            self.file_store.add(path, entry["size"], entry["mtime_ns"], entry["hash"])
+        self.file_index.restore(entries)
+        changes = self.refresh_codebase()
+        reread = len(changes['added']) + len(changes['changed'])
+        print(f"Workspace restored: {len(self.files)} files selected, {reread} re-read, {len(changes['removed'])} removed since the last session.")
+
+    def save_settings(self):
+        """Write the settings that differ from their defaults to the workspace, forgetting any set back."""
+        if self.workspace is None:
+            return
+        settings = {
+            name: getattr(self, name) for name in self.WORKSPACE_SETTINGS
+            if getattr(self, name) != self.default_settings[name]
+        }
+        changed = {name: value for name, value in settings.items() if self.saved_settings.get(name) != value}
+        reset = [name for name in self.saved_settings if name not in settings]
+        if changed:
+            self.workspace.save_settings(changed)
+        if reset:
+            self.workspace.delete_settings(reset)
+        # Copied, as context_budgets is changed in place
+        self.saved_settings = copy.deepcopy(settings)
+
+    def precmd(self, line):
+        # The shell's own commands take over from a debug the watcher started
+        if line.strip() and self.cancel_auto_debug():
+            print("Automatic debug cancelled.")
+        return line
+
+    def postcmd(self, stop, line):
+        self.save_settings()
+        return stop
 
     @error_handler
     def preloop(self):
@@ -132,12 +230,9 @@ class CodeDebuggerShell(cmd.Cmd):
             except Exception as e:
                 print(f"An error occurred: {e}")
         else:
-            with subprocess.Popen(line, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True) as process:
-                for stdout_line in iter(process.stdout.readline, ""):
-                    print(stdout_line, end="")
-
-                for stderr_line in iter(process.stderr.readline, ""):
-                    print(stderr_line, end="")
+            result = run_process(line)
+            if result.cancelled:
+                print("\nCommand cancelled.")
 
     @error_handler
     def do_exit(self, _):
@@ -148,6 +243,7 @@ class CodeDebuggerShell(cmd.Cmd):
 
         This command will terminate the AIDebug shell session.
         """
+        self.stop_watch()
         return True
 
     @error_handler
@@ -156,92 +252,261 @@ class CodeDebuggerShell(cmd.Cmd):
 
         Usage:
         project select       -> Launches directory browser to select files.
+        project select <paths/globs...>   -> Selects files without the browser, e.g. 'src/**/*.py'.
         project deselect     -> Launches directory browser to deselect files.
-        project run          -> Runs the project using configured run command.
+        project deselect <paths/globs...> -> Deselects matching files without the browser.
+        project run          -> Runs the project using configured run command (Ctrl-C cancels).
+        project watch        -> Re-runs the project in the background whenever a selected file is saved.
+        project watch auto   -> Same, but debugs failed runs automatically.
+        project watch stop   -> Stops watching.
         project files paths  -> Prints selected file paths.
         project files contents -> Prints selected file paths and contents.
 
         Description:
-        - select: Prompts the user with a directory browser to select project files and directories.
+        - select: Prompts the user with a directory browser to select project files and directories,
+          or selects the given files, directories and globs directly. Either way, files matched by
+          .gitignore/.aidebugignore and directories such as .git, node_modules and virtualenvs are skipped.
         - deselect: Allows users to unselect previously selected files via a directory browser.
         - run: Runs the project using the previously set `project_run_command`.
+        - watch: Watches the selected files (with inotify where available, polling otherwise), waits for
+          a burst of saves to settle, re-reads only the files that changed and re-runs the project.
+          After a failed run, `debug` with no arguments debugs its error. The shell stays usable meanwhile.
         - files: Displays the currently selected file paths or file contents.
         """
 
-        line = line.lower().split()
+        # Paths and globs are case sensitive; only the subcommand is not.
+        # Quotes keep the shell-style globs in the README from reaching the matcher verbatim.
+        args = shlex.split(line)
+        subcommand = args[0].lower()
 
-        if line[0] == 'select':
-            self.select_project_files()
-        elif line[0] == 'deselect':
-            self.deselect_project_files()
-        elif line[0] == 'run':
+        if subcommand == 'select':
+            self.select_project_files(args[1:])
+        elif subcommand == 'deselect':
+            self.deselect_project_files(args[1:])
+        elif subcommand == 'run':
             self.run_project()
-        elif line[0] == 'files':
-            self.display_project_files(line[1])
+        elif subcommand == 'watch':
+            self.watch_project(args[1].lower() if len(args) > 1 else '')
+        elif subcommand == 'files':
+            self.display_project_files(args[1].lower())
         else:
-            print('Invalid subcommand! Use one of: select, deselect, run, files')
+            print('Invalid subcommand! Use one of: select, deselect, run, watch, files')
 
     @error_handler
     def complete_project(self, text, line, begidx, endidx):
         """Tab complete for 'project' subcommands."""
-        subcommands = ['select', 'deselect', 'run', 'files']
+        subcommands = ['select', 'deselect', 'run', 'watch', 'files']
         if line.startswith('project files'):
             subcommands = ['paths', 'contents']
+        elif line.startswith('project watch'):
+            subcommands = ['auto', 'stop']
         completions = [command for command in subcommands if command.startswith(text)]
         return completions
 
-    def select_project_files(self):
-        """Select project files and directories."""
-        selector = QApplication(sys.argv)
-        window = DirectoryBrowser('Select Project Files: ')
-        window.show()
-        selector.exec_()
-        self.files = list(set(window.selected_items))
+    def select_project_files(self, patterns=None):
+        """Select project files and directories, from paths/globs or with the directory browser."""
+        if patterns:
+            selected = self.collect_files(select_files(patterns))
+            if not selected:
+                print(f"No files matched {' '.join(patterns)}; the selection is unchanged.")
+                return
+        else:
+            from PyQt5.QtWidgets import QApplication
+            from .core.gui.select_dirs import DirectoryBrowser
+
+            selector = QApplication(sys.argv)
+            window = DirectoryBrowser('Select Project Files: ')
+            window.show()
+            selector.exec_()
+            selected = window.selected_items
+
+        self.files = list(dict.fromkeys(selected))
         if (len(self.files) != 0):
             if (len(self.files) != 1):
-                print('Files Selected!')
+                print(f'{len(self.files)} Files Selected!')
             else:
                 print('File Selected')
-        self.files_and_content = scrape_contents(self.files)
-
-    def deselect_project_files(self):
-        """Unselect files and directories."""
-        deselector = QApplication(sys.argv)
-        window = DirectoryBrowser('Select Files to Remove: ')
-        window.show()
-        deselector.exec_()
+        self.refresh_codebase()
+        self.restart_watch()
+
+    def deselect_project_files(self, patterns=None):
+        """Unselect files and directories, from paths/globs or with the directory browser."""
+        if patterns:
+            files_to_remove = self.collect_files(select_files(patterns))
+            if not files_to_remove:
+                print(f"No files matched {' '.join(patterns)}; the selection is unchanged.")
+                return
+        else:
+            from PyQt5.QtWidgets import QApplication
+            from .core.gui.select_dirs import DirectoryBrowser
 
-        files_to_remove = list(set(window.selected_items))
+            deselector = QApplication(sys.argv)
+            window = DirectoryBrowser('Select Files to Remove: ')
+            window.show()
+            deselector.exec_()
+            files_to_remove = window.selected_items
 
         if (len(files_to_remove) != 0):
-            for file in files_to_remove:
-                self.files.remove(file)
-            print("Files Removed!")
+            remove = {os.path.abspath(file) for file in files_to_remove}
+            remaining = [file for file in self.files if os.path.abspath(file) not in remove]
+            print(f"{len(self.files) - len(remaining)} Files Removed!")
+            self.files = remaining
         else:
             print("No files selected for removal.")
-        self.files_and_content = scrape_contents(self.files)
+        self.refresh_codebase()
+        self.restart_watch()
+
+    def collect_files(self, paths):
+        """Gather streamed file paths, showing a running count on large trees."""
+        files = []
+        for file in paths:
+            files.append(file)
+            if len(files) % 500 == 0:
+                print(f"\rScanning... {len(files)} files", end='', flush=True)
+        if len(files) >= 500:
+            print()
+        return files
 
     def run_project(self):
         """Run the project using the configured run command."""
-        self.files_and_content = scrape_contents(self.files)
         try:
-            # Run the command and capture its output and error messages
-            result = subprocess.run(
-                self.project_run_command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-
-            # Check if the command was successful (return code 0)
-            if result.returncode == 0:
-                print("Command output:")
-                print(result.stdout)
+            with self.project_lock:
+                changes = self.refresh_codebase()
+                if any(changes.values()):
+                    print(f"Codebase updated: {format_changes(changes)}")
+                result = self.execute_project()
+            if result.returncode and not (result.cancelled or result.timed_out):
+                if input("Debug Code? (y/n): ").strip().lower() == "y":
+                    self.do_debug(result.stderr_tail)
+
+        except Exception as e:
+            print(f"An error occurred: {e}")
+
+    def execute_project(self, cancel=None):
+        """Run `project_run_command`, report how it ended and keep a failed run's error for `debug`."""
+        # Stream the output live; only the tail of stderr is kept for debugging
+        result = run_process(self.project_run_command, timeout=self.project_run_timeout, cancel=cancel)
+
+        if result.cancelled:
+            print("\nProject run cancelled.")
+        elif result.timed_out:
+            print(f"\nProject run timed out after {self.project_run_timeout} seconds.")
+        elif result.returncode == 0:
+            print("Command completed successfully.")
+            if self.project_diff_base == 'last_run':
+                save_snapshot(self.selected_contents(), self.file_store.hashes())
+        else:
+            print(f"Command failed with exit code {result.returncode}.")
+            self.last_run_error = result.stderr_tail
+        return result
+
+    def watch_project(self, option):
+        """Start or stop re-running the project whenever the selected files change."""
+        if option == 'stop':
+            if self.stop_watch():
+                print("Stopped watching.")
             else:
-                print("Command failed with error message:")
-                print(result.stderr)
+                print("Not watching.")
+            return
+        if option not in ('', 'auto'):
+            print("Invalid option! Use: project watch [auto|stop]")
+            return
+        if not self.project_run_command:
+            print("No run command set. Use 'config project run' first.")
+            return
+        self.watch_auto_debug = option == 'auto'
+        if not self.restart_watch(start=True):
+            print("No files selected. Use 'project select' first.")
+            return
+        debug = "debugging failures automatically" if self.watch_auto_debug else "type 'debug' after a failure"
+        print(f"Watching {len(self.watcher.paths)} files ({self.watcher.mode}); {debug}. 'project watch stop' ends it.")
+
+    def restart_watch(self, start=False):
+        """Watch the current selection, replacing any running watcher; only starts one when `start` is set."""
+        if not (start or self.watcher):
+            return False
+        self.stop_watch()
+        paths = scrapeable_files(self.files)
+        if not paths:
+            return False
+        watcher = FileWatcher(paths, lambda changed: self.on_watched_change(changed, watcher.stopped))
+        self.watcher = watcher.start()
+        return True
 
-                if input("Debug Code? (y/n): ").strip().lower() == "y":
-                    self.do_debug(result.stderr)
+    def stop_watch(self):
+        """Stop the watcher, cancelling a run or debug it started. Returns whether one was running."""
+        if self.watcher is None:
+            return False
+        self.watcher.stop()
+        self.watcher = None
+        self.cancel_auto_debug()
+        return True
 
+    def on_watched_change(self, changed, stopped):
+        """Re-read the changed files and re-run the project; called from the watcher's thread.
+
+        `stopped` is set when the watch ends, which cancels the run. With
+        `watch_auto_debug` a failure is debugged on a thread of its own, so
+        the watcher goes back to watching and can be stopped at once.
+        """
+        debugging = False
+        try:
+            with self.project_lock:
+                # The watch may have ended while a run from the shell held the lock
+                if stopped.is_set():
+                    return
+                # A debug of the previous failure would read the files being refreshed
+                self.cancel_auto_debug()
+                print()
+                changes = self.refresh_codebase(changed)
+                print(f"{Fore.CYAN}Codebase updated: {format_changes(changes)}{Fore.RESET}")
+                result = self.execute_project(cancel=stopped)
+                if result.returncode and not (result.cancelled or result.timed_out or stopped.is_set()):
+                    if self.watch_auto_debug:
+                        self.start_auto_debug(result.stderr_tail)
+                        debugging = True
+                    else:
+                        print("Type 'debug' to debug it.")
         except Exception as e:
             print(f"An error occurred: {e}")
+        if not debugging:
+            sys.stdout.write(self.prompt)
+            sys.stdout.flush()
+
+    def start_auto_debug(self, error):
+        """Debug a watched run's failure on its own thread; any command typed meanwhile cancels it."""
+        scope = CancelScope()
+        thread = threading.Thread(target=self.auto_debug, args=(error, scope), daemon=True)
+        with self.auto_debug_lock:
+            self.auto_debug_task = (thread, scope)
+            thread.start()
+
+    def auto_debug(self, error, scope):
+        print(f"{Fore.CYAN}Debugging the failure; type any command to cancel.{Fore.RESET}")
+        try:
+            # Requests made inside the scope are aborted when it is cancelled
+            with scope:
+                self.stream_completion(self.debug_messages(error), cancel=scope.cancelled)
+        except Exception as e:
+            if not scope.cancelled.is_set():
+                print(f"An error occurred: {e}")
+        if not scope.cancelled.is_set():
+            sys.stdout.write(self.prompt)
+            sys.stdout.flush()
+
+    def cancel_auto_debug(self):
+        """Cancel a debug the watcher started and wait for it to stop. Returns whether one was running."""
+        with self.auto_debug_lock:
+            task, self.auto_debug_task = self.auto_debug_task, None
+        if task is None:
+            return False
+        thread, scope = task
+        if not thread.is_alive():
+            return False
+        scope.cancel()
+        if thread is not threading.current_thread():
+            thread.join()
+        return True
 
     def display_project_files(self, option: str):
         """Display selected project files.
@@ -258,11 +523,8 @@ class CodeDebuggerShell(cmd.Cmd):
             print()
         elif option == 'contents':
             print("File Contents:\n")
-            for file_dict in self.files_and_content:
-                for path, content in file_dict.items():
-                    print(f"{Fore.RED}{path}{Fore.RESET}:\n")
-                    self.highlight_code(path, content)
-                    print()
+            # Files are highlighted only as the pager reaches them
+            page(self.highlighter.render(self.selected_contents().items()))
         else:
             print('Invalid option! Use one of: paths, contents')
 
@@ -275,14 +537,20 @@ class CodeDebuggerShell(cmd.Cmd):
         config project type         -> Prompts user to describe the type of project.
         config project framework    -> Prompts user to input the framework used in project.
         config project run          -> Prompts user to input the command to run the project.
+        config project context_lines -> Sets the lines of context sent around each traceback frame.
+        config project timeout      -> Sets the project run timeout in seconds (0 for none).
+        config project context_mode -> Chooses what debug/feature send: files, symbols or diff.
+        config project diff_base    -> Chooses what diff mode compares against: head or last_run.
+        config project minify       -> Turns stripping comments and docstrings from packed files on or off.
         config openai model         -> Sets the OpenAI model.
         config openai temperature   -> Sets model temperature.
-        config client type          -> Sets the client type (openai, google, open_source).
+        config openai context_budget -> Sets the prompt token budget for the current model.
+        config client type          -> Sets the client type (openai, google, open_source, hedged).
         config client api_key       -> Sets the API key for the selected client type (if applicable).
 
         Description:
-        - project: Configure project-specific settings (language, type, framework, run command).
-        - openai: Configure OpenAI-specific settings (model, temperature).
+        - project: Configure project-specific settings (language, type, framework, run command, context lines, timeout, context mode, diff base, minify).
+        - openai: Configure OpenAI-specific settings (model, temperature, context budget).
         - client: Configure client settings (client type, API key).
         """
         commands = {
@@ -290,8 +558,14 @@ class CodeDebuggerShell(cmd.Cmd):
             'project type': self.set_project_type,
             'project framework': self.set_project_framework,
             'project run': self.set_project_run_command,
+            'project context_lines': self.set_project_context_lines,
+            'project timeout': self.set_project_run_timeout,
+            'project context_mode': self.set_project_context_mode,
+            'project diff_base': self.set_project_diff_base,
+            'project minify': self.set_project_minify,
             'openai model': self.set_openai_model,
             'openai temperature': self.set_openai_temperature,
+            'openai context_budget': self.set_openai_context_budget,
             'client type': self.set_client_type,
             'client api_key': self.set_client_api_key,
         }
@@ -307,9 +581,9 @@ class CodeDebuggerShell(cmd.Cmd):
         """Tab complete for 'config' subcommands."""
         subcommands = ['project', 'openai', 'client']
         if line.startswith('config project'):
-            subcommands = ['language', 'type', 'framework', 'run']
+            subcommands = ['language', 'type', 'framework', 'run', 'context_lines', 'timeout', 'context_mode', 'diff_base', 'minify']
         elif line.startswith('config openai'):
-            subcommands = ['model', 'temperature']
+            subcommands = ['model', 'temperature', 'context_budget']
         elif line.startswith('config client'):
             subcommands = ['type', 'api_key']
         completions = [command for command in subcommands if command.startswith(text)]
@@ -331,6 +605,57 @@ class CodeDebuggerShell(cmd.Cmd):
         """Prompt the user to enter the command to run the project."""
         self.project_run_command = input('Enter command used to run project: ')
 
+    def set_project_context_lines(self):
+        """Prompt the user to set how many lines around each traceback frame are sent."""
+        while True:
+            try:
+                self.project_context_lines = int(input(f'Enter lines of context per frame (currently {self.project_context_lines}): '))
+                if self.project_context_lines >= 0:
+                    break
+                else:
+                    print('Context lines cannot be negative.')
+            except ValueError:
+                print('Invalid input. Please enter a whole number.')
+
+    def set_project_run_timeout(self):
+        """Prompt the user to set the project run timeout in seconds."""
+        while True:
+            try:
+                timeout = float(input('Enter project run timeout in seconds (0 for none): '))
+                if timeout >= 0:
+                    self.project_run_timeout = timeout or None
+                    break
+                else:
+                    print('Timeout cannot be negative.')
+            except ValueError:
+                print('Invalid input. Please enter a numerical value.')
+
+    def set_project_context_mode(self):
+        """Prompt the user to choose what debug and feature requests send as context."""
+        modes = ['files', 'symbols', 'diff']
+        mode = input(f'Enter context mode ({", ".join(modes)}) (currently {self.project_context_mode}): ').strip().lower()
+        if mode in modes:
+            self.project_context_mode = mode
+        else:
+            print(f'Invalid context mode. Choose one of: {", ".join(modes)}.')
+
+    def set_project_minify(self):
+        """Prompt the user to turn minification of packed files on or off."""
+        choice = input(f'Minify packed files? (on/off) (currently {"on" if self.project_minify else "off"}): ').strip().lower()
+        if choice in ('on', 'off'):
+            self.project_minify = choice == 'on'
+        else:
+            print('Invalid choice. Enter on or off.')
+
+    def set_project_diff_base(self):
+        """Prompt the user to choose what diff context mode compares the working tree against."""
+        bases = ['head', 'last_run']
+        base = input(f'Enter diff base ({", ".join(bases)}) (currently {self.project_diff_base}): ').strip().lower()
+        if base in bases:
+            self.project_diff_base = base
+        else:
+            print(f'Invalid diff base. Choose one of: {", ".join(bases)}.')
+
     def set_openai_model(self):
         """Prompt the user to set the OpenAI model."""
         self.openai_model = input('Enter OpenAI model: ')
@@ -347,56 +672,165 @@ class CodeDebuggerShell(cmd.Cmd):
             except ValueError:
                 print('Invalid input. Please enter a numerical value.')
 
+    def set_openai_context_budget(self):
+        """Prompt the user to set the prompt token budget for the current model."""
+        current = context_budget(self.openai_model, self.context_budgets)
+        while True:
+            try:
+                budget = int(input(f'Enter prompt token budget for {self.openai_model} (currently {current}): '))
+                if budget > 0:
+                    self.context_budgets[self.openai_model] = budget
+                    break
+                else:
+                    print('Budget must be a positive number of tokens.')
+            except ValueError:
+                print('Invalid input. Please enter a whole number.')
+
     def set_client_type(self):
-        """Prompt the user to set the client type. Valid options are: openai, google, open_source."""
-        client_type = input('Enter client type (openai, google, open_source): ').lower()
-        if client_type in ['openai', 'google', 'open_source']:
+        """Prompt the user to set the client type. Valid options are: openai, google, open_source, hedged."""
+        available = ', '.join(client_types())
+        client_type = input(f'Enter client type ({available}): ').lower()
+        if client_type in client_types():
             self.client_type = client_type
             self.configure_client()
         else:
-            print('Invalid client type. Choose either "openai", "google", or "open_source".')
+            print(f'Invalid client type. Choose one of: {available}.')
 
     def set_client_api_key(self):
         """Prompt the user to set the API key for the selected client type, if applicable."""
-        if self.client_type in ['openai', 'google']:
-            self.api_key = input('Enter API key for the selected client: ')
-            self.configure_client()
+        if api_key_env(self.client_type) is not None:
+            self.configure_client(api_key=input('Enter API key for the selected client: '))
         else:
             print('API key is not required for the selected client type.')
 
+    @error_handler
+    def do_cache(self, line):
+        """Inspect and control the on-disk response cache.
+
+        Usage:
+        cache stats  -> Shows entries, disk use, hits, misses and hit rate.
+        cache clear  -> Deletes every cached response and resets the counters.
+        cache on     -> Replays identical requests from the cache.
+        cache off    -> Always sends requests to the model.
+
+        Description:
+        Responses to debug, feature and readme requests are cached by a hash of the messages,
+        client type, model and temperature. An identical request on an unchanged codebase is
+        replayed from disk instead of being generated again.
+        """
+        line = line.lower().strip()
+        if line == 'stats':
+            stats = self.response_cache.stats()
+            print(f"Cache {'on' if self.use_cache else 'off'}: {stats['entries']} entries, {stats['bytes'] / 1024:.1f} KB on disk")
+            print(f"Hits: {stats['hits']}  Misses: {stats['misses']}  Hit rate: {stats['hit_rate']:.0%}")
+        elif line == 'clear':
+            self.response_cache.clear()
+            print("Cache cleared!")
+        elif line in ('on', 'off'):
+            self.use_cache = line == 'on'
+            print(f"Cache {line}.")
+        else:
+            print('Invalid subcommand! Use one of: stats, clear, on, off')
+
+    @error_handler
+    def complete_cache(self, text, line, begidx, endidx):
+        """Tab complete for 'cache' subcommands."""
+        subcommands = ['stats', 'clear', 'on', 'off']
+        completions = [command for command in subcommands if command.startswith(text)]
+        return completions
+
+    @error_handler
+    def do_stats(self, line):
+        """Show or export performance metrics for this session.
+
+        Usage:
+        stats                           -> Shows p50/p95 of completion and scraping metrics.
+        stats export jsonl <path>       -> Appends every sample and counter to <path> as JSON lines.
+        stats export prometheus <path>  -> Writes the metrics to <path> in Prometheus text format.
+        stats reset                     -> Discards the recorded metrics.
+
+        Description:
+        Every completion records prompt bytes and estimated tokens, time to first token, total
+        latency, output tokens per second, retries and errors. Updating the codebase and
+        building prompts are timed as well.
+        """
+        args = line.split()
+        if not args:
+            print(metrics.format())
+        elif args[0] == 'reset':
+            metrics.reset()
+            print("Metrics reset.")
+        elif args[0] == 'export' and len(args) == 3 and args[1] in ('jsonl', 'prometheus'):
+            if args[1] == 'jsonl':
+                print(f"Wrote {metrics.export_jsonl(args[2])} lines to {args[2]}.")
+            else:
+                metrics.export_prometheus(args[2])
+                print(f"Wrote metrics to {args[2]}.")
+        else:
+            print('Invalid subcommand! Use one of: stats, stats reset, stats export jsonl|prometheus <path>')
+
+    @error_handler
+    def complete_stats(self, text, line, begidx, endidx):
+        """Tab complete for 'stats' subcommands."""
+        subcommands = ['jsonl', 'prometheus'] if 'export' in line.split()[1:] else ['export', 'reset']
+        completions = [command for command in subcommands if command.startswith(text)]
+        return completions
+
+    @error_handler
+    def do_chat(self, line):
+        """Hold a multi-turn conversation about your project.
+
+        Usage:
+        chat <message>  -> Asks a question, continuing the current session.
+        chat reset      -> Ends the session so the next message starts a new one.
+
+        Description:
+        The selected files are sent with the first message of a session only. Follow-up questions
+        send the new message plus a bounded history; older turns are summarised as the history grows.
+        """
+        line = line.strip()
+        if line.lower() == 'reset':
+            self.chat_session = None
+            print("Chat session reset.")
+            return
+        if not line:
+            print("Usage: chat <message> | chat reset")
+            return
+
+        if self.chat_session is None:
+            header = [
+                {"role": "system", "content": "You are an AI coding assistant. You answer questions about the user's project, debug and fix code, and suggest improvements."},
+                {"role": "user", "content": self.project_details()},
+            ]
+            overhead = sum(estimate_tokens(message["content"]) for message in header) + CHAT_HISTORY_TOKENS
+            context = self.pack_files(line, overhead)
+            header[0]["content"] = self.system_prompt(header[0]["content"], context)
+            self.chat_session = ChatSession(header, context, self.completion_chunks)
+
+        answer = self.stream_completion(self.chat_session.prepare(line), chat=True)
+        self.chat_session.record(line, answer)
+
     @error_handler
     def do_debug(self, line):
         """Debug project with GPT. Input the error message as the argument to the debug command.
 
         Usage:
         debug <error message>
+        debug                -> Debugs the error of the last failed project run.
 
         Description:
         This command allows you to debug the project by providing the relevant error message.
+        If the error contains a traceback or file:line references to selected files, only the lines
+        around those frames are sent. Otherwise the selected files are packed into the context budget.
         The AI assistant will analyze the error and provide a detailed explanation along with potential fixes.
         """
+        if not line.strip():
+            if not self.last_run_error:
+                print("Give the error message to debug, e.g. 'debug <error message>'.")
+                return
+            line = self.last_run_error
 
-        debug_messages = [
-            {"role": "system", "content": "You are an AI coding assistant. You debug and fix code. Make sure to explain every error and mistake in the code that you find and fix."},
-        ]
-
-        project_details = f"This is a {self.project_type} project, the project uses {self.project_language}."
-        if self.project_framework:
-            project_details += f" and {self.project_framework} framework."
-        debug_messages.append({"role": "user", "content": project_details})
-
-        debug_messages.extend(
-            [{"role": "user", "content": f"File: {path} Content: {content}"} for file in self.files_and_content for path, content in file.items()]
-        )
-
-        debug_messages.append({"role": "user", "content": f"This is the problem with the code: {line}"})
-        if 'openai' in self.client_type:
-            for completion in self.client.get_completion(list(debug_messages), model=self.openai_model, temperature=self.openai_model_temperature):
-                print(completion, end='')
-        else:
-            for completion in self.client.get_completion(list(debug_messages)):
-                print(completion, end='')
-        print()
+        self.stream_completion(self.debug_messages(line))
 
     @error_handler
     def do_feature(self, line):
@@ -410,28 +844,7 @@ class CodeDebuggerShell(cmd.Cmd):
         and the AI assistant will provide suggestions or code to implement the feature.
         """
 
-        feature_messages = [
-            {"role": "system", "content": "You are an AI coding assistant. Upon request you improve code, create features and refactor code."},
-        ]
-
-        project_details = f"This is a {self.project_type} project, the project uses {self.project_language}."
-        if self.project_framework:
-            project_details += f" and {self.project_framework} framework."
-        feature_messages.append({"role": "user", "content": project_details})
-
-        feature_messages.extend(
-            [{"role": "user", "content": f"File: {path} Content: {content}"} for file in self.files_and_content for path, content in file.items()]
-        )
-
-        feature_messages.append({"role": "user", "content": f"Programmer's Request: {line}"})
-
-        if 'openai' in self.client_type:
-            for completion in self.client.get_completion(list(feature_messages), model=self.openai_model, temperature=self.openai_model_temperature):
-                print(completion, end='')
-        else:
-            for completion in self.client.get_completion(list(feature_messages)):
-                print(completion, end='')
-        print()
+        self.stream_completion(self.feature_messages(line))
 
     @error_handler
     def do_readme(self, line):
@@ -446,37 +859,183 @@ class CodeDebuggerShell(cmd.Cmd):
         features, and other relevant details.
         """
 
+        self.stream_completion(self.readme_messages(line))
+
+    def debug_messages(self, error, report=print):
+        """Build the debug prompt, sending only the frames' surroundings when the error references selected files."""
+        frame_context = self.mode_context(error, report)
+        if not frame_context:
+            selected = list(self.file_store)
+            frame_context = traceback_context(error, selected, self.project_context_lines)
+            if frame_context:
+                report(f"Context: {len(frame_context)} file(s) referenced by the error.")
+
+        return self.build_messages(
+            "You are an AI coding assistant. You debug and fix code. Make sure to explain every error and mistake in the code that you find and fix.",
+            f"This is the problem with the code: {trim_error(error)}",
+            error,
+            context=frame_context or None,
+            report=report,
+        )
 
-        readme_messages = [
-            {"role": "system", "content": "You are a AI Code Documentation Creator. You Create & Update README files for the projects Github Repositories."},
-        ]
+    def feature_messages(self, request, report=print):
+        """Build the feature request prompt."""
+        mode_context = self.mode_context(request, report)
+        return self.build_messages(
+            "You are an AI coding assistant. Upon request you improve code, create features and refactor code.",
+            f"Programmer's Request: {request}",
+            request,
+            context=mode_context or None,
+            report=report,
+        )
+
+    def selected_contents(self):
+        """Map each selected file to its scraped content, loaded on demand."""
+        return self.file_store
+
+    def mode_context(self, text, report=print):
+        """Context messages for the configured context mode; empty to fall back to packing whole files."""
+        if self.project_context_mode == 'symbols':
+            return self.symbol_context(text, report)
+        if self.project_context_mode == 'diff':
+            return self.changes_context(report)
+        return []
+
+    def changes_context(self, report=print):
+        """Send the hunks changed since HEAD or the last successful run, plus outlines of the unchanged files."""
+        contents = self.selected_contents()
+        changes, base = None, 'HEAD'
+        if self.project_diff_base == 'last_run':
+            changes, base = snapshot_changes(contents, self.file_store.hashes()), 'the last successful run'
+            if changes is None:
+                report("No successful project run recorded since diff_base was set to last_run; diffing against HEAD.")
+                base = 'HEAD'
+        if changes is None:
+            changes = head_changes(list(contents))
+        if changes is None:
+            report("No git repository found; sending whole files.")
+            return []
+        if not changes:
+            report(f"No changes since {base}; sending whole files.")
+            return []
+
+        budget = context_budget(self.openai_model, self.context_budgets)
+        messages, included = diff_context(changes, contents, budget, base)
+        report(f"Context: {included} of {len(changes)} changed file(s) since {base}, plus outlines of unchanged files.")
+        return messages
+
+    def symbol_context(self, text, report=print):
+        """Send only the Python definitions `text` refers to, and the definitions they call."""
+        if self.symbol_index is None:
+            self.symbol_index = SymbolIndex()
+        contents = self.selected_contents()
+        self.symbol_index.refresh(contents, self.file_store.hashes())
+
+        budget = context_budget(self.openai_model, self.context_budgets)
+        messages = self.symbol_index.context(text, contents, budget)
+        if messages:
+            report(f"Context: {len(messages)} definition(s) relevant to the request.")
+        return messages
+
+    def readme_messages(self, request, report=print):
+        """Build the README generation prompt."""
+        return self.build_messages(
+            "You are a AI Code Documentation Creator. You Create & Update README files for the projects Github Repositories.",
+            f"User Request: {request}" if request else "",
+            request,
+            report=report,
+        )
 
+    def project_details(self):
+        """Describe the project for the prompt header."""
         project_details = f"This is a {self.project_type} project, the project uses {self.project_language}."
         if self.project_framework:
             project_details += f" and {self.project_framework} framework."
-        readme_messages.append({"role": "user", "content": project_details})
+        return project_details
 
-        readme_messages.extend(
-            [{"role": "user", "content": f"File: {path} Content: {content}"} for file in self.files_and_content for path, content in file.items()]
-        )
+    @function_timer
+    def build_messages(self, system_prompt, request, query, context=None, report=print):
+        """Assemble a prompt, packing the selected files into the model's context budget.
 
-        if line:
-            readme_messages.append({"role": "user", "content": f"User Request: {line}"})
-
-        if 'openai' in self.client_type:
-            for completion in self.client.get_completion(list(readme_messages), model=self.openai_model, temperature=self.openai_model_temperature):
-                print(completion, end='')
-        else:
-            for completion in self.client.get_completion(list(readme_messages)):
-                print(completion, end='')
-        print()
+        Pass `context` to send those file messages instead of packing the selection.
+        """
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": self.project_details()},
+        ]
+        if context is None:
+            overhead = sum(estimate_tokens(message["content"]) for message in messages) + estimate_tokens(request)
+            context = self.pack_files(query, overhead, report)
+            messages[0]["content"] = self.system_prompt(system_prompt, context)
+        messages.extend(context)
+
+        if request:
+            messages.append({"role": "user", "content": request})
+        return messages
+
+    def pack_files(self, query, overhead=0, report=print):
+        """Pack the selected files most relevant to `query` into what is left of the context budget."""
+        budget = context_budget(self.openai_model, self.context_budgets) - overhead
+        contents = self.selected_contents()
+        if not self.project_minify:
+            packed = pack_context(contents, query, budget)
+            report(packed.report())
+            return packed.messages()
+
+        # Only the files that are packed get minified
+        minified = {}
+
+        def minify(path, content):
+            minified[path] = self.minifier.minify(path, content)
+            return minified[path]
+
+        packed = pack_context(contents, query, budget - estimate_tokens(MARKER_NOTE), minify=minify)
+        if minified:
+            report(format_savings(minified))
+        report(packed.report())
+        return packed.messages()
+
+    def system_prompt(self, prompt, context):
+        """Explain the minifier's line markers alongside `prompt` when `context` holds minified files."""
+        if self.project_minify and context:
+            return f"{prompt} {MARKER_NOTE}"
+        return prompt
+
+    def completion_chunks(self, messages, chat=False):
+        """Stream the configured client's answer to `messages`.
+
+        With `chat` the messages are a running conversation, which the Google client continues as an SDK chat session.
+        """
+        # Metered inside the cache, so replayed hits do not skew the latency figures
+        client = CachedClient(MeteredClient(self.client), self.client_type, self.response_cache)
+        if 'openai' in self.client_type or self.client_type == 'hedged':
+            # Hedged backends configured without a model of their own use the shell's
+            return client.get_completion(list(messages), bypass_cache=not self.use_cache, model=self.openai_model, temperature=self.openai_model_temperature)
+        if self.client_type == 'google' and chat:
+            return client.get_completion(list(messages), bypass_cache=not self.use_cache, is_chat=True)
+        return client.get_completion(list(messages), bypass_cache=not self.use_cache)
+
+    def stream_completion(self, messages, chat=False, cancel=None):
+        """Send `messages` to the configured client, print the streamed answer and return it.
+
+        Setting the `cancel` event stops the answer at its next chunk.
+        """
+        return render_stream(self.completion_chunks(messages, chat=chat), cancel=cancel)
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'batch':
+        from .core.commands.batch import run_batch
+        sys.exit(run_batch(sys.argv[2:]))
+
     prompt = CodeDebuggerShell()
+    prompt.restore_workspace()
 
+    # Platform specific imports
     if platform.system() == 'Windows':
+        import pyreadline
         pyreadline.Readline.parse_and_bind("tab: complete")
     else:
+        import readline
         readline.parse_and_bind("tab: complete")
 
     prompt.cmdloop()
@@ -0,0 +1,111 @@
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from .base_client import BaseClient
+
+_CHUNK, _ERROR, _DONE = range(3)
+
+class AsyncBaseClient(ABC):
+    @abstractmethod
+    def get_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        top_probability: float
+    ) -> AsyncIterator[str]:
+        pass
+
+class ThreadedAsyncClient(AsyncBaseClient):
+    """Async adapter that drives a synchronous client's stream on a worker thread.
+
+    Each completion gets its own thread, which pushes chunks onto the event loop
+    as they arrive, so many completions can stream at once while sharing the
+    wrapped client's connection pool. Abandoning the iterator stops the thread
+    and closes the underlying stream.
+    """
+
+    def __init__(self, client: BaseClient) -> None:
+        self.client = client
+
+    async def get_completion(self, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[str]:
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+
+        def put(kind: int, value=None) -> None:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, (kind, value))
+            except RuntimeError:
+                # The event loop has already shut down; nobody is listening.
+                stop.set()
+
+        def pump() -> None:
+            generator = self.client.get_completion(messages, **kwargs)
+            try:
+                for chunk in generator:
+                    if stop.is_set():
+                        break
+                    put(_CHUNK, chunk)
+            except Exception as error:
+                put(_ERROR, error)
+            else:
+                put(_DONE)
+            finally:
+                generator.close()
+
+        threading.Thread(target=pump, daemon=True).start()
+        try:
+            while True:
+                kind, value = await queue.get()
+                if kind == _CHUNK:
+                    yield value
+                elif kind == _ERROR:
+                    raise value
+                else:
+                    break
+        finally:
+            stop.set()
+
+class AsyncOpenAIClient(ThreadedAsyncClient):
+    def __init__(self, api_host: str, api_key: str, **kwargs) -> None:
+        from .openai_client import OpenAIClient
+        super().__init__(OpenAIClient(api_host, api_key, **kwargs))
+
+class AsyncGoogleClient(ThreadedAsyncClient):
+    def __init__(self, api_key: str) -> None:
+        from .google_client import GoogleClient
+        super().__init__(GoogleClient(api_key))
+
+async def fan_out(
+    client: AsyncBaseClient,
+    prompts: List[List[Dict[str, str]]],
+    concurrency: int = 4,
+    on_chunk: Optional[Callable[[int, str], None]] = None,
+    **kwargs
+) -> List[str]:
+    """Run several prompts concurrently, at most `concurrency` at a time.
+
+    Returns the full response to each prompt in the order given. `on_chunk` is
+    called with the prompt's index and each chunk as it streams in. If any
+    prompt fails, the others are cancelled and the error is raised.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(index: int, messages: List[Dict[str, str]]) -> str:
+        async with semaphore:
+            chunks = []
+            async for chunk in client.get_completion(messages, **kwargs):
+                chunks.append(chunk)
+                if on_chunk is not None:
+                    on_chunk(index, chunk)
+            return "".join(chunks)
+
+    tasks = [asyncio.ensure_future(run(index, messages)) for index, messages in enumerate(prompts)]
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -1,7 +1,19 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Generator, List
+from typing import Dict, Generator, List, Optional
 
 class BaseClient(ABC):
+    @classmethod
+    def from_env(cls, api_key: Optional[str] = None) -> "BaseClient":
+        """Build the client from `api_key` and its own environment settings."""
+        return cls()
+
+    def reconfigure(self, api_key: Optional[str]) -> bool:
+        """Apply a new API key in place. Returns False if the client must be rebuilt instead."""
+        return False
+
+    def close(self) -> None:
+        pass
+
     @abstractmethod
     def get_completion(
         self,
@@ -10,4 +22,4 @@ class BaseClient(ABC):
         temperature: float,
         top_probability: float
     ) -> Generator[str, None, None]:
-        pass
\ No newline at end of file
+        pass
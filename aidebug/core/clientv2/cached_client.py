@@ -0,0 +1,42 @@
+from typing import Dict, Generator, List
+
+from .base_client import BaseClient
+from ..utils.response_cache import ResponseCache, cache_key
+
+REPLAY_CHUNK_SIZE = 64
+
+class CachedClient(BaseClient):
+    """Serve repeated requests from a ResponseCache, falling through to `client` on a miss.
+
+    Cached responses are replayed in small chunks through the same generator
+    interface, so callers cannot tell a hit from a live stream. Only responses
+    that streamed to completion are stored.
+    """
+
+    def __init__(self, client: BaseClient, client_type: str, cache: ResponseCache) -> None:
+        self.client = client
+        self.client_type = client_type
+        self.cache = cache
+
+    def get_completion(
+        self,
+        messages: List[Dict[str, str]],
+        bypass_cache: bool = False,
+        **kwargs
+    ) -> Generator[str, None, None]:
+        if bypass_cache:
+            yield from self.client.get_completion(messages, **kwargs)
+            return
+
+        key = cache_key(messages, self.client_type, kwargs.get("model"), kwargs.get("temperature"))
+        response = self.cache.get(key)
+        if response is not None:
+            for start in range(0, len(response), REPLAY_CHUNK_SIZE):
+                yield response[start:start + REPLAY_CHUNK_SIZE]
+            return
+
+        chunks = []
+        for chunk in self.client.get_completion(messages, **kwargs):
+            chunks.append(chunk)
+            yield chunk
+        self.cache.put(key, "".join(chunks))
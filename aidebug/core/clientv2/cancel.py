@@ -0,0 +1,63 @@
+import socket
+import threading
+from typing import List, Optional
+
+_local = threading.local()
+
+
+class CancelScope:
+    """Lets another thread abort the HTTP requests made inside `with scope:`.
+
+    Connections that take part in a request while the scope is active on the
+    current thread register with it (see openai_client). `cancel` shuts their
+    sockets down, so a read blocked on a stalled server fails at once instead
+    of waiting for REQUEST_TIMEOUT. Once the scope is left, cancelling it does
+    nothing: its connections are back in the pool and may serve other requests.
+    """
+
+    def __init__(self) -> None:
+        self.cancelled = threading.Event()
+        self._connections: List[object] = []
+        self._open = True
+        self._lock = threading.Lock()
+        self._previous: Optional["CancelScope"] = None
+
+    def __enter__(self) -> "CancelScope":
+        self._previous = getattr(_local, "scope", None)
+        _local.scope = self
+        return self
+
+    def __exit__(self, *exc) -> None:
+        _local.scope = self._previous
+        with self._lock:
+            self._open = False
+            self._connections.clear()
+
+    def register(self, connection) -> None:
+        with self._lock:
+            if self._open:
+                self._connections.append(connection)
+
+    def cancel(self) -> None:
+        with self._lock:
+            if not self._open or self.cancelled.is_set():
+                return
+            self.cancelled.set()
+            connections = list(self._connections)
+        for connection in connections:
+            shutdown(connection)
+
+
+def current_scope() -> Optional[CancelScope]:
+    return getattr(_local, "scope", None)
+
+
+def shutdown(connection) -> None:
+    """Shut down a connection's socket, waking any thread blocked reading from it."""
+    sock = getattr(connection, "sock", None)
+    if sock is None:
+        return
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
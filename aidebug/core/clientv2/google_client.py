@@ -1,24 +1,125 @@
 import os
-from typing import Dict, Generator, List
+from typing import Dict, Generator, List, Optional, Tuple
 
-from google.generativeai import configure, GenerativeModel
 from .base_client import BaseClient
 
 REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", "60"))
 DISABLE_STREAMING = os.getenv("DISABLE_STREAMING", "false").lower() == "true"
 
+# OpenAI-style roles to Gemini roles; system messages become the model's system instruction.
+ROLES = {"user": "user", "assistant": "model", "model": "model"}
+
+
+def _sdk():
+    # Imported on first use: the SDK pulls in grpc and protobuf.
+    import google.generativeai as genai
+    return genai
+
+
+def to_contents(messages: List[Dict[str, str]]) -> Tuple[Optional[str], List[Dict]]:
+    """Split messages into a system instruction and Gemini contents, merging consecutive turns of one role."""
+    system = [message["content"] for message in messages if message["role"] == "system"]
+    contents = []
+    for message in messages:
+        role = ROLES.get(message["role"])
+        if role is None:
+            continue
+        if contents and contents[-1]["role"] == role:
+            contents[-1]["parts"].append(message["content"])
+        else:
+            contents.append({"role": role, "parts": [message["content"]]})
+    return ("\n\n".join(system) or None), contents
+
+
+def chunk_text(chunk) -> str:
+    # .text raises for chunks without text parts, e.g. a final chunk carrying only safety ratings
+    try:
+        return chunk.text
+    except ValueError:
+        return ""
+
+
+def response_texts(response) -> Generator[str, None, None]:
+    """The text of each chunk of a streamed response, or the whole text of an unstreamed one."""
+    if DISABLE_STREAMING:
+        yield chunk_text(response)
+        return
+    for chunk in response:
+        text = chunk_text(chunk)
+        if text:
+            yield text
+
+
 class GoogleClient(BaseClient):
+    """Gemini backend reusing one GenerativeModel per model name and system instruction.
+
+    Replies are streamed. With `is_chat` the conversation is continued through
+    the SDK's chat object, which is reused while the messages extend the turns
+    it already holds, so only the new message is sent. The opening turn may
+    change its leading parts, as ChatSession swaps the files it sent first for
+    a note naming them; the chat still holds the files themselves.
+    """
+
     def __init__(self, api_key: str) -> None:
         self.api_key = api_key
-        self.api_host = "https://geminai.googleapis.com"  # Example API host, update as necessary
-        configure(api_key=self.api_key)
-        self.model = GenerativeModel('gemini-1.5-pro')
+        _sdk().configure(api_key=self.api_key)
+        self._models: Dict[Tuple[str, Optional[str]], object] = {}
+        self._chat = None
+        self._chat_key: Optional[Tuple[str, Optional[str]]] = None
+        self._chat_contents: List[Dict] = []
+
+    @classmethod
+    def from_env(cls, api_key: Optional[str] = None) -> "GoogleClient":
+        return cls(api_key)
+
+    def reconfigure(self, api_key: Optional[str]) -> bool:
+        self.api_key = api_key
+        _sdk().configure(api_key=api_key)
+        self.close()
+        return True
+
+    def close(self) -> None:
+        self._models.clear()
+        self._chat = None
+        self._chat_key = None
+        self._chat_contents = []
+
+    def model(self, name: str, system_instruction: Optional[str] = None):
+        key = (name, system_instruction)
+        model = self._models.get(key)
+        if model is None:
+            model = self._models[key] = _sdk().GenerativeModel(name, system_instruction=system_instruction)
+        return model
+
+    def _request(self, messages: List[Dict[str, str]], model: str, generation_config: Dict, is_chat: bool = False) -> Generator[str, None, None]:
+        system, contents = to_contents(messages)
+        options = {"generation_config": generation_config, "stream": not DISABLE_STREAMING, "request_options": {"timeout": REQUEST_TIMEOUT}}
+        if not is_chat:
+            yield from response_texts(self.model(model, system).generate_content(contents, **options))
+            return
+
+        key = (model, system)
+        history, latest = contents[:-1], contents[-1]
+        if self._chat is None or self._chat_key != key or not self._continues(history):
+            self._chat = self.model(model, system).start_chat(history=history)
+            self._chat_key = key
+        # Until the reply completes the chat's turns are unknown, so a failed turn forces a fresh chat
+        self._chat_contents = None
 
-    def _request(self, messages: List[Dict[str, str]], is_chat: bool = False) -> Generator[str, None, None]:
-        prompt = "\n".join(message["content"] for message in messages)
+        reply = []
+        for text in response_texts(self._chat.send_message(latest, **options)):
+            reply.append(text)
+            yield text
+        self._chat_contents = contents + [{"role": "model", "parts": ["".join(reply)]}]
 
-        response = self.model.chat(prompt) if is_chat else self.model.generate_content(prompt)
-        yield response.text
+    def _continues(self, history: List[Dict]) -> bool:
+        """Whether `history` is the turns the chat holds, allowing the opening turn's context to differ."""
+        held = self._chat_contents
+        if not held or len(held) != len(history) or held[1:] != history[1:]:
+            return False
+        first, opening = history[0], held[0]
+        # The opening question, the last part of the first turn, must be the same
+        return first["role"] == opening["role"] and first["parts"][-1:] == opening["parts"][-1:]
 
     def get_completion(
         self,
@@ -28,6 +129,5 @@ class GoogleClient(BaseClient):
         top_probability: float = 1,
         is_chat: bool = False,
     ) -> Generator[str, None, None]:
-        if model:
-            self.model = GenerativeModel(model)
-        yield from self._request(messages, is_chat=is_chat)
\ No newline at end of file
+        generation_config = {"temperature": temperature, "top_p": top_probability}
+        yield from self._request(messages, model or "gemini-1.5-pro", generation_config, is_chat=is_chat)
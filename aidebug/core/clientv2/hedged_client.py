@@ -0,0 +1,223 @@
+import os
+import time
+import queue
+import threading
+from collections import deque
+from typing import Deque, Dict, Generator, List, Optional
+
+from .base_client import BaseClient
+from .cancel import CancelScope
+from .registry import api_key_env, load_client
+from ..utils.metrics import metrics, percentile
+
+HEDGE_BACKENDS = os.getenv("HEDGE_BACKENDS", "openai")
+HEDGE_DELAY = float(os.getenv("HEDGE_DELAY", "2.0"))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "0.05"))
+HEDGE_QUANTILE = float(os.getenv("HEDGE_QUANTILE", "0.95"))
+# Samples needed before a backend's own statistics replace HEDGE_DELAY.
+HEDGE_MIN_SAMPLES = 5
+HEDGE_WINDOW = 50
+
+_CHUNK, _ERROR, _DONE = range(3)
+
+
+class Backend:
+    """One configured client with the time to first token of its recent completions.
+
+    Cancelled attempts are recorded as lower bounds: they count towards the
+    ranking but not towards the hedge delay, which would otherwise grow with
+    every stall.
+    """
+
+    def __init__(self, name: str, client: BaseClient, model: Optional[str] = None, client_type: str = "openai") -> None:
+        self.name = name
+        self.client = client
+        self.model = model
+        self.client_type = client_type
+        self.first_token_seconds: Deque[float] = deque(maxlen=HEDGE_WINDOW)
+        self.answered_seconds: Deque[float] = deque(maxlen=HEDGE_WINDOW)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, answered: bool = True) -> None:
+        with self._lock:
+            self.first_token_seconds.append(seconds)
+            if answered:
+                self.answered_seconds.append(seconds)
+
+    def typical(self) -> Optional[float]:
+        """Median time to first token, or None without enough samples."""
+        with self._lock:
+            samples = list(self.first_token_seconds)
+        return percentile(samples, 0.5) if len(samples) >= HEDGE_MIN_SAMPLES else None
+
+    def hedge_delay(self, default: float = HEDGE_DELAY) -> float:
+        """How long to wait for this backend's first token before hedging: its HEDGE_QUANTILE latency."""
+        with self._lock:
+            samples = list(self.answered_seconds)
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return default
+        return max(percentile(samples, HEDGE_QUANTILE), HEDGE_MIN_DELAY)
+
+
+def parse_backend(spec: str) -> Backend:
+    """Build a backend from `type[:model][@host]`, e.g. `openai:gpt-4o@http://localhost:8000`.
+
+    A host can only be given for OpenAI-compatible backends; for any other
+    type, e.g. `google@http://localhost:8000`, a ValueError is raised.
+    """
+    name = spec.strip()
+    client_type, _, host = name.partition("@")
+    client_type, _, model = client_type.partition(":")
+    key_env = api_key_env(client_type)
+    api_key = os.getenv(key_env) if key_env else None
+    client_class = load_client(client_type)
+    if host:
+        from .openai_client import OpenAIClient
+        if not issubclass(client_class, OpenAIClient):
+            raise ValueError(f"Backend {name!r}: a host can only be given for OpenAI-compatible backends, not {client_type}")
+        client = client_class(host, api_key)
+    else:
+        client = client_class.from_env(api_key)
+    return Backend(name, client, model or None, client_type)
+
+
+class _Attempt:
+    __slots__ = ('backend', 'started', 'scope', 'thread')
+
+    def __init__(self, backend: Backend) -> None:
+        self.backend = backend
+        self.started = time.perf_counter()
+        # Cancelling aborts the attempt's HTTP request even while it waits on a stalled server
+        self.scope = CancelScope()
+        self.thread: Optional[threading.Thread] = None
+
+    def cancel(self) -> None:
+        self.scope.cancel()
+
+
+class HedgedClient(BaseClient):
+    """Send a request to the fastest known backend and hedge to the next one if it is slow.
+
+    If no token arrives within the primary's hedge delay, the same messages
+    go to the next backend as well. Whichever streams first is used and the
+    other is cancelled, closing its connection. A backend that fails before
+    answering is replaced by the next one straight away. Backends are tried
+    in order of their median time to first token, once each has been
+    measured a few times. A losing attempt counts as at least as slow as the
+    time it was given, so a stalled provider drops down the order. Backends
+    configured without a model use the one asked for, if they are
+    OpenAI-compatible.
+    """
+
+    def __init__(self, backends: List[Backend]) -> None:
+        if not backends:
+            raise ValueError("HedgedClient needs at least one backend")
+        self.backends = backends
+
+    @classmethod
+    def from_env(cls, api_key: Optional[str] = None) -> "HedgedClient":
+        return cls([parse_backend(spec) for spec in HEDGE_BACKENDS.split(",") if spec.strip()])
+
+    def close(self) -> None:
+        for backend in self.backends:
+            backend.client.close()
+
+    def ranked(self) -> List[Backend]:
+        # Backends without enough statistics go first, in configured order, so every backend gets measured
+        return sorted(self.backends, key=lambda backend: backend.typical() or 0)
+
+    def _stream(self, attempt: _Attempt, messages: List[Dict[str, str]], kwargs: Dict, events: "queue.Queue") -> None:
+        try:
+            backend = attempt.backend
+            model = kwargs.pop("model", None)
+            if backend.model:
+                kwargs["model"] = backend.model
+            elif model and "openai" in backend.client_type:
+                kwargs["model"] = model
+            with attempt.scope:
+                generator = backend.client.get_completion(messages, **kwargs)
+                try:
+                    for chunk in generator:
+                        if attempt.scope.cancelled.is_set():
+                            return
+                        events.put((attempt, _CHUNK, chunk))
+                finally:
+                    # Closing the generator closes the backend's stream, e.g. hands back the HTTP connection
+                    generator.close()
+            events.put((attempt, _DONE, None))
+        except Exception as e:
+            events.put((attempt, _ERROR, e))
+
+    def _start(self, backend: Backend, messages: List[Dict[str, str]], kwargs: Dict, events: "queue.Queue") -> _Attempt:
+        attempt = _Attempt(backend)
+        attempt.thread = threading.Thread(target=self._stream, args=(attempt, messages, dict(kwargs), events), daemon=True)
+        attempt.thread.start()
+        return attempt
+
+    def get_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: float = 1,
+        top_probability: float = 1,
+    ) -> Generator[str, None, None]:
+        kwargs = {"model": model, "temperature": temperature, "top_probability": top_probability}
+        events: "queue.Queue" = queue.Queue()
+        waiting = self.ranked()
+        attempts = [self._start(waiting.pop(0), messages, kwargs, events)]
+        running = 1
+        hedged = False
+        deadline = time.perf_counter() + attempts[0].backend.hedge_delay()
+        winner = None
+        last_error = None
+
+        try:
+            while True:
+                timeout = None
+                if winner is None and waiting and not hedged:
+                    timeout = max(deadline - time.perf_counter(), 0)
+                try:
+                    attempt, kind, payload = events.get(timeout=timeout)
+                except queue.Empty:
+                    hedged = True
+                    metrics.increment("completion_hedges_total")
+                    attempts.append(self._start(waiting.pop(0), messages, kwargs, events))
+                    running += 1
+                    continue
+
+                if winner is None:
+                    if kind == _ERROR:
+                        last_error = payload
+                        running -= 1
+                        if waiting:
+                            attempts.append(self._start(waiting.pop(0), messages, kwargs, events))
+                            running += 1
+                            deadline = time.perf_counter() + attempts[-1].backend.hedge_delay()
+                        elif running == 0:
+                            raise last_error
+                        continue
+                    if kind == _CHUNK and not payload:
+                        continue
+                    winner = attempt
+                    first_token = time.perf_counter() - winner.started
+                    winner.backend.record(first_token)
+                    for other in attempts:
+                        if other is not winner:
+                            other.cancel()
+                            # Given at least as long as the winner needed, it is at least that slow
+                            waited = time.perf_counter() - other.started
+                            if waited >= first_token:
+                                other.backend.record(waited, answered=False)
+                    if kind == _DONE:
+                        return
+                    yield payload
+                elif attempt is winner:
+                    if kind == _CHUNK:
+                        yield payload
+                    elif kind == _DONE:
+                        return
+                    else:
+                        raise payload
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
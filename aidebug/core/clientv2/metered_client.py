@@ -0,0 +1,47 @@
+import time
+from typing import Dict, Generator, List
+
+from .base_client import BaseClient
+from ..utils.context_packer import estimate_tokens
+from ..utils.metrics import Metrics, metrics as default_metrics
+
+class MeteredClient(BaseClient):
+    """Record the size, latency and throughput of each completion `client` streams.
+
+    Time to first token, total latency and output tokens per second are only
+    recorded for completions that stream to the end; failures count as errors.
+    """
+
+    def __init__(self, client: BaseClient, metrics: Metrics = default_metrics) -> None:
+        self.client = client
+        self.metrics = metrics
+
+    def get_completion(self, messages: List[Dict[str, str]], **kwargs) -> Generator[str, None, None]:
+        prompt = "".join(message["content"] for message in messages)
+        self.metrics.increment("completions_total")
+        self.metrics.observe("completion_prompt_bytes", len(prompt.encode("utf-8", errors="ignore")))
+        self.metrics.observe("completion_prompt_tokens", estimate_tokens(prompt))
+
+        start_time = time.perf_counter()
+        first_token = None
+        chunks = []
+        try:
+            for chunk in self.client.get_completion(messages, **kwargs):
+                if first_token is None and chunk:
+                    first_token = time.perf_counter()
+                chunks.append(chunk)
+                yield chunk
+        except Exception:
+            self.metrics.increment("completion_errors_total")
+            raise
+
+        latency = time.perf_counter() - start_time
+        self.metrics.observe("completion_latency_seconds", latency)
+        if first_token is None:
+            return
+        self.metrics.observe("completion_ttft_seconds", first_token - start_time)
+        output_tokens = estimate_tokens("".join(chunks))
+        self.metrics.observe("completion_output_tokens", output_tokens)
+        generation_time = time.perf_counter() - first_token
+        if generation_time > 0:
+            self.metrics.observe("completion_output_tokens_per_second", output_tokens / generation_time)
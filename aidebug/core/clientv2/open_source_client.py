@@ -1,18 +1,170 @@
-from transformers import pipeline
-from typing import Dict, Generator, List
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Generator, List, Optional, Tuple
+
 from .base_client import BaseClient
 
+LOCAL_MODEL = os.getenv("LOCAL_MODEL", "gpt2")
+LOCAL_MODEL_CACHE_BYTES = int(os.getenv("LOCAL_MODEL_CACHE_BYTES", str(4 * 1024 ** 3)))
+LOCAL_THREADS = int(os.getenv("LOCAL_THREADS", "0"))
+LOCAL_MAX_NEW_TOKENS = int(os.getenv("LOCAL_MAX_NEW_TOKENS", "512"))
+LOCAL_QUANTIZE = os.getenv("LOCAL_QUANTIZE", "false").lower() == "true"
+
+
+class LoadedModel:
+    __slots__ = ("tokenizer", "model", "bytes")
+
+    def __init__(self, tokenizer, model, size: int) -> None:
+        self.tokenizer = tokenizer
+        self.model = model
+        self.bytes = size
+
+
+def load_model(name: str, quantize: bool) -> LoadedModel:
+    """Load a causal language model and its tokenizer for CPU inference.
+
+    With `quantize` the linear layers are dynamically quantized to int8. The
+    recorded size is taken before quantizing, so it errs on the large side.
+    """
+    # Imported on first use: torch and transformers take seconds to import.
+    import torch
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(name)
+    model = AutoModelForCausalLM.from_pretrained(name, low_cpu_mem_usage=True)
+    model.eval()
+    size = sum(tensor.numel() * tensor.element_size() for tensor in list(model.parameters()) + list(model.buffers()))
+    if quantize:
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return LoadedModel(tokenizer, model, size)
+
+
+class ModelCache:
+    """Loaded models kept in least recently used order, evicted once they exceed `max_bytes` together.
+
+    The most recently used model is always kept, even if it alone is over the limit.
+    """
+
+    def __init__(self, max_bytes: int = LOCAL_MODEL_CACHE_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self._models: "OrderedDict[Tuple[str, bool], LoadedModel]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name: str, quantize: bool = False) -> LoadedModel:
+        key = (name, quantize)
+        with self._lock:
+            loaded = self._models.get(key)
+            if loaded is not None:
+                self._models.move_to_end(key)
+                return loaded
+            loaded = self._models[key] = load_model(name, quantize)
+            while len(self._models) > 1 and sum(entry.bytes for entry in self._models.values()) > self.max_bytes:
+                self._models.popitem(last=False)
+            return loaded
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+
+
 class OpenSourceClient(BaseClient):
-    def __init__(self) -> None:
-        self.pipeline = pipeline('text-generation')
+    """Run Hugging Face causal language models locally, streaming tokens as they are generated.
+
+    `threads` sets the CPU threads torch uses (0 keeps its default),
+    `max_new_tokens` caps each reply and `quantize` applies int8 dynamic
+    quantization to the linear layers, which is usually faster on CPU.
+    """
+
+    def __init__(
+        self,
+        default_model: str = LOCAL_MODEL,
+        threads: int = LOCAL_THREADS,
+        max_new_tokens: int = LOCAL_MAX_NEW_TOKENS,
+        quantize: bool = LOCAL_QUANTIZE,
+        cache: Optional[ModelCache] = None,
+    ) -> None:
+        self.default_model = default_model
+        self.threads = threads
+        self.max_new_tokens = max_new_tokens
+        self.quantize = quantize
+        self.models = cache or ModelCache()
+
+    def close(self) -> None:
+        self.models.clear()
+
+    def prompt_ids(self, loaded: LoadedModel, messages: List[Dict[str, str]]):
+        """Tokenize the conversation, keeping the most recent tokens that fit beside the reply."""
+        tokenizer = loaded.tokenizer
+        if getattr(tokenizer, "chat_template", None):
+            # Asked for as a dict: whether a bare tensor or an encoding comes back by default varies by version
+            encoded = tokenizer.apply_chat_template(messages, add_generation_prompt=True, return_tensors="pt", return_dict=True)
+            input_ids = encoded["input_ids"]
+        else:
+            prompt = "\n\n".join(message["content"] for message in messages)
+            input_ids = tokenizer(prompt, return_tensors="pt").input_ids
+
+        config = loaded.model.config
+        context_length = getattr(config, "max_position_embeddings", None) or getattr(config, "n_positions", None)
+        if context_length:
+            input_ids = input_ids[:, -max(context_length - self.max_new_tokens, 1):]
+        return input_ids
 
     def get_completion(
         self,
         messages: List[Dict[str, str]],
-        model: str = "gpt-2",
+        model: Optional[str] = None,
         temperature: float = 1,
         top_probability: float = 1,
     ) -> Generator[str, None, None]:
-        prompt = "\n".join(message["content"] for message in messages)
-        result = self.pipeline(prompt, model=model, temperature=temperature, top_k=top_probability, return_full_text=False)
-        yield result[0]['generated_text']
\ No newline at end of file
+        import torch
+        from transformers import StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+
+        if self.threads:
+            torch.set_num_threads(self.threads)
+        loaded = self.models.get(model or self.default_model, self.quantize)
+        input_ids = self.prompt_ids(loaded, messages)
+
+        stop = threading.Event()
+
+        class StopRequested(StoppingCriteria):
+            def __call__(self, input_ids, scores, **kwargs):
+                return torch.full((input_ids.shape[0],), stop.is_set(), dtype=torch.bool, device=input_ids.device)
+
+        tokenizer = loaded.tokenizer
+        streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+        generate_kwargs = {
+            "input_ids": input_ids,
+            "attention_mask": torch.ones_like(input_ids),
+            "max_new_tokens": self.max_new_tokens,
+            "do_sample": temperature > 0,
+            "streamer": streamer,
+            "stopping_criteria": StoppingCriteriaList([StopRequested()]),
+            "pad_token_id": tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id,
+        }
+        if temperature > 0:
+            generate_kwargs.update(temperature=temperature, top_p=top_probability)
+
+        errors = []
+
+        def generate() -> None:
+            try:
+                with torch.inference_mode():
+                    loaded.model.generate(**generate_kwargs)
+            except Exception as e:
+                errors.append(e)
+                # Unblock the consumer, which would otherwise wait for tokens forever
+                streamer.end()
+
+        thread = threading.Thread(target=generate, daemon=True)
+        thread.start()
+        try:
+            for text in streamer:
+                if text:
+                    yield text
+        finally:
+            # Stops generation early when the caller abandons the stream, e.g. on Ctrl-C
+            stop.set()
+            thread.join()
+        if errors:
+            raise errors[0]
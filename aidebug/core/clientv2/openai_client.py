@@ -1,17 +1,92 @@
 import os
 import json
 import requests
-from typing import Dict, Generator, List
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+from typing import Dict, Generator, List, Optional
 
 from .base_client import BaseClient
+from .cancel import current_scope, shutdown
+from .sse import SSEParser
+from ..utils.metrics import metrics
 
 REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", "60"))
 DISABLE_STREAMING = os.getenv("DISABLE_STREAMING", "false").lower() == "true"
+POOL_SIZE = int(os.getenv("POOL_SIZE", "10"))
+CONNECT_RETRIES = int(os.getenv("CONNECT_RETRIES", "3"))
+
+class _ScopedConnection:
+    """Register with the thread's CancelScope for each request, so it can be aborted from another thread."""
+
+    def request(self, *args, **kwargs):
+        scope = current_scope()
+        if scope is not None:
+            scope.register(self)
+        super().request(*args, **kwargs)
+        # Cancelled while connecting, before there was a socket to shut down
+        if scope is not None and scope.cancelled.is_set():
+            shutdown(self)
+
+
+class _ScopedHTTPConnection(_ScopedConnection, HTTPConnection):
+    pass
+
+
+class _ScopedHTTPSConnection(_ScopedConnection, HTTPSConnection):
+    pass
+
+
+class _ScopedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _ScopedHTTPConnection
+
+
+class _ScopedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _ScopedHTTPSConnection
+
+
+class _ScopedAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _ScopedHTTPConnectionPool, "https": _ScopedHTTPSConnectionPool}
+
 
 class OpenAIClient(BaseClient):
-    def __init__(self, api_host: str, api_key: str) -> None:
-        self.__api_key = api_key
+    def __init__(self, api_host: str, api_key: str, pool_size: int = POOL_SIZE, retries: int = CONNECT_RETRIES) -> None:
         self.api_host = api_host
+        self.session = requests.Session()
+        self.set_api_key(api_key)
+
+        # Only retry failures to connect: the request never reached the server, so
+        # resending it cannot produce a duplicate completion.
+        retry = Retry(total=retries, connect=retries, read=False, status=0, redirect=0, backoff_factor=0.3)
+        # Requests made inside a CancelScope can be aborted mid-flight, e.g. a hedged request that lost
+        adapter = _ScopedAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @classmethod
+    def from_env(cls, api_key: Optional[str] = None) -> "OpenAIClient":
+        api_host = os.getenv("OPENAI_API_HOST", "https://api.openai.com")
+        return cls(api_host, api_key)
+
+    def reconfigure(self, api_key: Optional[str]) -> bool:
+        # Keep the pooled session and its warm connections unless the host moved.
+        if self.api_host != os.getenv("OPENAI_API_HOST", "https://api.openai.com"):
+            return False
+        self.set_api_key(api_key)
+        return True
+
+    def set_api_key(self, api_key: str) -> None:
+        self.__api_key = api_key
+        self.session.headers.update({
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.__api_key}",
+        })
+
+    def close(self) -> None:
+        self.session.close()
 
     def _request(
         self,
@@ -28,26 +103,39 @@ class OpenAIClient(BaseClient):
             "stream": not DISABLE_STREAMING,
         }
         endpoint = f"{self.api_host}/v1/chat/completions"
-        response = requests.post(
+        response = self.session.post(
             endpoint,
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.__api_key}",
-            },
             json=data,
             timeout=REQUEST_TIMEOUT,
             stream=not DISABLE_STREAMING,
         )
-        response.raise_for_status()
-        if not DISABLE_STREAMING:
-            for line in response.iter_lines():
-                data = line.lstrip(b"data: ").decode("utf-8")
-                if data == "[DONE]":
+        retries = getattr(response.raw, "retries", None)
+        if retries is not None and retries.history:
+            metrics.increment("completion_retries_total", len(retries.history))
+        # Closing the response hands its connection back to the pool for the next request.
+        with response:
+            response.raise_for_status()
+            if not DISABLE_STREAMING:
+                yield from self._stream(response)
+            else:
+                yield response.json()['choices'][0]['message']['content']
+
+    def _stream(self, response: requests.Response) -> Generator[str, None, None]:
+        parser = SSEParser()
+        done = False
+        for chunk in response.iter_content(chunk_size=None):
+            # Keep reading to the end of the body after [DONE] so the connection can be reused.
+            if done:
+                continue
+            for event in parser.feed(chunk):
+                if event.data == "[DONE]":
+                    done = True
                     break
-                if data:
-                    yield json.loads(data)["choices"][0].get("delta", {}).get("content", "")
-        else:
-            yield response.json()['choices'][0]['message']['content']
+                choices = json.loads(event.data).get("choices")
+                if choices:
+                    content = choices[0].get("delta", {}).get("content")
+                    if content:
+                        yield content
 
     def get_completion(
         self,
@@ -61,4 +149,4 @@ class OpenAIClient(BaseClient):
             model,
             temperature,
             top_probability,
-        )
\ No newline at end of file
+        )
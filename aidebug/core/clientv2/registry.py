@@ -0,0 +1,42 @@
+import importlib
+from typing import Dict, List, Optional, Tuple, Type
+
+from .base_client import BaseClient
+
+# name -> (module, class name, environment variable holding the API key)
+_REGISTRY: Dict[str, Tuple[str, str, Optional[str]]] = {
+    "openai": ("aidebug.core.clientv2.openai_client", "OpenAIClient", "OPENAI_API_KEY"),
+    "google": ("aidebug.core.clientv2.google_client", "GoogleClient", "GOOGLE_API_KEY"),
+    "open_source": ("aidebug.core.clientv2.open_source_client", "OpenSourceClient", None),
+    "hedged": ("aidebug.core.clientv2.hedged_client", "HedgedClient", None),
+}
+_LOADED: Dict[str, Type[BaseClient]] = {}
+
+
+def register_client(name: str, module: str, class_name: str, api_key_env: Optional[str] = None) -> None:
+    """Make a backend selectable by name without importing it until it is used."""
+    _REGISTRY[name] = (module, class_name, api_key_env)
+    _LOADED.pop(name, None)
+
+
+def client_types() -> List[str]:
+    return list(_REGISTRY)
+
+
+def _entry(name: str) -> Tuple[str, str, Optional[str]]:
+    try:
+        return _REGISTRY[name]
+    except KeyError:
+        raise ValueError(f"Unknown client type: {name}") from None
+
+
+def api_key_env(name: str) -> Optional[str]:
+    return _entry(name)[2]
+
+
+def load_client(name: str) -> Type[BaseClient]:
+    """Import the backend registered as `name` on first use and return its class."""
+    if name not in _LOADED:
+        module, class_name, _ = _entry(name)
+        _LOADED[name] = getattr(importlib.import_module(module), class_name)
+    return _LOADED[name]
@@ -0,0 +1,95 @@
+from typing import List, Optional
+
+
+class SSEEvent:
+    __slots__ = ('event', 'data', 'id')
+
+    def __init__(self, event: str, data: str, id: Optional[str]) -> None:
+        self.event = event
+        self.data = data
+        self.id = id
+
+    def __repr__(self) -> str:
+        return f"SSEEvent({self.event!r}, {self.data!r}, {self.id!r})"
+
+
+class SSEParser:
+    """Incremental parser for `text/event-stream` bodies.
+
+    Bytes can be fed in arbitrary chunks, including ones that split a line or
+    a multi-byte character. Multi-line `data:` fields are joined with newlines,
+    comment lines (starting with ':') are ignored, and an event is dispatched
+    at each blank line, following the WHATWG server-sent events rules.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = b''
+        self._data: List[bytes] = []
+        self._event = 'message'
+        self._id: Optional[str] = None
+        self._skip_lf = False
+
+    def feed(self, chunk: bytes) -> List[SSEEvent]:
+        if self._skip_lf:
+            # The previous chunk ended in '\r'; a leading '\n' completes that '\r\n'.
+            self._skip_lf = False
+            if chunk[:1] == b'\n':
+                chunk = chunk[1:]
+        buffer = self._buffer + chunk if self._buffer else chunk
+        if not buffer:
+            return []
+
+        # splitlines() treats '\n', '\r' and '\r\n' as line endings in a single C pass.
+        lines = buffer.splitlines()
+        last = buffer[-1]
+        if last == 10:  # '\n'
+            self._buffer = b''
+        elif last == 13:  # '\r'
+            self._buffer = b''
+            self._skip_lf = True
+        else:
+            self._buffer = lines.pop()
+
+        events: List[SSEEvent] = []
+        if len(lines) > 1 and not self._data and self._event == 'message' and not any(lines[1::2]):
+            # Servers normally send each event as one `data: ` line and a blank line. Those
+            # lines are decoded at once, and splitting the text finds every `data: ` prefix.
+            data_lines = lines[::2]
+            tail = data_lines.pop() if len(lines) % 2 else None
+            if data_lines[0][:6] == b'data: ':
+                values = b'\n'.join(data_lines).decode('utf-8', 'replace')[6:].split('\ndata: ')
+                if len(values) == len(data_lines):
+                    event_id = self._id
+                    events = [SSEEvent('message', value, event_id) for value in values]
+                    if tail is not None:
+                        self._line(tail, events)
+                    return events
+
+        for line in lines:
+            self._line(line, events)
+        return events
+
+    def _line(self, line: bytes, events: List[SSEEvent]) -> None:
+        data = self._data
+        if not line:
+            if data:
+                value = data[0] if len(data) == 1 else b'\n'.join(data)
+                events.append(SSEEvent(self._event, value.decode('utf-8', 'replace'), self._id))
+                self._data = []
+            self._event = 'message'
+        elif line.startswith(b'data:'):
+            data.append(line[6:] if line[5:6] == b' ' else line[5:])
+        elif line[0] != 58:  # ':' starts a comment
+            field, sep, value = line.partition(b':')
+            if sep and value[:1] == b' ':
+                value = value[1:]
+            if field == b'data':
+                data.append(value)
+            elif field == b'event':
+                self._event = value.decode('utf-8', 'replace') or 'message'
+            elif field == b'id':
+                self._id = value.decode('utf-8', 'replace')
+
+    def close(self) -> List[SSEEvent]:
+        """Flush a final event that was not followed by a blank line."""
+        return self.feed(b'\n\n') if (self._buffer or self._data) else []
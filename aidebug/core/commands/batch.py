@@ -0,0 +1,175 @@
+"""Non-interactive batch mode: run a file of debug/feature/readme jobs on a worker pool.
+
+Usage:
+    aidebug batch jobs.jsonl --files 'src/**/*.py' [--concurrency 4] [--output-dir batch_output]
+
+Each line of the jobs file is a JSON object:
+    {"id": "login-crash", "type": "debug", "error": "Traceback ..."}
+    {"id": "dark-mode", "type": "feature", "description": "Add a dark mode toggle"}
+    {"id": "docs", "type": "readme", "request": "Focus on installation"}
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from ..utils.context_packer import estimate_tokens
+from ..utils.file_walker import select_files
+
+JOB_FIELDS = {"debug": "error", "feature": "description", "readme": "request"}
+
+
+class JobResult:
+    __slots__ = ('job_id', 'job_type', 'status', 'output_path', 'latency', 'first_token', 'prompt_tokens', 'completion_tokens', 'error')
+
+    def __init__(self, job_id: str, job_type: str, output_path: str) -> None:
+        self.job_id = job_id
+        self.job_type = job_type
+        self.output_path = output_path
+        self.status = 'failed'
+        self.latency = 0.0
+        self.first_token = None
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.error = ''
+
+    def as_dict(self) -> Dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+def output_name(job_id) -> str:
+    """The job's result file name: its id with anything unsafe in a file name replaced."""
+    return "".join(char if char.isalnum() or char in "-_." else "_" for char in str(job_id)) + ".md"
+
+
+def load_jobs(path: str) -> List[Dict]:
+    """Read the jobs file, rejecting jobs whose result files would overwrite each other."""
+    jobs = []
+    # Lower-cased, as result files of ids differing only in case collide on macOS and Windows
+    names = {}
+    with open(path, 'r') as f:
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            job = json.loads(line)
+            if job.get("type") not in JOB_FIELDS:
+                raise ValueError(f"{path}:{number}: job type must be one of {', '.join(JOB_FIELDS)}")
+            job.setdefault("id", f"job-{number}")
+            name = output_name(job["id"]).lower()
+            if name in names:
+                raise ValueError(f"{path}:{number}: job id {job['id']!r} clashes with the job on line {names[name]}; ids must be unique")
+            names[name] = number
+            jobs.append(job)
+    return jobs
+
+
+def run_job(shell, job: Dict, output_dir: str) -> JobResult:
+    """Build one job's prompt, stream the answer into its output file and time it."""
+    job_type = job["type"]
+    result = JobResult(str(job["id"]), job_type, os.path.join(output_dir, output_name(job["id"])))
+    notes = []
+    start = time.perf_counter()
+    try:
+        build = getattr(shell, f"{job_type}_messages")
+        messages = build(job.get(JOB_FIELDS[job_type], ""), report=notes.append)
+        result.prompt_tokens = sum(estimate_tokens(message["content"]) for message in messages)
+
+        chunks = []
+        with open(result.output_path, 'w', encoding='utf-8') as output:
+            for note in notes:
+                output.write(f"<!-- {note} -->\n")
+            for chunk in shell.completion_chunks(messages):
+                if result.first_token is None:
+                    result.first_token = time.perf_counter() - start
+                chunks.append(chunk)
+                output.write(chunk)
+                output.flush()
+        result.completion_tokens = estimate_tokens("".join(chunks))
+        result.status = 'ok'
+    except Exception as error:
+        result.error = f"{type(error).__name__}: {error}"
+    result.latency = time.perf_counter() - start
+    return result
+
+
+def print_summary(results: List[JobResult], wall: float) -> None:
+    print(f"\n{'job':<24} {'type':<8} {'status':<7} {'latency':>9} {'ttft':>8} {'prompt':>8} {'output':>8}")
+    for result in results:
+        first_token = f"{result.first_token:.2f}s" if result.first_token is not None else "-"
+        print(f"{result.job_id[:24]:<24} {result.job_type:<8} {result.status:<7} {result.latency:>8.2f}s {first_token:>8} "
+              f"{result.prompt_tokens:>8} {result.completion_tokens:>8}")
+        if result.error:
+            print(f"  {result.error}")
+    succeeded = sum(result.status == 'ok' for result in results)
+    print(f"\n{succeeded}/{len(results)} jobs succeeded in {wall:.2f}s "
+          f"({len(results) / wall if wall else 0:.2f} jobs/s, "
+          f"{sum(r.completion_tokens for r in results) / wall if wall else 0:.0f} output tokens/s)")
+
+
+def run_batch(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog="aidebug batch", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("jobs", help="JSONL file of jobs")
+    parser.add_argument("--files", nargs="+", default=[], help="files, directories or globs to send as context")
+    parser.add_argument("--concurrency", type=int, default=4, help="jobs to run at once")
+    parser.add_argument("--output-dir", default="batch_output", help="where per-job results and summary.json are written")
+    parser.add_argument("--client", default=None, help="client type (default: openai)")
+    parser.add_argument("--model", default=None, help="model name (default: the shell's default)")
+    parser.add_argument("--temperature", type=float, default=None)
+    parser.add_argument("--language", default="", help="project language for the prompt header")
+    parser.add_argument("--project-type", default="", help="project type for the prompt header")
+    parser.add_argument("--framework", default="", help="project framework for the prompt header")
+    parser.add_argument("--no-cache", action="store_true", help="always send requests to the model")
+    args = parser.parse_args(argv)
+
+    # Imported here so the shell module is only loaded once batch mode is chosen.
+    from ...aidebug import CodeDebuggerShell
+
+    shell = CodeDebuggerShell()
+    if args.client:
+        shell.client_type = args.client
+        shell.configure_client()
+    if args.model:
+        shell.openai_model = args.model
+    if args.temperature is not None:
+        shell.openai_model_temperature = args.temperature
+    shell.project_language = args.language
+    shell.project_type = args.project_type
+    shell.project_framework = args.framework
+    shell.use_cache = not args.no_cache
+
+    try:
+        jobs = load_jobs(args.jobs)
+    except OSError as error:
+        parser.error(f"cannot read {args.jobs}: {error.strerror or error}")
+    except ValueError as error:
+        parser.error(str(error))
+    shell.files = list(select_files(args.files))
+    shell.refresh_codebase()
+    os.makedirs(args.output_dir, exist_ok=True)
+    print(f"Running {len(jobs)} jobs over {len(shell.files)} files with concurrency {args.concurrency}...")
+
+    lock = threading.Lock()
+
+    def run(job: Dict) -> JobResult:
+        result = run_job(shell, job, args.output_dir)
+        with lock:
+            print(f"  {result.status:<6} {result.job_id} ({result.latency:.2f}s)")
+        return result
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as executor:
+        results = list(executor.map(run, jobs))
+    wall = time.perf_counter() - start
+
+    print_summary(results, wall)
+    with open(os.path.join(args.output_dir, "summary.json"), 'w') as f:
+        json.dump({"wall_seconds": wall, "concurrency": args.concurrency, "jobs": [r.as_dict() for r in results]}, f, indent=2)
+    return 0 if all(result.status == 'ok' for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(run_batch(sys.argv[1:]))
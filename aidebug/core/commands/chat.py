@@ -0,0 +1,89 @@
+import os
+from typing import Callable, Dict, Iterable, List
+
+from ..utils.context_packer import estimate_tokens
+
+CHAT_HISTORY_TOKENS = int(os.getenv("CHAT_HISTORY_TOKENS", "4000"))
+KEEP_RECENT_TURNS = 2
+FALLBACK_SUMMARY_CHARS = 500
+
+SUMMARY_PROMPT = (
+    "Summarise the conversation below for your own later reference. Keep every file name, "
+    "function name, error message, decision and open question. Be concise."
+)
+
+Message = Dict[str, str]
+
+
+class ChatSession:
+    """A multi-turn conversation about the selected project.
+
+    The packed file context goes out with the first question only; later
+    requests carry a short digest of which files were shared instead. Older
+    turns are folded into a running summary once the history grows past
+    `history_budget` tokens, so every follow-up costs the new turn plus a
+    bounded history rather than the whole codebase again.
+    """
+
+    def __init__(
+        self,
+        header: List[Message],
+        file_context: List[Message],
+        complete: Callable[[List[Message]], Iterable[str]],
+        history_budget: int = CHAT_HISTORY_TOKENS
+    ) -> None:
+        self.header = header
+        self.file_context = file_context
+        self.complete = complete
+        self.history_budget = history_budget
+        self.summary = ""
+        self.turns: List[Message] = []
+        self.context_sent = False
+
+    def shared_files(self) -> List[str]:
+        return [message["content"].split(" Content:", 1)[0].replace("File: ", "", 1) for message in self.file_context]
+
+    def prepare(self, question: str) -> List[Message]:
+        """Return the messages to send for `question`."""
+        messages = list(self.header)
+        if not self.context_sent:
+            messages.extend(self.file_context)
+        elif self.file_context:
+            files = ", ".join(self.shared_files())
+            messages.append({"role": "user", "content": f"The project files shared earlier in this conversation were: {files}."})
+        if self.summary:
+            messages.append({"role": "user", "content": f"Summary of the conversation so far: {self.summary}"})
+        messages.extend(self.turns)
+        messages.append({"role": "user", "content": question})
+        return messages
+
+    def record(self, question: str, answer: str) -> None:
+        """Add a finished turn and compact the history if it outgrew its budget."""
+        self.context_sent = True
+        self.turns.append({"role": "user", "content": question})
+        self.turns.append({"role": "assistant", "content": answer})
+        if self.history_tokens() > self.history_budget:
+            self.compact()
+
+    def history_tokens(self) -> int:
+        return estimate_tokens(self.summary) + sum(estimate_tokens(turn["content"]) for turn in self.turns)
+
+    def compact(self) -> None:
+        """Fold all but the most recent turns into the running summary."""
+        keep = KEEP_RECENT_TURNS * 2
+        old, self.turns = self.turns[:-keep], self.turns[-keep:]
+        if not old:
+            return
+
+        transcript = "\n\n".join(f"{turn['role']}: {turn['content']}" for turn in old)
+        if self.summary:
+            transcript = f"Earlier summary: {self.summary}\n\n{transcript}"
+        try:
+            self.summary = "".join(self.complete([
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": transcript},
+            ])).strip()
+        except Exception:
+            # Summarising is best effort: fall back to clipping each old turn.
+            clipped = " ".join(f"{turn['role']}: {turn['content'][:FALLBACK_SUMMARY_CHARS]}" for turn in old)
+            self.summary = f"{self.summary} {clipped}".strip()[-self.history_budget * 2:]
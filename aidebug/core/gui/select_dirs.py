@@ -4,6 +4,8 @@ from typing import List
 from PyQt5.QtWidgets import QApplication, QWidget, QTreeView, QVBoxLayout, QPushButton, QFileSystemModel
 from PyQt5.QtCore import Qt, QEvent
 
+from ..utils.file_walker import filter_selection
+
 class DirectoryBrowser(QWidget):
     def __init__(self, title: str) -> None:
         super().__init__()
@@ -60,14 +62,8 @@ class DirectoryBrowser(QWidget):
                     self.get_selected_items()
 
     def recursive_selection(self, paths: set) -> List[str]:
-        selected_items = []
-        for path in paths:
-            if os.path.isdir(path):
-                for root, dirs, files in os.walk(path):
-                    selected_items.extend([os.path.join(root, f) for f in files + dirs])
-            else:
-                selected_items.append(path)
-        return selected_items
+        # Same ignore rules as headless selection: files only, ignored directories pruned.
+        return filter_selection(sorted(paths))
 
 def main(tab_name: str) -> List[str]:
     app = QApplication(sys.argv)
@@ -0,0 +1,184 @@
+import re
+import math
+from typing import Any, Callable, Dict, List, Mapping, Optional, Set
+
+# Prompt token budgets per model. These sit well below each model's context
+# window to leave room for the answer and keep time to first token low.
+DEFAULT_CONTEXT_BUDGETS = {
+    'gpt-4o': 64000,
+    'gpt-4o-mini': 64000,
+    'gpt-4-turbo': 64000,
+    'gpt-4': 6000,
+    'gpt-3.5-turbo': 12000,
+    'gemini-1.5-pro': 128000,
+    'gemini-1.5-flash': 128000,
+}
+FALLBACK_CONTEXT_BUDGET = 8000
+
+# Smallest slice of a file worth sending once it no longer fits whole.
+MIN_PARTIAL_TOKENS = 200
+WINDOW_LINES = 15
+
+_TOKEN_RE = re.compile(r"\w{1,6}|[^\w\s]")
+_TERM_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]{2,}")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local estimate of the number of BPE tokens in `text`."""
+    return len(_TOKEN_RE.findall(text))
+
+
+def context_budget(model: str, overrides: Optional[Dict[str, int]] = None) -> int:
+    if overrides and model in overrides:
+        return overrides[model]
+    return DEFAULT_CONTEXT_BUDGETS.get(model, FALLBACK_CONTEXT_BUDGET)
+
+
+def query_terms(query: str) -> Set[str]:
+    return {term.lower() for term in _TERM_RE.findall(query or "")}
+
+
+class PackedFile:
+    __slots__ = ('path', 'content', 'mode', 'tokens')
+
+    def __init__(self, path: str, content: str, mode: str, tokens: int) -> None:
+        self.path = path
+        self.content = content
+        self.mode = mode
+        self.tokens = tokens
+
+    def message(self) -> Dict[str, str]:
+        label = f"File: {self.path}" if self.mode == 'whole' else f"File: {self.path} ({self.mode})"
+        return {"role": "user", "content": f"{label} Content: {self.content}"}
+
+
+class PackResult:
+    def __init__(self, budget: int) -> None:
+        self.budget = budget
+        self.used = 0
+        self.included: List[PackedFile] = []
+        self.dropped: List[str] = []
+
+    def messages(self) -> List[Dict[str, str]]:
+        return [packed.message() for packed in self.included]
+
+    def report(self) -> str:
+        counts = {}
+        for packed in self.included:
+            counts[packed.mode] = counts.get(packed.mode, 0) + 1
+        parts = [f"{count} {mode}" for mode, count in counts.items()] or ["no files"]
+        summary = f"Context: {', '.join(parts)}, {len(self.dropped)} dropped (~{self.used}/{self.budget} tokens)."
+        if self.dropped:
+            summary += "\n  dropped: " + ", ".join(self.dropped)
+        return summary
+
+
+def relevance(path: str, content: str, terms: Set[str], query: str) -> float:
+    """Score a file against the request: explicit path mentions first, then shared identifiers."""
+    score = 0.0
+    base_name = path.replace('\\', '/').rsplit('/', 1)[-1]
+    if query and (path in query or base_name in query):
+        score += 1000.0
+    if terms:
+        file_terms = query_terms(content)
+        score += 10.0 * len(terms & file_terms)
+    # Prefer smaller files when relevance is otherwise equal: they cost less to include.
+    return score - math.log1p(len(content)) / 10.0
+
+
+def line_windows(content: str, terms: Set[str], max_tokens: int, window: int = WINDOW_LINES,
+                 line_map: Optional[List[int]] = None) -> Optional[str]:
+    """Return the regions of `content` around lines that mention `terms`, within `max_tokens`.
+
+    `line_map` gives the original line number of each line of a minified `content`.
+    """
+    lines = content.splitlines()
+    hits = [index for index, line in enumerate(lines) if terms & query_terms(line)]
+    if not hits:
+        return None
+
+    ranges = []
+    for index in hits:
+        start, end = max(0, index - window), min(len(lines), index + window + 1)
+        if ranges and start <= ranges[-1][1]:
+            ranges[-1][1] = max(ranges[-1][1], end)
+        else:
+            ranges.append([start, end])
+
+    chunks = []
+    used = 0
+    for start, end in ranges:
+        first, last = (line_map[start], line_map[end - 1]) if line_map else (start + 1, end)
+        chunk = f"Lines {first}-{last}:\n" + "\n".join(lines[start:end])
+        tokens = estimate_tokens(chunk)
+        if used + tokens > max_tokens:
+            break
+        chunks.append(chunk)
+        used += tokens
+    return "\n...\n".join(chunks) if chunks else None
+
+
+def truncate(content: str, max_tokens: int) -> str:
+    """Keep whole leading lines of `content` up to `max_tokens`."""
+    kept = []
+    used = 0
+    for line in content.splitlines():
+        tokens = estimate_tokens(line) + 1
+        if used + tokens > max_tokens:
+            if not kept:
+                # A single overlong line: keep roughly as many characters as the budget allows.
+                kept.append(line[:max_tokens * 3])
+            break
+        kept.append(line)
+        used += tokens
+    return "\n".join(kept) + "\n... (truncated)"
+
+
+def pack_context(files: Mapping[str, str], query: str, budget: int,
+                 minify: Optional[Callable[[str, str], Any]] = None) -> PackResult:
+    """Fit the most relevant files into `budget` tokens.
+
+    Files are taken whole while they fit. Once they no longer do, the regions
+    around lines mentioning the request are sent instead, falling back to the
+    head of the file. Files that cannot get at least MIN_PARTIAL_TOKENS are dropped.
+    `minify(path, content)` returns a minifier.MinifiedFile; it is called only
+    for files as they are packed, and their excerpts keep original line numbers.
+    """
+    result = PackResult(budget)
+    terms = query_terms(query)
+    # Score and size every file in one pass, keeping only numbers, so a lazily
+    # loading `files` is not made to hold the whole selection. Files are read
+    # again below only if they make it into the context.
+    scores = {}
+    for path in files:
+        content = files[path]
+        scores[path] = (relevance(path, content, terms, query), estimate_tokens(content))
+    ranked = sorted(scores, key=lambda path: scores[path][0], reverse=True)
+
+    for path in ranked:
+        remaining = budget - result.used
+        # The original size bounds the minified one. With too little left for an
+        # excerpt, a file that does not fit as it is is dropped without minifying.
+        tokens = scores[path][1]
+        if tokens > remaining and remaining < MIN_PARTIAL_TOKENS:
+            result.dropped.append(path)
+            continue
+        content = files[path]
+        line_map = None
+        if minify is not None:
+            minified = minify(path, content)
+            content, line_map, tokens = minified.content, minified.line_map, minified.tokens
+        if tokens <= remaining:
+            packed = PackedFile(path, content, 'whole', tokens)
+        else:
+            # Leave a little room for the excerpt separators and truncation marker.
+            excerpt = line_windows(content, terms, remaining - 10, line_map=line_map)
+            if excerpt is not None:
+                packed = PackedFile(path, excerpt, 'excerpt', estimate_tokens(excerpt))
+            else:
+                head = truncate(content, remaining - 10)
+                packed = PackedFile(path, head, 'truncated', estimate_tokens(head))
+        result.included.append(packed)
+        result.used += packed.tokens
+
+    return result
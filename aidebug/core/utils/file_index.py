@@ -0,0 +1,46 @@
+import os
+import hashlib
+from typing import Dict, Set, Tuple
+
+AIDEBUG_DIR = os.getenv("AIDEBUG_DIR", ".aidebug")
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha1(content.encode("utf-8", errors="ignore")).hexdigest()
+
+
+class FileIndex:
+    """The mtime, size and content hash of each selected file as of its last refresh.
+
+    FileStore.refresh compares files against their entries to report what
+    changed. Entries that changed since the last `take_dirty` are tracked,
+    so the workspace writes only those rows instead of the whole index.
+    """
+
+    def __init__(self) -> None:
+        self.entries: Dict[str, Dict] = {}
+        self._updated: Set[str] = set()
+        self._removed: Set[str] = set()
+
+    def restore(self, entries: Dict[str, Dict]) -> None:
+        """Load entries that are already persisted, without marking them dirty."""
+        self.entries.update(entries)
+
+    def set(self, path: str, mtime_ns: int, size: int, digest: str) -> None:
+        entry = {"mtime_ns": mtime_ns, "size": size, "hash": digest}
+        if self.entries.get(path) != entry:
+            self.entries[path] = entry
+            self._updated.add(path)
+            self._removed.discard(path)
+
+    def discard(self, path: str) -> None:
+        if self.entries.pop(path, None) is not None:
+            self._updated.discard(path)
+            self._removed.add(path)
+
+    def take_dirty(self) -> Tuple[Dict[str, Dict], Set[str]]:
+        """The entries updated and the paths removed since the last call."""
+        updated = {path: self.entries[path] for path in self._updated}
+        removed = self._removed
+        self._updated, self._removed = set(), set()
+        return updated, removed
@@ -0,0 +1,169 @@
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .file_index import FileIndex, content_hash
+from .files_data import BUDGET_EXHAUSTED, MAX_TOTAL_BYTES, read_file, read_files
+
+STORE_MAX_BYTES = int(os.getenv("STORE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+
+class FileRecord:
+    __slots__ = ('path', 'size', 'mtime_ns', 'hash')
+
+    def __init__(self, path: str, size: int, mtime_ns: int, digest: str) -> None:
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.hash = digest
+
+
+class FileStore(Mapping):
+    """The selected files, as a read-only mapping from path to content.
+
+    Each file is a slotted record of its path, size, mtime and content hash.
+    Contents are loaded when first asked for, through mmap for larger files,
+    and are shared between files with the same hash. Once the loaded contents
+    exceed `max_bytes`, the least recently used are dropped and read from disk
+    again when needed, so memory stays flat however large the selection is.
+    """
+
+    def __init__(self, max_bytes: int = STORE_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self._records: Dict[str, FileRecord] = {}
+        # mtime_ns, size and reason of each selected file that could not be read
+        self._skipped: Dict[str, Tuple[int, int, str]] = {}
+        self._contents: "OrderedDict[str, str]" = OrderedDict()
+        self._resident = 0
+        self._lock = threading.Lock()
+
+    def __getitem__(self, path: str) -> str:
+        record = self._records[path]
+        with self._lock:
+            content = self._contents.get(record.hash)
+            if content is not None:
+                self._contents.move_to_end(record.hash)
+                return content
+
+        try:
+            content = read_file(path) or ""
+        except (OSError, ValueError):
+            content = ""
+        digest = content_hash(content)
+        # Edited since the last refresh: serve it as it is now, the next refresh reports the change
+        record.hash = digest
+        self._keep(digest, content)
+        return content
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._records))
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, path: object) -> bool:
+        return path in self._records
+
+    @property
+    def resident_bytes(self) -> int:
+        return self._resident
+
+    def record(self, path: str) -> Optional[FileRecord]:
+        return self._records.get(path)
+
+    def hashes(self) -> Dict[str, str]:
+        return {path: record.hash for path, record in self._records.items()}
+
+    def _keep(self, digest: str, content: str) -> None:
+        with self._lock:
+            if digest in self._contents:
+                self._contents.move_to_end(digest)
+                return
+            self._contents[digest] = content
+            self._resident += len(content)
+            while self._resident > self.max_bytes and len(self._contents) > 1:
+                _, evicted = self._contents.popitem(last=False)
+                self._resident -= len(evicted)
+
+    def add(self, path: str, size: int, mtime_ns: int, digest: str, content: Optional[str] = None) -> None:
+        """Record a file; without `content` it is read from disk when first needed."""
+        self._records[path] = FileRecord(path, size, mtime_ns, digest)
+        if content is not None:
+            self._keep(digest, content)
+
+    def remove(self, path: str) -> None:
+        # Contents stay cached under their hash until evicted; another file may share them
+        self._records.pop(path, None)
+
+    def refresh(self, paths: List[str], index: FileIndex, changed: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+        """Bring the store in line with `paths` on disk.
+
+        Only files that are new or whose mtime/size changed are read. Pass
+        `changed` when it is already known which files may have changed, e.g.
+        from a file watcher, and only those are checked. The paths that were
+        added, changed, removed or newly skipped (binary or over budget) are
+        returned, and `index` is updated. A stored file that becomes
+        unreadable is reported as removed; skipped files are not read again
+        until they change, unless only the total byte budget kept them out.
+        """
+        changes = {"added": [], "changed": [], "removed": [], "skipped": []}
+        selection = list(dict.fromkeys(paths))
+        checked = set(selection) if changed is None else set(selection) & set(changed)
+        # Files that are not checked are assumed unchanged
+        unchecked = set(selection) - checked
+        stats = {}
+        stale = []
+
+        for path in selection:
+            if path in unchecked:
+                continue
+            try:
+                stats[path] = stat = os.stat(path)
+            except OSError:
+                continue
+            skipped = self._skipped.get(path)
+            if skipped is not None and skipped[:2] == (stat.st_mtime_ns, stat.st_size) and skipped[2] != BUDGET_EXHAUSTED:
+                continue
+            record = self._records.get(path)
+            if record is None or record.mtime_ns != stat.st_mtime_ns or record.size != stat.st_size:
+                stale.append(path)
+
+        cached_bytes = sum(self._records[path].size for path in selection if path in self._records and path not in stale)
+        fresh_contents, skipped = read_files(stale, total_budget=max(0, MAX_TOTAL_BYTES - cached_bytes))
+
+        for path in stale:
+            stat = stats[path]
+            if path in skipped:
+                if path not in self._records and path not in self._skipped:
+                    changes["skipped"].append(path)
+                self._skipped[path] = (stat.st_mtime_ns, stat.st_size, skipped[path])
+                continue
+            self._skipped.pop(path, None)
+
+            content = fresh_contents[path]
+            digest = content_hash(content)
+            entry = index.entries.get(path)
+
+            if path not in self._records and entry is None:
+                changes["added"].append(path)
+            elif entry is None or entry["hash"] != digest:
+                changes["changed"].append(path)
+
+            self.add(path, stat.st_size, stat.st_mtime_ns, digest, content)
+            index.set(path, stat.st_mtime_ns, stat.st_size, digest)
+
+        present = (set(stats) - set(self._skipped)) | unchecked
+        for path in list(self._records):
+            if path not in present:
+                self.remove(path)
+                changes["removed"].append(path)
+        for path in list(index.entries):
+            if path not in present:
+                index.discard(path)
+        for path in list(self._skipped):
+            if path not in stats and path not in unchecked:
+                del self._skipped[path]
+
+        return changes
@@ -0,0 +1,231 @@
+import os
+import re
+from typing import Iterator, List, Optional, Tuple
+
+IGNORE_FILES = ('.gitignore', '.aidebugignore')
+
+# Pruned even without an ignore file: version control, dependency and cache directories.
+DEFAULT_IGNORES = [
+    '.git/', '.hg/', '.svn/', 'node_modules/', '__pycache__/', '.venv/', 'venv/',
+    '.tox/', '.nox/', '.mypy_cache/', '.pytest_cache/', '.ruff_cache/', '.aidebug/',
+    '*.egg-info/', '*.pyc', '*.pyo',
+]
+
+_GLOB_CHARS = re.compile(r'[*?\[]')
+
+
+def glob_to_regex(pattern: str) -> str:
+    """Translate a gitignore-style glob, including '**', into a regular expression."""
+    regex = ''
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if pattern.startswith('**/', index):
+            regex += '(?:.*/)?'
+            index += 3
+            continue
+        if pattern.startswith('**', index):
+            regex += '.*'
+            index += 2
+            continue
+        if char == '*':
+            regex += '[^/]*'
+        elif char == '?':
+            regex += '[^/]'
+        elif char == '[':
+            end = pattern.find(']', index + 1)
+            if end == -1:
+                regex += re.escape(char)
+            else:
+                body = pattern[index + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                regex += f'[{body}]'
+                index = end
+        else:
+            regex += re.escape(char)
+        index += 1
+    return regex
+
+
+class IgnoreRule:
+    __slots__ = ('regex', 'negated', 'dir_only')
+
+    def __init__(self, line: str) -> None:
+        self.negated = line.startswith('!')
+        if self.negated:
+            line = line[1:]
+        self.dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        # Patterns without an inner slash match at any depth; others are anchored to their ignore file.
+        anchored = '/' in line
+        body = glob_to_regex(line.lstrip('/'))
+        self.regex = re.compile(('' if anchored else '(?:.*/)?') + body + '$')
+
+    def matches(self, relative_path: str, is_dir: bool) -> bool:
+        return (is_dir or not self.dir_only) and self.regex.match(relative_path) is not None
+
+
+class IgnoreRules:
+    """The rules from one ignore file, applied to paths below the directory that holds it.
+
+    `base` must be spelled the same way as the paths being matched (both
+    relative to the working directory, or both absolute); '' means the
+    working directory itself.
+    """
+
+    def __init__(self, base: str, lines: List[str]) -> None:
+        self.base = base
+        self.prefix_length = len(base) + 1 if base else 0
+        self.rules = []
+        for line in lines:
+            line = line.rstrip()
+            if line and not line.startswith('#'):
+                self.rules.append(IgnoreRule(line))
+
+    @classmethod
+    def from_directory(cls, directory: str) -> Optional["IgnoreRules"]:
+        lines = []
+        for name in IGNORE_FILES:
+            try:
+                with open(os.path.join(directory or '.', name), 'r', errors='ignore') as f:
+                    lines.extend(f.read().splitlines())
+            except OSError:
+                continue
+        return cls(directory, lines) if lines else None
+
+    def match(self, path: str, is_dir: bool) -> Optional[bool]:
+        """Return True/False if a rule decides `path`, or None if none applies. The last match wins."""
+        relative = path[self.prefix_length:]
+        if os.sep != '/':
+            relative = relative.replace(os.sep, '/')
+        decision = None
+        for rule in self.rules:
+            if rule.matches(relative, is_dir):
+                decision = not rule.negated
+        return decision
+
+
+DEFAULT_RULES = IgnoreRules('', DEFAULT_IGNORES)
+
+
+def is_ignored(path: str, name: str, is_dir: bool, rule_sets: Tuple[IgnoreRules, ...]) -> bool:
+    # Default rules only ever look at the entry's own name.
+    ignored = bool(DEFAULT_RULES.match(name, is_dir))
+    for rules in rule_sets:
+        decision = rules.match(path, is_dir)
+        if decision is not None:
+            ignored = decision
+    if not ignored and is_dir and os.path.isfile(os.path.join(path, 'pyvenv.cfg')):
+        # A virtualenv under any name.
+        ignored = True
+    return ignored
+
+
+def _normalize(path: str) -> str:
+    path = os.path.normpath(path)
+    return '' if path == '.' else path
+
+
+def ancestor_rules(directory: str) -> Tuple[IgnoreRules, ...]:
+    """Load the ignore files that sit between the working directory and `directory`, exclusive."""
+    directory = _normalize(directory)
+    if os.path.isabs(directory):
+        root = os.getcwd()
+        if os.path.commonpath([root, directory]) != root:
+            return ()
+        parts = os.path.relpath(directory, root).split(os.sep)
+        current = root
+    else:
+        if directory.startswith('..'):
+            return ()
+        parts = directory.split(os.sep) if directory else []
+        current = ''
+
+    rule_sets = []
+    for part in [None] + parts[:-1]:
+        if part is not None:
+            current = os.path.join(current, part) if current else part
+        rules = IgnoreRules.from_directory(current)
+        if rules is not None:
+            rule_sets.append(rules)
+    return tuple(rule_sets) if parts else ()
+
+
+def walk_files(directory: str, rule_sets: Optional[Tuple[IgnoreRules, ...]] = None) -> Iterator[str]:
+    """Yield the files below `directory` as they are found.
+
+    Ignored directories are pruned without being descended into. `.gitignore`
+    and `.aidebugignore` files are honoured at every level, including those
+    between the working directory and `directory`.
+    """
+    directory = _normalize(directory)
+    if rule_sets is None:
+        rule_sets = ancestor_rules(directory)
+    stack = [(directory, rule_sets)]
+    while stack:
+        current, inherited = stack.pop()
+        own = IgnoreRules.from_directory(current)
+        active = inherited + (own,) if own is not None else inherited
+        try:
+            with os.scandir(current or '.') as iterator:
+                entries = sorted(iterator, key=lambda entry: entry.name)
+        except OSError:
+            continue
+        subdirectories = []
+        for entry in entries:
+            path = os.path.join(current, entry.name) if current else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if is_ignored(path, entry.name, is_dir, active):
+                continue
+            if is_dir:
+                subdirectories.append((path, active))
+            elif entry.is_file():
+                yield path
+        stack.extend(reversed(subdirectories))
+
+
+def glob_root(pattern: str) -> str:
+    """The longest leading directory of `pattern` that contains no glob characters."""
+    parts = pattern.replace(os.sep, '/').split('/')
+    static = []
+    for part in parts[:-1]:
+        if _GLOB_CHARS.search(part):
+            break
+        static.append(part)
+    # Joined by hand: os.path.join would drop the empty part that keeps an absolute root
+    root = '/'.join(static)
+    if not root and pattern.startswith('/'):
+        root = '/'
+    return root.replace('/', os.sep)
+
+
+def select_files(patterns: List[str]) -> Iterator[str]:
+    """Stream the non-ignored files matching `patterns`, without duplicates.
+
+    A pattern may be a file, a directory (selected recursively) or a glob
+    such as 'src/**/*.py'. Only the fixed directory prefix of a glob is walked.
+    """
+    seen = set()
+    for pattern in patterns:
+        if os.path.isfile(pattern):
+            candidates = iter([_normalize(pattern)])
+        elif os.path.isdir(pattern):
+            candidates = walk_files(pattern)
+        else:
+            normalized = _normalize(pattern).replace(os.sep, '/')
+            regex = re.compile(glob_to_regex(normalized) + '$')
+            candidates = (path for path in walk_files(glob_root(normalized))
+                          if regex.match(path.replace(os.sep, '/')))
+        for path in candidates:
+            if path not in seen:
+                seen.add(path)
+                yield path
+
+
+def filter_selection(paths: List[str]) -> List[str]:
+    """Expand and filter picks made elsewhere (such as the Qt browser) through the same ignore rules."""
+    return list(select_files(paths))
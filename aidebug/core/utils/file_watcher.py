@@ -0,0 +1,187 @@
+import os
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+WATCH_DEBOUNCE = float(os.getenv("WATCH_DEBOUNCE", "0.3"))
+WATCH_POLL_INTERVAL = float(os.getenv("WATCH_POLL_INTERVAL", "1.0"))
+WATCH_FORCE_POLLING = os.getenv("WATCH_FORCE_POLLING", "false").lower() == "true"
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+_EVENT = struct.Struct("iIII")
+
+
+class InotifyBackend:
+    """Block on inotify watches of the directories holding the watched files.
+
+    Directories rather than files are watched, so editors that save by
+    writing a new file and renaming it over the old one are still seen.
+    Raises OSError if inotify is unavailable or out of watches.
+    """
+
+    def __init__(self, paths: Iterable[str]) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self._libc = libc
+        self.paths = {os.path.abspath(path): path for path in paths}
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._wake_read, self._wake_write = os.pipe()
+        self._directories: Dict[int, str] = {}
+        try:
+            for directory in {os.path.dirname(path) for path in self.paths}:
+                wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+                if wd < 0:
+                    raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+                self._directories[wd] = directory
+        except OSError:
+            self.close()
+            raise
+
+    def wait(self, timeout: Optional[float]) -> Optional[Set[str]]:
+        """The watched paths changed within `timeout` seconds, or None once woken by `wake`."""
+        readable, _, _ = select.select([self.fd, self._wake_read], [], [], timeout)
+        if self._wake_read in readable:
+            return None
+        changed = set()
+        if self.fd not in readable:
+            return changed
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                return set(self.paths.values())
+            directory = self._directories.get(wd)
+            if directory is not None and name:
+                path = self.paths.get(os.path.join(directory, os.fsdecode(name)))
+                if path is not None:
+                    changed.add(path)
+        return changed
+
+    def wake(self) -> None:
+        os.write(self._wake_write, b"x")
+
+    def close(self) -> None:
+        for fd in (self.fd, self._wake_read, self._wake_write):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+class PollingBackend:
+    """Compare the watched files' mtime and size every `interval` seconds."""
+
+    def __init__(self, paths: Iterable[str], interval: float = WATCH_POLL_INTERVAL) -> None:
+        self.paths = list(paths)
+        self.interval = interval
+        self._woken = threading.Event()
+        self._seen = {path: self._signature(path) for path in self.paths}
+
+    @staticmethod
+    def _signature(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def wait(self, timeout: Optional[float]) -> Optional[Set[str]]:
+        if self._woken.wait(self.interval if timeout is None else min(timeout, self.interval)):
+            return None
+        changed = set()
+        for path in self.paths:
+            signature = self._signature(path)
+            if signature != self._seen[path]:
+                self._seen[path] = signature
+                changed.add(path)
+        return changed
+
+    def wake(self) -> None:
+        self._woken.set()
+
+    def close(self) -> None:
+        pass
+
+
+class FileWatcher:
+    """Call `on_change` from a background thread with each burst of changes to `paths`.
+
+    Changes are collected until none arrive for `debounce` seconds, so a save
+    that touches several files produces one call. inotify is used where
+    available, otherwise the files are polled. `stopped` is set by `stop`, so
+    a callback can abandon long work.
+    """
+
+    def __init__(self, paths: Iterable[str], on_change: Callable[[Set[str]], None], debounce: float = WATCH_DEBOUNCE) -> None:
+        self.paths = list(paths)
+        self.on_change = on_change
+        self.debounce = debounce
+        self.backend = None
+        if not WATCH_FORCE_POLLING:
+            try:
+                self.backend = InotifyBackend(self.paths)
+            except OSError:
+                self.backend = None
+        if self.backend is None:
+            self.backend = PollingBackend(self.paths)
+        self.stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if isinstance(self.backend, InotifyBackend) else "polling"
+
+    def start(self) -> "FileWatcher":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.backend.wake()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join()
+        self.backend.close()
+
+    def _run(self) -> None:
+        while not self.stopped.is_set():
+            changed = self.backend.wait(None)
+            if changed is None:
+                return
+            if not changed:
+                continue
+            # Events for other files in the watched directories do not end the quiet period
+            quiet_until = time.monotonic() + self.debounce
+            while True:
+                remaining = quiet_until - time.monotonic()
+                if remaining <= 0:
+                    break
+                more = self.backend.wait(remaining)
+                if more is None:
+                    return
+                if more:
+                    changed |= more
+                    quiet_until = time.monotonic() + self.debounce
+            self.on_change(changed)
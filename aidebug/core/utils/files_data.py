@@ -1,12 +1,112 @@
 import os
-from typing import Dict, List
+import mmap
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+MAX_FILE_BYTES = int(os.getenv("MAX_FILE_BYTES", str(512 * 1024)))
+MAX_TOTAL_BYTES = int(os.getenv("MAX_TOTAL_BYTES", str(8 * 1024 * 1024)))
+MMAP_THRESHOLD = int(os.getenv("MMAP_THRESHOLD", str(64 * 1024)))
+SCRAPE_WORKERS = int(os.getenv("SCRAPE_WORKERS", str(min(32, (os.cpu_count() or 1) + 4))))
+SNIFF_BYTES = 8192
+BUDGET_EXHAUSTED = 'total size budget exhausted'
+
+BINARY_EXTENSIONS = {
+    '.pyc', '.pyo', '.so', '.o', '.a', '.dll', '.dylib', '.exe', '.class', '.jar',
+    '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.webp', '.pdf',
+    '.zip', '.gz', '.bz2', '.xz', '.tar', '.7z', '.whl', '.woff', '.woff2', '.ttf',
+}
+
+# Control characters that do not normally appear in text files.
+_TEXT_CHARS = bytes({7, 8, 9, 10, 12, 13, 27} | set(range(0x20, 0x100)) - {0x7f})
+
+
+def is_binary(sample: bytes) -> bool:
+    """Guess whether a file is binary from its first few KB."""
+    if not sample:
+        return False
+    if b'\0' in sample:
+        return True
+    non_text = sample.translate(None, _TEXT_CHARS)
+    return len(non_text) / len(sample) > 0.3
+
+
+def _decode(path: str, size: int) -> Optional[str]:
+    with open(path, 'rb') as f:
+        if size >= MMAP_THRESHOLD:
+            # Decode straight from the page cache instead of copying the file into a bytes object first.
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if is_binary(mapped[:SNIFF_BYTES]):
+                    return None
+                return str(mapped, 'utf-8', 'ignore').strip()
+        data = f.read()
+    if is_binary(data[:SNIFF_BYTES]):
+        return None
+    return data.decode('utf-8', 'ignore').strip()
+
+
+def read_file(path: str) -> Optional[str]:
+    """Return the stripped text of a file, or None if it is binary or over MAX_FILE_BYTES."""
+    if os.path.splitext(path)[1].lower() in BINARY_EXTENSIONS:
+        return None
+    size = os.path.getsize(path)
+    if size > MAX_FILE_BYTES:
+        return None
+    return _decode(path, size)
+
+
+def scrapeable_files(files: List[str]) -> List[str]:
+    return [file for file in files if os.path.splitext(file)[1].lower() not in BINARY_EXTENSIONS and os.path.isfile(file)]
+
+
+def read_files(files: List[str], total_budget: int = MAX_TOTAL_BYTES) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Read text files concurrently, enforcing the per-file and total byte budgets.
+
+    Returns the contents of every file that was read and, for every file that
+    was not, the reason it was skipped. Files are admitted to the total budget
+    in the order given, so the result does not depend on thread scheduling.
+    """
+    skipped = {}
+    planned = []
+    remaining = total_budget
+    for path in files:
+        if os.path.splitext(path)[1].lower() in BINARY_EXTENSIONS:
+            skipped[path] = 'binary'
+            continue
+        try:
+            size = os.path.getsize(path)
+        except OSError as error:
+            skipped[path] = error.strerror or 'unreadable'
+            continue
+        if size > MAX_FILE_BYTES:
+            skipped[path] = f'larger than {MAX_FILE_BYTES} bytes'
+        elif size > remaining:
+            skipped[path] = BUDGET_EXHAUSTED
+        else:
+            remaining -= size
+            planned.append((path, size))
+
+    def load(item):
+        path, size = item
+        try:
+            return path, _decode(path, size)
+        except (OSError, ValueError):
+            return path, None
+
+    contents = {}
+    if len(planned) > 1 and SCRAPE_WORKERS > 1:
+        with ThreadPoolExecutor(max_workers=SCRAPE_WORKERS) as executor:
+            results = list(executor.map(load, planned))
+    else:
+        results = [load(item) for item in planned]
+
+    for path, content in results:
+        if content is None:
+            skipped[path] = 'binary'
+        else:
+            contents[path] = content
+    return contents, skipped
+
 
 def scrape_contents(files: List[str]) -> List[Dict[str, str]]:
-    files_and_content = []
-    for file in files:
-        if not file.endswith('.pyc') and os.path.isfile(file):
-            with open(file, 'r', errors='ignore') as f:
-                contents = f.read().strip()
-            files_and_content.append({file: contents})
-
-    return files_and_content
\ No newline at end of file
+    contents, _ = read_files(scrapeable_files(files))
+    return [{path: content} for path, content in contents.items()]
@@ -0,0 +1,224 @@
+import os
+import re
+import json
+import difflib
+import subprocess
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from .file_index import AIDEBUG_DIR, content_hash
+from .context_packer import estimate_tokens
+
+SNAPSHOT_DIR = os.path.join(AIDEBUG_DIR, "last_run")
+SNAPSHOT_INDEX = "index.json"
+DIFF_CONTEXT_LINES = int(os.getenv("DIFF_CONTEXT_LINES", "5"))
+MAX_STUB_LINES = 30
+# Selected paths passed to one git invocation
+PATHSPEC_BATCH = 500
+
+_OUTLINE_LINE = re.compile(
+    r'^\s*(?:export\s+)?(?:default\s+)?(?:pub(?:\(\w+\))?\s+)?(?:async\s+)?'
+    r'(?:def|class|function|func|fn|struct|enum|trait|impl|interface|type|module)\b'
+)
+
+
+def _git(args: List[str], cwd: Optional[str] = None) -> Optional[str]:
+    try:
+        result = subprocess.run(['git'] + args, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, errors='replace')
+    except OSError:
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+def git_toplevel() -> Optional[str]:
+    """The root of the repository holding the working directory, or None without git or a repository."""
+    output = _git(['rev-parse', '--show-toplevel'])
+    return output.strip() if output else None
+
+
+def split_diff(diff: str, toplevel: str) -> Dict[str, str]:
+    """Split a unified diff into per-file sections keyed by absolute path."""
+    sections: Dict[str, List[str]] = {}
+    current = None
+    # File names are only read from the header before a file's first hunk, so an
+    # added line starting with '++ ' or a removed one starting with '-- ' is content
+    in_header = False
+    for line in diff.splitlines():
+        if line.startswith('diff --git '):
+            current, in_header = None, True
+        elif in_header and line.startswith(('--- ', '+++ ')):
+            name = line[4:].strip()
+            if name != '/dev/null':
+                current = os.path.normpath(os.path.join(toplevel, name[2:] if name[1:2] == '/' else name))
+                sections.setdefault(current, [])
+        else:
+            if line.startswith('@@'):
+                in_header = False
+            # index, mode, rename and similarity lines
+            if not in_header and current is not None:
+                sections[current].append(line)
+    return {path: "\n".join(lines) for path, lines in sections.items() if lines}
+
+
+def _git_paths(args: List[str], paths: List[str], cwd: str) -> Optional[str]:
+    """Run git with `paths` as literal pathspecs, in batches that stay well within the command line limit."""
+    output = []
+    for start in range(0, len(paths), PATHSPEC_BATCH):
+        result = _git(['--literal-pathspecs'] + args + ['--'] + paths[start:start + PATHSPEC_BATCH], cwd=cwd)
+        if result is None:
+            return None
+        output.append(result)
+    return "".join(output)
+
+
+def head_changes(selected: List[str], context_lines: int = DIFF_CONTEXT_LINES) -> Optional[Dict[str, str]]:
+    """Diff hunks of the selected files against HEAD, using the local git binary.
+
+    Only the selected files are diffed. Selected files git does not track yet
+    are returned whole. Returns None when git or a repository is unavailable.
+    """
+    toplevel = git_toplevel()
+    if toplevel is None:
+        return None
+    # Paths outside the repository would make git fail; they have no history to diff anyway
+    inside = {}
+    for path in selected:
+        relative = os.path.relpath(os.path.realpath(path), toplevel)
+        if relative != os.pardir and not relative.startswith(os.pardir + os.sep):
+            inside[path] = relative
+    if not inside:
+        return {}
+    pathspecs = list(dict.fromkeys(inside.values()))
+
+    diff = _git_paths(['diff', '--no-color', '--no-ext-diff', f'-U{context_lines}', 'HEAD'], pathspecs, toplevel)
+    if diff is None:
+        return None
+    sections = split_diff(diff, toplevel)
+
+    untracked = _git_paths(['ls-files', '--others', '--exclude-standard'], pathspecs, toplevel) or ''
+    untracked_paths = {os.path.normpath(os.path.join(toplevel, name)) for name in untracked.splitlines()}
+
+    changes = {}
+    for path in inside:
+        absolute = os.path.normpath(os.path.join(toplevel, inside[path]))
+        if absolute in sections:
+            changes[path] = sections[absolute]
+        elif absolute in untracked_paths:
+            changes[path] = "(new file, not yet committed)"
+    return changes
+
+
+def _write_atomic(path: str, text: str) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _load_snapshot_index(snapshot_dir: str) -> Optional[Dict[str, str]]:
+    try:
+        with open(os.path.join(snapshot_dir, SNAPSHOT_INDEX), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def save_snapshot(contents: Mapping[str, str], hashes: Dict[str, str], snapshot_dir: str = SNAPSHOT_DIR) -> None:
+    """Record the selected files' contents, e.g. after a successful project run.
+
+    Contents are stored once per content hash, so only files whose hash is not
+    in the snapshot yet are read and written, one at a time.
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    stored = {name for name in os.listdir(snapshot_dir) if name != SNAPSHOT_INDEX}
+    index = {}
+    for path, digest in hashes.items():
+        if digest not in stored:
+            content = contents[path]
+            # Hash what is written: the file may have been edited since `hashes` was taken
+            digest = content_hash(content)
+            if digest not in stored:
+                _write_atomic(os.path.join(snapshot_dir, digest), content)
+                stored.add(digest)
+        index[path] = digest
+    _write_atomic(os.path.join(snapshot_dir, SNAPSHOT_INDEX), json.dumps(index))
+
+    for name in stored - set(index.values()):
+        try:
+            os.remove(os.path.join(snapshot_dir, name))
+        except OSError:
+            pass
+
+
+def snapshot_changes(contents: Mapping[str, str], hashes: Dict[str, str], context_lines: int = DIFF_CONTEXT_LINES,
+                     snapshot_dir: str = SNAPSHOT_DIR) -> Optional[Dict[str, str]]:
+    """Diff hunks of the selected files against the last snapshot, or None if there is no snapshot.
+
+    Hashes are compared first; only files that differ are read.
+    """
+    snapshot = _load_snapshot_index(snapshot_dir)
+    if snapshot is None:
+        return None
+
+    changes = {}
+    for path, digest in hashes.items():
+        previous_hash = snapshot.get(path)
+        if previous_hash == digest:
+            continue
+        previous = None
+        if previous_hash is not None:
+            try:
+                with open(os.path.join(snapshot_dir, previous_hash), 'r', encoding='utf-8') as f:
+                    previous = f.read()
+            except OSError:
+                pass
+        if previous is None:
+            changes[path] = "(new file since the last successful run)"
+            continue
+        hunks = difflib.unified_diff(previous.splitlines(), contents[path].splitlines(), lineterm='', n=context_lines)
+        diff = "\n".join(line for line in hunks if not line.startswith(('---', '+++')))
+        if diff:
+            changes[path] = diff
+    return changes
+
+
+def file_stub(content: str) -> str:
+    """A compact outline of a file: its definition lines, or its first line if it has none."""
+    lines = content.splitlines()
+    outline = [line.rstrip() for line in lines if _OUTLINE_LINE.match(line)]
+    if len(outline) > MAX_STUB_LINES:
+        outline = outline[:MAX_STUB_LINES] + [f"... ({len(outline) - MAX_STUB_LINES} more definitions)"]
+    if not outline and lines:
+        outline = [lines[0][:120]]
+    return "\n".join(outline) + f"\n({len(lines)} lines)"
+
+
+def diff_context(changes: Dict[str, str], contents: Dict[str, str], budget: int, base: str) -> Tuple[List[Dict[str, str]], int]:
+    """Messages holding the changed hunks in full, then stubs of unchanged files, within `budget` tokens.
+
+    Newly added files are sent whole. Returns the messages and the number of changed files included.
+    """
+    messages = []
+    used = 0
+    included = 0
+    for path, diff in changes.items():
+        body = contents.get(path, "") if diff.startswith("(new file") else diff
+        tokens = estimate_tokens(body)
+        if used + tokens > budget:
+            continue
+        used += tokens
+        included += 1
+        messages.append({"role": "user", "content": f"File: {path} (changes since {base}) Content:\n{body}"})
+
+    stubs = []
+    for path, content in contents.items():
+        if path in changes or not content.strip():
+            continue
+        stub = f"{path}:\n{file_stub(content)}"
+        tokens = estimate_tokens(stub)
+        if used + tokens > budget:
+            break
+        used += tokens
+        stubs.append(stub)
+    if stubs:
+        messages.append({"role": "user", "content": "Unchanged files (outlines only):\n\n" + "\n\n".join(stubs)})
+    return messages, included
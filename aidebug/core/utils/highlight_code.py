@@ -1,9 +1,106 @@
-from pygments import highlight
-from pygments.lexers import get_lexer_for_filename
-from pygments.formatters import TerminalFormatter
+import os
+import sys
+import shutil
+from collections import OrderedDict
+from typing import IO, Dict, Iterable, Iterator, Optional, Tuple
+
+from colorama import Fore
+
+from .file_index import content_hash
+
+HIGHLIGHT_MAX_BYTES = int(os.getenv("HIGHLIGHT_MAX_BYTES", str(64 * 1024)))
+HIGHLIGHT_CACHE_ENTRIES = int(os.getenv("HIGHLIGHT_CACHE_ENTRIES", "256"))
+
+
+class Highlighter:
+    """Syntax highlighting with one lexer per file extension and an LRU cache of highlighted output.
+
+    Output is keyed by extension and content hash, so showing an unchanged file
+    again costs a dictionary lookup. Files larger than `max_bytes` are cut short.
+    """
+
+    def __init__(self, max_bytes: int = HIGHLIGHT_MAX_BYTES, max_entries: int = HIGHLIGHT_CACHE_ENTRIES) -> None:
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lexers: Dict[str, object] = {}
+        self._formatter = None
+        self._output: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+
+    def lexer(self, path: str):
+        """The lexer for `path`'s extension, plain text if pygments does not know it."""
+        # Imported on first use: pygments is only needed when contents are displayed.
+        from pygments.lexers import get_lexer_for_filename
+        from pygments.lexers.special import TextLexer
+        from pygments.util import ClassNotFound
+
+        extension = os.path.splitext(path)[1].lower() or os.path.basename(path)
+        lexer = self._lexers.get(extension)
+        if lexer is None:
+            try:
+                lexer = get_lexer_for_filename(path, stripall=True)
+            except ClassNotFound:
+                lexer = TextLexer()
+            self._lexers[extension] = lexer
+        return lexer
+
+    def highlight(self, path: str, code: str) -> str:
+        """Return `code` highlighted for the terminal."""
+        from pygments import highlight
+        from pygments.formatters import TerminalFormatter
+
+        key = (os.path.splitext(path)[1].lower(), content_hash(code))
+        cached = self._output.get(key)
+        if cached is not None:
+            self._output.move_to_end(key)
+            return cached
+
+        shown = code
+        if len(code) > self.max_bytes:
+            shown = code[:self.max_bytes].rsplit("\n", 1)[0]
+        if self._formatter is None:
+            self._formatter = TerminalFormatter()
+        output = highlight(shown, self.lexer(path), self._formatter)
+        if shown is not code:
+            output += f"{Fore.YELLOW}... ({len(code) - len(shown)} more characters not shown){Fore.RESET}\n"
+
+        self._output[key] = output
+        if len(self._output) > self.max_entries:
+            self._output.popitem(last=False)
+        return output
+
+    def render(self, files: Iterable[Tuple[str, str]]) -> Iterator[str]:
+        """Yield the lines of each file's heading and highlighted contents, highlighting a file only when reached."""
+        for path, content in files:
+            yield f"{Fore.RED}{path}{Fore.RESET}:"
+            yield ""
+            yield from self.highlight(path, content).splitlines()
+            yield ""
+
+
+def page(lines: Iterable[str], out: Optional[IO[str]] = None, page_lines: Optional[int] = None) -> None:
+    """Print `lines` a screenful at a time, pulling them lazily.
+
+    Waits for Enter between pages and stops on 'q'. When the output is not a
+    terminal every line is printed without pausing.
+    """
+    out = out or sys.stdout
+    interactive = out.isatty() and sys.stdin.isatty()
+    page_lines = page_lines or max(shutil.get_terminal_size().lines - 1, 1)
+
+    shown = 0
+    for line in lines:
+        if interactive and shown == page_lines:
+            out.flush()
+            if input(f"{Fore.CYAN}-- More (Enter for next page, q to quit) --{Fore.RESET}").strip().lower() == "q":
+                return
+            shown = 0
+        out.write(line + "\n")
+        shown += 1
+    out.flush()
+
+
+_default_highlighter = Highlighter()
+
 
 def highlight_code(path: str, code: str) -> None:
-    lexer = get_lexer_for_filename(path, stripall=True)
-    formatter = TerminalFormatter()
-    highlighted_code = highlight(code, lexer, formatter)
-    print(highlighted_code)
\ No newline at end of file
+    print(_default_highlighter.highlight(path, code))
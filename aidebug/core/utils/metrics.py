@@ -0,0 +1,119 @@
+import os
+import json
+import math
+import time
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+
+METRICS_MAX_SAMPLES = int(os.getenv("METRICS_MAX_SAMPLES", "1000"))
+METRICS_PREFIX = "aidebug_"
+QUANTILES = (0.5, 0.95)
+
+
+def percentile(values: List[float], quantile: float) -> float:
+    """Nearest-rank percentile of `values`, which must not be empty."""
+    ordered = sorted(values)
+    rank = max(math.ceil(quantile * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+class Metrics:
+    """Thread-safe store of timing and size samples plus running counters.
+
+    Each series keeps its most recent `max_samples` observations, which is what
+    the percentiles are computed over; counts and sums cover every observation.
+    """
+
+    def __init__(self, max_samples: int = METRICS_MAX_SAMPLES) -> None:
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[Tuple[float, float]]] = {}
+        self._totals: Dict[str, Tuple[int, float]] = {}
+        self._counters: Dict[str, float] = {}
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.max_samples)
+            samples.append((time.time(), value))
+            count, total = self._totals.get(name, (0, 0.0))
+            self._totals[name] = (count + 1, total + value)
+
+    def increment(self, name: str, amount: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+            self._counters.clear()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Count, sum, mean and p50/p95 of every series."""
+        with self._lock:
+            series = {name: [value for _, value in samples] for name, samples in self._samples.items()}
+            totals = dict(self._totals)
+        summary = {}
+        for name, values in sorted(series.items()):
+            count, total = totals[name]
+            stats = {"count": count, "sum": total, "mean": total / count}
+            for quantile in QUANTILES:
+                stats[f"p{int(quantile * 100)}"] = percentile(values, quantile)
+            summary[name] = stats
+        return summary
+
+    def counters(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(sorted(self._counters.items()))
+
+    def format(self) -> str:
+        """A table of every series and counter for display."""
+        summary = self.summary()
+        counters = self.counters()
+        if not summary and not counters:
+            return "No metrics recorded yet."
+        width = max(len(name) for name in list(summary) + list(counters))
+        lines = [f"{'metric':<{width}}  {'count':>7}  {'p50':>10}  {'p95':>10}  {'mean':>10}"]
+        for name, stats in summary.items():
+            lines.append(f"{name:<{width}}  {stats['count']:>7}  {stats['p50']:>10.4g}  {stats['p95']:>10.4g}  {stats['mean']:>10.4g}")
+        for name, value in counters.items():
+            lines.append(f"{name:<{width}}  {value:>7g}")
+        return "\n".join(lines)
+
+    def export_jsonl(self, path: str) -> int:
+        """Append every retained sample and the current counters to `path` as JSON lines; returns the line count."""
+        with self._lock:
+            samples = [(name, timestamp, value) for name, series in self._samples.items() for timestamp, value in series]
+            counters = dict(self._counters)
+        now = time.time()
+        with open(path, 'a', encoding='utf-8') as f:
+            for name, timestamp, value in samples:
+                f.write(json.dumps({"metric": name, "type": "sample", "time": timestamp, "value": value}) + "\n")
+            for name, value in counters.items():
+                f.write(json.dumps({"metric": name, "type": "counter", "time": now, "value": value}) + "\n")
+        return len(samples) + len(counters)
+
+    def export_prometheus(self, path: str) -> None:
+        """Write the series as summaries and the counters as counters in Prometheus text format."""
+        lines = []
+        for name, stats in self.summary().items():
+            metric = METRICS_PREFIX + name
+            lines.append(f"# TYPE {metric} summary")
+            for quantile in QUANTILES:
+                lines.append(f'{metric}{{quantile="{quantile}"}} {stats[f"p{int(quantile * 100)}"]}')
+            lines.append(f"{metric}_sum {stats['sum']}")
+            lines.append(f"{metric}_count {stats['count']}")
+        for name, value in self.counters().items():
+            metric = METRICS_PREFIX + name
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+
+
+metrics = Metrics()
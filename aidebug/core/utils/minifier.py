@@ -0,0 +1,243 @@
+import io
+import os
+import re
+import tokenize
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+from .context_packer import estimate_tokens
+from .file_index import content_hash
+
+MINIFY_CONTEXT = os.getenv("MINIFY_CONTEXT", "false").lower() == "true"
+MINIFY_CACHE_BYTES = int(os.getenv("MINIFY_CACHE_BYTES", str(8 * 1024 * 1024)))
+# Runs of this many literal-only lines are cut down to their first TABLE_KEEP_LINES and their last.
+TABLE_MIN_LINES = 12
+TABLE_KEEP_LINES = 3
+BLANK_RUN_LINES = 3
+
+LINE_MARKER = "@L{}"
+MARKER_NOTE = ("Comments, docstring bodies and blank runs were removed from the project files. "
+               "A line '@L<n>' means the line after it is line n of the original file.")
+
+_LINE_COMMENTS = {
+    '#': ('.sh', '.bash', '.zsh', '.rb', '.pl', '.r', '.yaml', '.yml', '.toml', '.cfg', '.conf', '.dockerfile', '.mk'),
+    '//': ('.js', '.jsx', '.ts', '.tsx', '.mjs', '.java', '.kt', '.scala', '.c', '.h', '.cc', '.cpp', '.hpp',
+           '.cs', '.go', '.rs', '.swift', '.php', '.dart'),
+    '--': ('.sql', '.lua', '.hs'),
+}
+_BLOCK_COMMENT_EXTENSIONS = set(_LINE_COMMENTS['//']) | {'.css', '.scss', '.less'}
+_LINE_COMMENT_PREFIX = {extension: prefix for prefix, extensions in _LINE_COMMENTS.items() for extension in extensions}
+
+_LITERAL = r"""(?:[-+]?(?:0[xX][\da-fA-F_]+|\d[\d_]*\.?\d*(?:[eE][-+]?\d+)?)|"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|true|false|null|None|True|False)"""
+_LITERAL_LINE = re.compile(rf"^\s*(?:(?:{_LITERAL}|[\[\]{{}}()])\s*[,:;]?\s*)+$")
+_STRING_PREFIX = re.compile(r"^([rRbBuU]*)(\"\"\"|'''|\"|')")
+
+
+class MinifiedFile:
+    """A file's minified content and the original line number of each of its lines."""
+    __slots__ = ('content', 'line_map', 'original_bytes', 'original_tokens', 'tokens')
+
+    def __init__(self, content: str, line_map: List[int], original_bytes: int, original_tokens: int) -> None:
+        self.content = content
+        self.line_map = line_map
+        self.original_bytes = original_bytes
+        self.original_tokens = original_tokens
+        self.tokens = estimate_tokens(content)
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.original_bytes - len(self.content)
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.original_tokens - self.tokens
+
+    def original_line(self, line: int) -> int:
+        """The original line number of 1-based minified `line`."""
+        return self.line_map[min(max(line, 1), len(self.line_map)) - 1] if self.line_map else line
+
+
+def _condensed_docstring(text: str) -> str:
+    """A docstring cut down to its first line, keeping its prefix and quotes."""
+    match = _STRING_PREFIX.match(text)
+    if not match:
+        return text
+    opening = match.group(0)
+    quote = match.group(2)
+    body = text[len(opening):-len(quote)]
+    first = next((line.strip() for line in body.splitlines() if line.strip()), "")
+    return f"{opening}{first}{quote}"
+
+
+def _python_edits(content: str, lines: List[str]) -> Optional[Set[int]]:
+    """Strip comments and docstring bodies from `lines` in place; returns the 0-based rows to drop.
+
+    Returns None when the source cannot be tokenized, e.g. an unfinished edit.
+    """
+    try:
+        tokens = list(tokenize.generate_tokens(io.StringIO(content).readline))
+    except (tokenize.TokenError, SyntaxError, IndentationError):
+        return None
+
+    significant = [token for token in tokens if token.type not in (tokenize.NL, tokenize.COMMENT)]
+    edits = []
+    for token in tokens:
+        if token.type == tokenize.COMMENT and not (token.start[0] == 1 and token.string.startswith('#!')):
+            edits.append(('comment', token))
+    for index, token in enumerate(significant):
+        if token.type != tokenize.STRING or token.start[0] == token.end[0]:
+            continue
+        previous = significant[index - 1].type if index else tokenize.NEWLINE
+        following = significant[index + 1].type if index + 1 < len(significant) else tokenize.ENDMARKER
+        if previous in (tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT, tokenize.ENCODING) and following in (tokenize.NEWLINE, tokenize.ENDMARKER):
+            edits.append(('docstring', token))
+
+    dropped = set()
+    # Apply from the end so earlier columns stay valid
+    for kind, token in sorted(edits, key=lambda edit: edit[1].start, reverse=True):
+        row, column = token.start[0] - 1, token.start[1]
+        if kind == 'comment':
+            lines[row] = lines[row][:column].rstrip()
+            if not lines[row].strip():
+                dropped.add(row)
+        else:
+            end_row, end_column = token.end[0] - 1, token.end[1]
+            lines[row] = lines[row][:column] + _condensed_docstring(token.string) + lines[end_row][end_column:]
+            dropped.update(range(row + 1, end_row + 1))
+    return dropped
+
+
+def _generic_edits(extension: str, lines: List[str]) -> Set[int]:
+    """Drop whole-line comments, including block comments, using per-extension rules."""
+    prefix = _LINE_COMMENT_PREFIX.get(extension)
+    block = extension in _BLOCK_COMMENT_EXTENSIONS
+    dropped = set()
+    in_block = False
+    for row, line in enumerate(lines):
+        stripped = line.strip()
+        if in_block:
+            if '*/' in stripped:
+                in_block = False
+                rest = stripped.split('*/', 1)[1].strip()
+                if rest:
+                    lines[row] = rest
+                    continue
+            dropped.add(row)
+        elif block and stripped.startswith('/*'):
+            if '*/' not in stripped:
+                in_block = True
+                dropped.add(row)
+            elif stripped.endswith('*/'):
+                dropped.add(row)
+        elif prefix and stripped.startswith(prefix) and not (row == 0 and stripped.startswith('#!')):
+            dropped.add(row)
+    return dropped
+
+
+def minify(path: str, content: str) -> MinifiedFile:
+    """Remove comments, docstring bodies, trailing whitespace, blank runs and long literal tables.
+
+    Python is handled with the tokenizer; other languages with line-based
+    rules for their comment syntax. Wherever lines were removed an '@L<n>'
+    marker gives the original number of the next line.
+    """
+    lines = content.splitlines()
+    extension = os.path.splitext(path)[1].lower()
+    dropped = _python_edits(content, lines) if extension in ('.py', '.pyw', '.pyi') else None
+    if dropped is None:
+        dropped = _generic_edits(extension if extension not in ('.py', '.pyw', '.pyi') else '.sh', lines)
+    lines = [line.rstrip() for line in lines]
+
+    # A run of blank lines goes when it borders removed lines or is long; otherwise it is cheaper than a marker
+    row = 0
+    while row < len(lines):
+        if lines[row] or row in dropped:
+            row += 1
+            continue
+        end = row
+        while end < len(lines) and not lines[end] and end not in dropped:
+            end += 1
+        if end - row >= BLANK_RUN_LINES or (row - 1) in dropped or end in dropped:
+            dropped.update(range(row, end))
+        row = end
+
+    kept: List[Tuple[int, str]] = []
+    table: List[Tuple[int, str]] = []
+
+    def flush_table() -> None:
+        if len(table) >= TABLE_MIN_LINES:
+            kept.extend(table[:TABLE_KEEP_LINES])
+            kept.append((table[TABLE_KEEP_LINES][0], f"... ({len(table) - TABLE_KEEP_LINES - 1} more lines of literals)"))
+            kept.append(table[-1])
+        else:
+            kept.extend(table)
+        table.clear()
+
+    for row, line in enumerate(lines):
+        if row in dropped:
+            continue
+        if _LITERAL_LINE.match(line):
+            table.append((row + 1, line))
+            continue
+        flush_table()
+        kept.append((row + 1, line))
+    flush_table()
+
+    output: List[str] = []
+    line_map: List[int] = []
+    expected = 1
+    for number, line in kept:
+        if number != expected:
+            output.append(LINE_MARKER.format(number))
+            line_map.append(number)
+        output.append(line)
+        line_map.append(number)
+        expected = number + 1
+
+    return MinifiedFile("\n".join(output), line_map, len(content), estimate_tokens(content))
+
+
+class Minifier:
+    """Minify files through an LRU cache keyed by extension and content hash.
+
+    Like FileStore, the cache is bounded by the bytes it holds rather than by
+    its number of entries, so a few large files cannot pin a copy of the codebase.
+    """
+
+    def __init__(self, max_bytes: int = MINIFY_CACHE_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self._cache: "OrderedDict[Tuple[str, str], MinifiedFile]" = OrderedDict()
+        self._resident = 0
+
+    @property
+    def resident_bytes(self) -> int:
+        return self._resident
+
+    def minify(self, path: str, content: str) -> MinifiedFile:
+        key = (os.path.splitext(path)[1].lower(), content_hash(content))
+        minified = self._cache.get(key)
+        if minified is not None:
+            self._cache.move_to_end(key)
+            return minified
+        minified = self._cache[key] = minify(path, content)
+        self._resident += _cached_size(minified)
+        while self._resident > self.max_bytes and len(self._cache) > 1:
+            _, evicted = self._cache.popitem(last=False)
+            self._resident -= _cached_size(evicted)
+        return minified
+
+
+def _cached_size(minified: MinifiedFile) -> int:
+    # The line map holds one int per line, about as large as a short line of text
+    return len(minified.content) + 8 * len(minified.line_map)
+
+
+def format_savings(minified: Dict[str, MinifiedFile]) -> str:
+    """Summarise the bytes and estimated tokens minification saved."""
+    original_bytes = sum(file.original_bytes for file in minified.values())
+    original_tokens = sum(file.original_tokens for file in minified.values())
+    saved_bytes = sum(file.saved_bytes for file in minified.values())
+    saved_tokens = sum(file.saved_tokens for file in minified.values())
+    share = saved_tokens / original_tokens if original_tokens else 0
+    return (f"Minified {len(minified)} file(s): -{saved_bytes / 1024:.1f} of {original_bytes / 1024:.1f} KB, "
+            f"~{saved_tokens} fewer tokens ({share:.0%} of {original_tokens}).")
@@ -0,0 +1,162 @@
+import os
+import sys
+import time
+import queue
+import codecs
+import signal
+import threading
+import subprocess
+from collections import deque
+from typing import Callable, Optional
+
+from colorama import Fore
+
+STDERR_TAIL_BYTES = int(os.getenv("STDERR_TAIL_BYTES", str(64 * 1024)))
+KILL_GRACE_SECONDS = 2.0
+READ_SIZE = 65536
+CANCEL_POLL_SECONDS = 0.1
+
+
+class TailBuffer:
+    """Keep only the last `limit` characters written to it."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.size = 0
+        self.chunks = deque()
+
+    def write(self, text: str) -> None:
+        self.chunks.append(text)
+        self.size += len(text)
+        while self.size - len(self.chunks[0]) >= self.limit:
+            self.size -= len(self.chunks.popleft())
+
+    def getvalue(self) -> str:
+        text = "".join(self.chunks)
+        return text[-self.limit:] if len(text) > self.limit else text
+
+
+class ProcessResult:
+    def __init__(self, returncode: Optional[int], stdout_tail: str, stderr_tail: str, timed_out: bool, cancelled: bool) -> None:
+        self.returncode = returncode
+        self.stdout_tail = stdout_tail
+        self.stderr_tail = stderr_tail
+        self.timed_out = timed_out
+        self.cancelled = cancelled
+
+
+def print_tagged(stream: str, text: str) -> None:
+    """Echo child output live, colouring stderr so the two streams stay distinguishable."""
+    if stream == 'stderr':
+        sys.stdout.write(f"{Fore.RED}{text}{Fore.RESET}")
+    else:
+        sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+def _pump(pipe, stream: str, output: queue.Queue) -> None:
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    try:
+        while True:
+            data = pipe.read1(READ_SIZE)
+            if not data:
+                break
+            text = decoder.decode(data)
+            if text:
+                output.put((stream, text))
+        text = decoder.decode(b'', final=True)
+        if text:
+            output.put((stream, text))
+    finally:
+        pipe.close()
+        output.put((stream, None))
+
+
+def _stop(process: subprocess.Popen) -> None:
+    """Terminate the child and everything it spawned, killing it if it ignores the request."""
+    try:
+        if os.name == 'posix':
+            os.killpg(process.pid, signal.SIGTERM)
+        else:
+            process.terminate()
+        process.wait(KILL_GRACE_SECONDS)
+    except subprocess.TimeoutExpired:
+        if os.name == 'posix':
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+        process.wait()
+    except ProcessLookupError:
+        pass
+
+
+def run_process(
+    command: str,
+    timeout: Optional[float] = None,
+    on_output: Optional[Callable[[str, str], None]] = print_tagged,
+    tail_bytes: int = STDERR_TAIL_BYTES,
+    cancel: Optional[threading.Event] = None
+) -> ProcessResult:
+    """Run a shell command, streaming stdout and stderr as they are produced.
+
+    Both pipes are drained concurrently by reader threads, so a child that
+    writes heavily to one stream can never block on the other, and output is
+    delivered in the order it arrives. Only the last `tail_bytes` characters of
+    each stream are retained. The child is stopped when `timeout` seconds
+    pass, when the user presses Ctrl-C or, for runs off the main thread, when
+    `cancel` is set.
+    """
+    process = subprocess.Popen(
+        command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        start_new_session=os.name == 'posix',
+    )
+    output: queue.Queue = queue.Queue()
+    tails = {'stdout': TailBuffer(tail_bytes), 'stderr': TailBuffer(tail_bytes)}
+    readers = [
+        threading.Thread(target=_pump, args=(process.stdout, 'stdout', output), daemon=True),
+        threading.Thread(target=_pump, args=(process.stderr, 'stderr', output), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+
+    deadline = time.monotonic() + timeout if timeout else None
+    timed_out = cancelled = False
+    open_streams = 2
+    try:
+        while open_streams:
+            wait = None if deadline is None else deadline - time.monotonic()
+            if wait is not None and wait <= 0:
+                timed_out = True
+                _stop(process)
+                break
+            if cancel is not None:
+                if cancel.is_set():
+                    cancelled = True
+                    _stop(process)
+                    break
+                wait = CANCEL_POLL_SECONDS if wait is None else min(wait, CANCEL_POLL_SECONDS)
+            try:
+                stream, text = output.get(timeout=wait)
+            except queue.Empty:
+                continue
+            if text is None:
+                open_streams -= 1
+                continue
+            tails[stream].write(text)
+            if on_output is not None:
+                on_output(stream, text)
+    except KeyboardInterrupt:
+        cancelled = True
+        _stop(process)
+
+    if timed_out or cancelled:
+        # Collect whatever the readers still have queued before they saw EOF.
+        for reader in readers:
+            reader.join(KILL_GRACE_SECONDS)
+        while not output.empty():
+            stream, text = output.get_nowait()
+            if text is not None:
+                tails[stream].write(text)
+
+    returncode = process.wait()
+    return ProcessResult(returncode, tails['stdout'].getvalue(), tails['stderr'].getvalue(), timed_out, cancelled)
@@ -0,0 +1,134 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+from .file_index import AIDEBUG_DIR
+
+CACHE_DIR = os.path.join(AIDEBUG_DIR, "cache")
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+CACHE_MAX_AGE = int(os.getenv("CACHE_MAX_AGE", str(7 * 24 * 60 * 60)))
+DISABLE_CACHE = os.getenv("DISABLE_CACHE", "false").lower() == "true"
+
+
+def cache_key(messages: List[Dict[str, str]], client_type: str, model: Optional[str], temperature: Optional[float]) -> str:
+    """Hash everything that determines a completion. Whitespace around message content is ignored."""
+    normalized = [{"role": message["role"], "content": message["content"].strip()} for message in messages]
+    payload = json.dumps(
+        {"messages": normalized, "client": client_type, "model": model, "temperature": temperature},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Content-addressed on-disk store of completed responses.
+
+    Each response lives in its own file named by its key. The file's mtime is
+    refreshed on every hit, so evicting by mtime evicts the least recently used
+    entries first. Entries older than `max_age` seconds are dropped, as are the
+    oldest entries once the cache exceeds `max_bytes`.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES, max_age: int = CACHE_MAX_AGE) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.stats_path = os.path.join(directory, "stats.json")
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._load_stats()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.txt")
+
+    def _load_stats(self) -> None:
+        try:
+            with open(self.stats_path, 'r') as f:
+                stats = json.load(f)
+            self.hits, self.misses = stats["hits"], stats["misses"]
+        except (FileNotFoundError, ValueError, KeyError):
+            self.hits = self.misses = 0
+
+    def _record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self._save_stats()
+
+    def _save_stats(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self.stats_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"hits": self.hits, "misses": self.misses}, f)
+        os.replace(tmp_path, self.stats_path)
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._entry_path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                os.remove(path)
+                raise FileNotFoundError(path)
+            with open(path, 'r', encoding='utf-8') as f:
+                response = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            self._record(hit=False)
+            return None
+        self._record(hit=True)
+        return response
+
+    def put(self, key: str, response: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._entry_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(response)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.evict()
+
+    def _entries(self) -> List[os.DirEntry]:
+        try:
+            return [entry for entry in os.scandir(self.directory) if entry.name.endswith(".txt")]
+        except FileNotFoundError:
+            return []
+
+    def evict(self) -> None:
+        now = time.time()
+        entries = []
+        for entry in self._entries():
+            stat = entry.stat()
+            if now - stat.st_mtime > self.max_age:
+                os.remove(entry.path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def clear(self) -> None:
+        for entry in self._entries():
+            os.remove(entry.path)
+        self.hits = self.misses = 0
+        self._save_stats()
+
+    def stats(self) -> Dict[str, float]:
+        entries = self._entries()
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(entries),
+            "bytes": sum(entry.stat().st_size for entry in entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
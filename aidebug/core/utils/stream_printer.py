@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+import threading
+from typing import IO, Iterable, Optional
+
+FLUSH_INTERVAL = float(os.getenv("FLUSH_INTERVAL", "0.05"))
+FLUSH_BYTES = int(os.getenv("FLUSH_BYTES", "2048"))
+
+
+def render_stream(
+    chunks: Iterable[str],
+    out: Optional[IO[str]] = None,
+    interval: float = FLUSH_INTERVAL,
+    max_buffer: int = FLUSH_BYTES,
+    cancel: Optional[threading.Event] = None
+) -> str:
+    """Print a streamed response, coalescing chunks into fewer terminal writes.
+
+    Buffered text is written and flushed once `interval` seconds have passed
+    since the last flush or `max_buffer` characters have accumulated, so the
+    output still appears live without one write per token. Once `cancel` is
+    set the stream is closed at the next chunk. Returns the text received.
+    """
+    out = out or sys.stdout
+    received = []
+    pending = []
+    pending_size = 0
+    last_flush = time.monotonic()
+
+    for chunk in chunks:
+        if cancel is not None and cancel.is_set():
+            # Close it now rather than when collected, so a client can stop generating
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+            break
+        if not chunk:
+            continue
+        received.append(chunk)
+        pending.append(chunk)
+        pending_size += len(chunk)
+        now = time.monotonic()
+        if pending_size >= max_buffer or now - last_flush >= interval:
+            out.write("".join(pending))
+            out.flush()
+            pending = []
+            pending_size = 0
+            last_flush = now
+
+    out.write("".join(pending) + "\n")
+    out.flush()
+    return "".join(received)
@@ -0,0 +1,252 @@
+import os
+import ast
+import json
+from typing import Dict, List, Optional, Set
+
+from .file_index import AIDEBUG_DIR
+from .context_packer import estimate_tokens, query_terms
+from .traceback_parser import parse_frames, resolve_frames
+
+SYMBOL_INDEX_FILE = os.path.join(AIDEBUG_DIR, "symbol_index.json")
+# A called name defined in more places than this is too ambiguous to follow.
+MAX_CALLEE_DEFINITIONS = 3
+
+
+# Method names shared by builtin types; calls to them on arbitrary objects are not followed.
+COMMON_METHOD_NAMES = {
+    'get', 'set', 'items', 'keys', 'values', 'append', 'extend', 'insert', 'pop', 'remove', 'update',
+    'add', 'discard', 'clear', 'copy', 'join', 'split', 'strip', 'lstrip', 'rstrip', 'replace',
+    'startswith', 'endswith', 'format', 'encode', 'decode', 'lower', 'upper', 'read', 'write',
+    'close', 'open', 'flush', 'sort', 'index', 'count', 'find',
+}
+
+
+def _called_name(node: ast.Call) -> Optional[str]:
+    """'name' for plain calls, 'self.name' for calls on self, '.name' for other attribute calls."""
+    func = node.func
+    if isinstance(func, ast.Name):
+        return func.id
+    if isinstance(func, ast.Attribute):
+        if isinstance(func.value, ast.Name) and func.value.id in ('self', 'cls'):
+            return f"self.{func.attr}"
+        return f".{func.attr}"
+    return None
+
+
+def _own_nodes(node: ast.AST):
+    """Walk `node` without entering nested functions and classes, which are indexed separately."""
+    stack = list(ast.iter_child_nodes(node))
+    while stack:
+        child = stack.pop()
+        if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            continue
+        yield child
+        stack.extend(ast.iter_child_nodes(child))
+
+
+class _SymbolCollector(ast.NodeVisitor):
+    def __init__(self) -> None:
+        self.symbols: List[Dict] = []
+        self.imports: Dict[str, str] = {}
+        self.scope: List[tuple] = []
+
+    def _define(self, node, kind: str) -> None:
+        qualname = ".".join([name for name, _ in self.scope] + [node.name])
+        calls = sorted({name for child in _own_nodes(node) if isinstance(child, ast.Call)
+                        for name in [_called_name(child)] if name})
+        self.symbols.append({
+            "name": node.name,
+            "qualname": qualname,
+            "kind": kind,
+            "line": node.lineno,
+            "start": min([node.lineno] + [decorator.lineno for decorator in node.decorator_list]),
+            "end": getattr(node, "end_lineno", node.lineno),
+            "calls": calls,
+        })
+        self.scope.append((node.name, kind))
+        self.generic_visit(node)
+        self.scope.pop()
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        self._define(node, "class")
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        self._define(node, "method" if self.scope and self.scope[-1][1] == "class" else "function")
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            self.imports[alias.asname or alias.name.split(".")[0]] = alias.name
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        module = "." * node.level + (node.module or "")
+        for alias in node.names:
+            self.imports[alias.asname or alias.name] = f"{module}.{alias.name}" if module else alias.name
+
+
+def module_name(path: str) -> str:
+    name = os.path.splitext(os.path.normpath(path))[0].replace(os.sep, ".")
+    return name[:-len(".__init__")] if name.endswith(".__init__") else name
+
+
+def index_source(path: str, source: str) -> Optional[Dict]:
+    """Collect the classes, functions, imports and calls defined in one Python file."""
+    try:
+        tree = ast.parse(source, filename=path)
+    except (SyntaxError, ValueError):
+        return None
+    collector = _SymbolCollector()
+    collector.visit(tree)
+    return {"module": module_name(path), "symbols": collector.symbols, "imports": collector.imports}
+
+
+class SymbolIndex:
+    """Persistent, incrementally refreshed index of the symbols in the selected Python files.
+
+    Files are re-parsed only when their content hash (from the FileStore)
+    changes, and the index is saved between sessions, so a warm project loads
+    without parsing anything.
+    """
+
+    def __init__(self, index_path: str = SYMBOL_INDEX_FILE) -> None:
+        self.index_path = index_path
+        self.files: Dict[str, Dict] = {}
+        try:
+            with open(self.index_path, 'r') as f:
+                self.files = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.files = {}
+
+    def save(self) -> None:
+        directory = os.path.dirname(self.index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.files, f)
+        os.replace(tmp_path, self.index_path)
+
+    def refresh(self, contents: Dict[str, str], hashes: Dict[str, str]) -> List[str]:
+        """Re-index the Python files in `contents` whose hash changed. Returns the re-parsed paths."""
+        parsed = []
+        for path in contents:
+            if not path.endswith(".py"):
+                continue
+            digest = hashes.get(path)
+            entry = self.files.get(path)
+            if entry is not None and digest is not None and entry["hash"] == digest:
+                continue
+            indexed = index_source(path, contents[path])
+            if indexed is None:
+                self.files.pop(path, None)
+                continue
+            indexed["hash"] = digest
+            self.files[path] = indexed
+            parsed.append(path)
+
+        removed = [path for path in self.files if path not in contents]
+        for path in removed:
+            del self.files[path]
+        if parsed or removed:
+            self.save()
+        return parsed
+
+    def definitions(self, name: str) -> List[tuple]:
+        return [(path, symbol) for path, entry in self.files.items()
+                for symbol in entry["symbols"] if symbol["name"] == name]
+
+    def resolve_call(self, path: str, caller: Dict, call: str) -> List[tuple]:
+        """Find the definitions a recorded call most likely refers to."""
+        name = call.rsplit(".", 1)[-1]
+        targets = self.definitions(name)
+        local = [target for target in targets if target[0] == path]
+
+        if call.startswith("self."):
+            owner = caller["qualname"].rsplit(".", 1)[0]
+            same_class = [target for target in local if target[1]["qualname"] == f"{owner}.{name}"]
+            return same_class or local[:1]
+        if call.startswith(".") and name in COMMON_METHOD_NAMES:
+            return []
+
+        # Prefer a definition in the same file, then one in the module the name was imported from.
+        imports = self.files[path]["imports"]
+        imported = [target for target in targets
+                    if name in imports and imports[name].lstrip(".").endswith(f"{self.files[target[0]]['module'].rsplit('.', 1)[-1]}.{name}")]
+        targets = local or imported or targets
+        return targets if len(targets) <= MAX_CALLEE_DEFINITIONS else []
+
+    def enclosing(self, path: str, line: int) -> Optional[Dict]:
+        """The innermost symbol in `path` whose body contains `line`."""
+        best = None
+        for symbol in self.files.get(path, {}).get("symbols", []):
+            if symbol["start"] <= line <= symbol["end"]:
+                if best is None or symbol["start"] >= best["start"]:
+                    best = symbol
+        return best
+
+    def relevant(self, text: str) -> List[tuple]:
+        """Pick the symbols `text` is about, then the symbols those call, most relevant first."""
+        chosen: List[tuple] = []
+        seen: Set[tuple] = set()
+
+        def add(path: str, symbol: Dict) -> None:
+            key = (path, symbol["qualname"])
+            if key not in seen:
+                seen.add(key)
+                chosen.append((path, symbol))
+
+        for path, frames in resolve_frames(parse_frames(text), list(self.files)).items():
+            for frame in frames:
+                symbol = self.enclosing(path, frame.line)
+                if symbol is not None:
+                    add(path, symbol)
+
+        terms = query_terms(text)
+        for path, entry in self.files.items():
+            for symbol in entry["symbols"]:
+                if symbol["name"].lower() in terms or symbol["qualname"].lower() in terms:
+                    add(path, symbol)
+
+        direct = list(chosen)
+        for path, symbol in direct:
+            for call in symbol["calls"]:
+                for target in self.resolve_call(path, symbol, call):
+                    add(*target)
+        return chosen
+
+    def source(self, path: str, symbol: Dict, contents: Dict[str, str], full_members: Set[str]) -> str:
+        """The symbol's source. Classes are outlined: their body up to the first
+        method plus each method's signature, except members listed in `full_members`."""
+        lines = contents.get(path, "").splitlines()
+        if symbol["kind"] != "class":
+            return "\n".join(lines[symbol["start"] - 1:symbol["end"]])
+
+        prefix = symbol["qualname"] + "."
+        members = [member for member in self.files[path]["symbols"]
+                   if member["qualname"].startswith(prefix) and "." not in member["qualname"][len(prefix):]]
+        header_end = members[0]["start"] - 1 if members else symbol["end"]
+        outline = lines[symbol["start"] - 1:header_end]
+        for member in members:
+            if member["qualname"] not in full_members:
+                outline.append(lines[member["line"] - 1].rstrip() + " ...")
+        return "\n".join(outline)
+
+    def context(self, text: str, contents: Dict[str, str], budget: int) -> List[Dict[str, str]]:
+        """Prompt messages holding the source of the relevant symbols, within `budget` tokens."""
+        relevant = self.relevant(text)
+        selected = {symbol["qualname"] for _, symbol in relevant}
+        messages = []
+        used = 0
+        for path, symbol in relevant:
+            body = self.source(path, symbol, contents, selected)
+            tokens = estimate_tokens(body)
+            if used + tokens > budget:
+                continue
+            used += tokens
+            kind = "Class outline" if symbol["kind"] == "class" else symbol["kind"].capitalize()
+            messages.append({
+                "role": "user",
+                "content": f"File: {path} {kind}: {symbol['qualname']} (lines {symbol['start']}-{symbol['end']}) Content:\n{body}",
+            })
+        return messages
@@ -1,16 +1,33 @@
-from typing import Callable
+import os
 import time
+import functools
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from .metrics import metrics
+
+TIMER_VERBOSE = os.getenv("TIMER_VERBOSE", "false").lower() == "true"
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """Record how long the block takes as the `name` metric, in seconds."""
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start_time
+        metrics.observe(name, elapsed)
+        if TIMER_VERBOSE:
+            print(f"{name}: {elapsed:.4f} seconds")
 
-timer_switch = True
 
 def function_timer(func: Callable) -> Callable:
+    """Record each call's duration as the `<function name>_seconds` metric."""
+    name = f"{func.__name__}_seconds"
+
+    @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        if timer_switch:
-            start_time = time.time()
-            result = func(*args, **kwargs)
-            end_time = time.time()
-            print(f"Function {func.__name__} took {end_time - start_time} seconds to execute.")
-            return result
-        else:
+        with timed(name):
             return func(*args, **kwargs)
-    return wrapper
\ No newline at end of file
+    return wrapper
@@ -0,0 +1,104 @@
+import os
+import re
+from typing import Dict, List, Optional
+
+# Python tracebacks: File "app/main.py", line 12, in handler
+PYTHON_FRAME = re.compile(r'File "(?P<path>[^"]+)", line (?P<line>\d+)(?:, in (?P<func>[^\s]+))?')
+# Compilers and linters: src/main.c:12:5: error ..., --> src/lib.rs:12:5, at fn (/app/index.js:12:5)
+COLON_FRAME = re.compile(r'(?P<path>(?:[A-Za-z]:)?[^\s:"\'()<>]+\.[A-Za-z0-9_]+):(?P<line>\d+)(?::\d+)?')
+# MSBuild and tsc: src/app.ts(12,5): error TS2304
+PAREN_FRAME = re.compile(r'(?P<path>[^\s"\'()<>]+\.[A-Za-z0-9_]+)\((?P<line>\d+)(?:,\d+)?\)')
+
+# Leading './', '../' and '/' segments, which never help a suffix match
+RELATIVE_PREFIX = re.compile(r'^(?:\.\.?/|/)+')
+
+DEFAULT_CONTEXT_LINES = 10
+MAX_ERROR_CHARS = 8000
+
+
+class Frame:
+    __slots__ = ('path', 'line', 'func')
+
+    def __init__(self, path: str, line: int, func: Optional[str] = None) -> None:
+        self.path = path
+        self.line = line
+        self.func = func
+
+    def __repr__(self) -> str:
+        return f"Frame({self.path!r}, {self.line}, {self.func!r})"
+
+
+def parse_frames(text: str) -> List[Frame]:
+    """Extract the file/line locations referenced by a traceback or compiler output, in order."""
+    frames = []
+    seen = set()
+    for pattern in (PYTHON_FRAME, COLON_FRAME, PAREN_FRAME):
+        for match in pattern.finditer(text):
+            key = (match.group('path'), int(match.group('line')))
+            if key in seen:
+                continue
+            seen.add(key)
+            func = match.groupdict().get('func')
+            frames.append((match.start(), Frame(key[0], key[1], func)))
+    return [frame for _, frame in sorted(frames, key=lambda item: item[0])]
+
+
+def resolve_frames(frames: List[Frame], selected: List[str]) -> Dict[str, List[Frame]]:
+    """Map frames onto selected files by absolute path, falling back to the longest matching path suffix."""
+    by_abspath = {os.path.abspath(path): path for path in selected}
+    resolved: Dict[str, List[Frame]] = {}
+    for frame in frames:
+        path = by_abspath.get(os.path.abspath(frame.path))
+        if path is None:
+            suffix = '/' + RELATIVE_PREFIX.sub('', frame.path.replace('\\', '/'))
+            candidates = [selected_path for absolute, selected_path in by_abspath.items()
+                          if absolute.replace('\\', '/').endswith(suffix)]
+            if len(candidates) == 1:
+                path = candidates[0]
+        if path is not None:
+            resolved.setdefault(path, []).append(frame)
+    return resolved
+
+
+def frame_excerpt(path: str, frames: List[Frame], context_lines: int) -> Optional[str]:
+    """Number the lines around each frame in `path`, marking the referenced lines with '>'."""
+    try:
+        with open(path, 'r', errors='ignore') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+
+    marked = {frame.line for frame in frames}
+    ranges = []
+    for line in sorted(marked):
+        start, end = max(1, line - context_lines), min(len(lines), line + context_lines)
+        if ranges and start <= ranges[-1][1] + 1:
+            ranges[-1][1] = max(ranges[-1][1], end)
+        else:
+            ranges.append([start, end])
+
+    width = len(str(len(lines)))
+    chunks = []
+    for start, end in ranges:
+        chunks.append("\n".join(
+            f"{'>' if number in marked else ' '} {number:>{width}} | {lines[number - 1]}"
+            for number in range(start, end + 1)
+        ))
+    return "\n...\n".join(chunks) if chunks else None
+
+
+def traceback_context(error: str, selected: List[str], context_lines: int = DEFAULT_CONTEXT_LINES) -> List[Dict[str, str]]:
+    """Build prompt messages holding only the selected files referenced by `error`."""
+    messages = []
+    for path, frames in resolve_frames(parse_frames(error), selected).items():
+        excerpt = frame_excerpt(path, frames, context_lines)
+        if excerpt:
+            messages.append({"role": "user", "content": f"File: {path} (lines around the failing frames) Content:\n{excerpt}"})
+    return messages
+
+
+def trim_error(error: str, max_chars: int = MAX_ERROR_CHARS) -> str:
+    """Keep the tail of a long error, where the exception message and innermost frames are."""
+    if len(error) <= max_chars:
+        return error
+    return "... (earlier output trimmed)\n" + error[-max_chars:]
@@ -1,9 +1,24 @@
-from typing import List, Dict
-
-def update_codebase(files_and_content: List[Dict[str, str]]) -> None:
-    """Update the contents of the selected project files."""
-    for file_info in files_and_content:
-        for path in file_info.keys():
-            with open(path, 'r') as file:
-                content = file.read()
-            file_info[path] = content
\ No newline at end of file
+from typing import Dict, Iterable, List, Optional
+
+from .file_index import FileIndex
+from .file_store import FileStore
+from .files_data import scrapeable_files
+from .timer import function_timer
+
+@function_timer
+def update_codebase(files: List[str], file_store: FileStore, file_index: FileIndex, changed: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+    """Update the contents of the selected project files.
+
+    Files whose mtime and size match the store are not re-read; with `changed`
+    only those files are looked at. The added, changed, removed and skipped
+    paths are returned.
+    """
+    return file_store.refresh(scrapeable_files(files), file_index, changed)
+
+def format_changes(changes: Dict[str, List[str]]) -> str:
+    """Summarise the result of `update_codebase` for display."""
+    lines = [f"{len(changes['added'])} added, {len(changes['changed'])} changed, {len(changes['removed'])} removed, {len(changes['skipped'])} skipped."]
+    for kind in ('added', 'changed', 'removed', 'skipped'):
+        for path in changes[kind]:
+            lines.append(f"  {kind}: {path}")
+    return "\n".join(lines)
@@ -0,0 +1,116 @@
+import os
+import json
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from .file_index import AIDEBUG_DIR
+
+WORKSPACE_FILE = os.path.join(AIDEBUG_DIR, "workspace.db")
+DISABLE_WORKSPACE = os.getenv("DISABLE_WORKSPACE", "false").lower() == "true"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS selection (position INTEGER PRIMARY KEY, path TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS snapshot (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+"""
+
+
+class Workspace:
+    """Per-project SQLite store of the file selection, shell settings and a snapshot of file metadata.
+
+    The snapshot keeps each file's mtime, size and hash, so a reopened project
+    only re-reads files whose metadata changed; contents are read from disk when
+    first needed. It is the only persisted copy of that metadata. Writes are
+    incremental: only changed settings and changed files are written.
+    """
+
+    def __init__(self, path: str = WORKSPACE_FILE) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        # Shared with the project watcher's thread; the lock serialises access
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+        self._drop_contents()
+        # The selection as last loaded or saved, so an unchanged one is not rewritten
+        self._selection: Optional[List[str]] = None
+
+    def _drop_contents(self) -> None:
+        """Remove the content column that older workspaces stored but nothing read."""
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(snapshot)")}
+        if "content" not in columns:
+            return
+        try:
+            with self.db:
+                self.db.execute("ALTER TABLE snapshot DROP COLUMN content")
+        except sqlite3.OperationalError:
+            # SQLite before 3.35 cannot drop columns; the snapshot is rebuilt on the next refresh
+            with self.db:
+                self.db.execute("DROP TABLE snapshot")
+            self.db.executescript(_SCHEMA)
+        self.db.execute("VACUUM")
+
+    def close(self) -> None:
+        with self._lock:
+            self.db.close()
+
+    def load_settings(self) -> Dict[str, object]:
+        with self._lock:
+            return {key: json.loads(value) for key, value in self.db.execute("SELECT key, value FROM settings")}
+
+    def save_settings(self, settings: Dict[str, object]) -> None:
+        with self._lock, self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in settings.items()],
+            )
+
+    def delete_settings(self, keys: Iterable[str]) -> None:
+        with self._lock, self.db:
+            self.db.executemany("DELETE FROM settings WHERE key = ?", [(key,) for key in keys])
+
+    def load_selection(self) -> List[str]:
+        with self._lock:
+            self._selection = [path for (path,) in self.db.execute("SELECT path FROM selection ORDER BY position")]
+            return list(self._selection)
+
+    def load_entries(self, paths: Iterable[str]) -> Dict[str, Dict]:
+        """The snapshot's mtime_ns, size and hash of each of `paths`, without reading any content."""
+        wanted = set(paths)
+        with self._lock:
+            rows = self.db.execute("SELECT path, mtime_ns, size, hash FROM snapshot").fetchall()
+        return {
+            path: {"mtime_ns": mtime_ns, "size": size, "hash": digest}
+            for path, mtime_ns, size, digest in rows
+            if path in wanted
+        }
+
+    def save_files(self, selection: List[str], updated: Dict[str, Dict], removed: Iterable[str]) -> None:
+        """Write what changed since the last save: the selection if it differs, and the snapshot rows
+        of the files `updated` or `removed` (see FileIndex.take_dirty).
+        """
+        selection = list(selection)
+        removed = [(path,) for path in removed]
+        if selection == self._selection and not updated and not removed:
+            return
+        rows = [(path, entry["mtime_ns"], entry["size"], entry["hash"]) for path, entry in updated.items()]
+        with self._lock, self.db:
+            if selection != self._selection:
+                self.db.execute("DELETE FROM selection")
+                self.db.executemany("INSERT INTO selection (position, path) VALUES (?, ?)", enumerate(selection))
+                self._selection = selection
+            self.db.executemany(
+                "INSERT OR REPLACE INTO snapshot (path, mtime_ns, size, hash) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self.db.executemany("DELETE FROM snapshot WHERE path = ?", removed)
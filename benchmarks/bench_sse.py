@@ -0,0 +1,120 @@
+"""Micro-benchmark for the streaming path: SSE parsing and terminal rendering.
+
+Replays a recorded-style stream of 10,000 OpenAI chat completion events
+through the previous line-based parser and the incremental SSEParser, then
+renders the tokens with one write per token and with render_stream.
+
+Usage:
+    python -m benchmarks.bench_sse [--events 10000] [--chunk-size 1024] [--repeat 5]
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+from typing import Iterator, List
+
+import requests
+
+from aidebug.core.clientv2.sse import SSEParser
+from aidebug.core.utils.stream_printer import render_stream
+
+WORDS = ["def", " main", "(", "):", "\n   ", " return", " self", ".", "files", "_and", "_content", " #", " fix", " the", " error"]
+
+
+def record_stream(events: int) -> bytes:
+    """Build a deterministic stream shaped like a captured /v1/chat/completions response."""
+    # No comment lines: the legacy parser below cannot skip them.
+    parts = []
+    for index in range(events):
+        payload = {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion.chunk",
+            "created": 1700000000,
+            "model": "gpt-4o",
+            "choices": [{"index": 0, "delta": {"content": WORDS[index % len(WORDS)]}, "finish_reason": None}],
+        }
+        parts.append(b"data: " + json.dumps(payload).encode("utf-8") + b"\n\n")
+    parts.append(b"data: [DONE]\n\n")
+    return b"".join(parts)
+
+
+def recorded_response(body: bytes) -> requests.Response:
+    """A requests.Response that reads `body` the way a live streaming response would."""
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = io.BytesIO(body)
+    return response
+
+
+def legacy_tokens(body: bytes, size: int) -> Iterator[str]:
+    """The previous parser: iter_lines, lstrip(b"data: ") and json.loads per line."""
+    for line in recorded_response(body).iter_lines(chunk_size=size):
+        data = line.lstrip(b"data: ").decode("utf-8")
+        if data == "[DONE]":
+            return
+        if data:
+            yield json.loads(data)["choices"][0].get("delta", {}).get("content", "")
+
+
+def parser_tokens(body: bytes, size: int) -> Iterator[str]:
+    parser = SSEParser()
+    for chunk in recorded_response(body).iter_content(chunk_size=size):
+        for event in parser.feed(chunk):
+            if event.data == "[DONE]":
+                return
+            content = json.loads(event.data)["choices"][0].get("delta", {}).get("content")
+            if content:
+                yield content
+
+
+def measure(label: str, run, tokens: int, repeat: int) -> dict:
+    """Time `run` `repeat` times and keep the fastest, which is the least disturbed by noise."""
+    wall = cpu = float("inf")
+    for _ in range(repeat):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        run()
+        wall = min(wall, time.perf_counter() - wall_start)
+        cpu = min(cpu, time.process_time() - cpu_start)
+    result = {
+        "benchmark": label,
+        "events_per_sec": tokens / wall if wall else float("inf"),
+        "cpu_us_per_token": cpu / tokens * 1e6,
+        "wall_seconds": wall,
+    }
+    print(f"{label:<28} {result['events_per_sec']:>12,.0f} events/s {result['cpu_us_per_token']:>8.2f} us CPU/token")
+    return result
+
+
+def per_token_render(tokens: List[str], out) -> None:
+    for token in tokens:
+        out.write(token)
+        out.flush()
+    out.write("\n")
+    out.flush()
+
+
+def main(argv=None) -> List[dict]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--chunk-size", type=int, default=1024, help="bytes per network read")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    body = record_stream(args.events)
+    tokens = list(parser_tokens(body, args.chunk_size))
+    assert tokens == list(legacy_tokens(body, args.chunk_size))
+
+    results = [
+        measure("parse: legacy iter_lines", lambda: list(legacy_tokens(body, args.chunk_size)), len(tokens), args.repeat),
+        measure("parse: SSEParser", lambda: list(parser_tokens(body, args.chunk_size)), len(tokens), args.repeat),
+    ]
+    with open(os.devnull, "w") as devnull:
+        results.append(measure("render: write per token", lambda: per_token_render(tokens, devnull), len(tokens), args.repeat))
+        results.append(measure("render: render_stream", lambda: render_stream(iter(tokens), out=devnull), len(tokens), args.repeat))
+    return results
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,90 @@
+"""Cold-start benchmark for the aidebug shell.
+
+Starts a fresh interpreter several times and measures how long it takes to
+import aidebug.aidebug and construct the shell that aidebug.main runs. It
+also prints the slowest imports from a `python -X importtime` run, so a
+dependency that sneaks back onto the startup path is easy to spot.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 10] [--top 15] [--json results.json]
+"""
+import re
+import sys
+import json
+import time
+import argparse
+import subprocess
+from typing import Dict, List
+
+STARTUP_SNIPPET = "from aidebug.aidebug import CodeDebuggerShell; CodeDebuggerShell()"
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def cold_start_seconds(runs: int) -> List[float]:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", STARTUP_SNIPPET], check=True, stdout=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def import_times() -> List[Dict]:
+    """Parse `-X importtime` output into per-module self and cumulative microseconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP_SNIPPET],
+        check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            modules.append({
+                "module": match.group(4),
+                "self_us": int(match.group(1)),
+                "cumulative_us": int(match.group(2)),
+                "depth": len(match.group(3)) // 2,
+            })
+    return modules
+
+
+def main(argv=None) -> Dict:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15, help="number of slowest imports to list")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    interpreter = time.perf_counter() - start
+
+    timings = sorted(cold_start_seconds(args.runs))
+    modules = import_times()
+    total = next((m["cumulative_us"] for m in modules if m["module"] == "aidebug.aidebug"), None)
+
+    print(f"Interpreter only:      {interpreter * 1000:8.1f} ms")
+    print(f"Cold start (median):   {timings[len(timings) // 2] * 1000:8.1f} ms over {args.runs} runs")
+    print(f"Cold start (best):     {timings[0] * 1000:8.1f} ms")
+    if total is not None:
+        print(f"import aidebug.aidebug: {total / 1000:7.1f} ms cumulative")
+    print("\nSlowest imports (cumulative):")
+    for module in sorted(modules, key=lambda m: m["cumulative_us"], reverse=True)[:args.top]:
+        print(f"  {module['cumulative_us'] / 1000:8.1f} ms  {module['module']}")
+
+    results = {
+        "python": sys.version.split()[0],
+        "interpreter_ms": interpreter * 1000,
+        "cold_start_median_ms": timings[len(timings) // 2] * 1000,
+        "cold_start_best_ms": timings[0] * 1000,
+        "import_aidebug_ms": total / 1000 if total is not None else None,
+        "loaded_modules": [m["module"] for m in modules],
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,191 @@
+"""End-to-end benchmark suite over synthetic projects of increasing size.
+
+For each project size it generates that many Python files in a temporary
+directory and measures:
+
+- scrape: scrape_contents throughput over every file,
+- prompt: building the debug prompt (debug_messages), for a traceback through
+  one file and for an error without frames, which packs the whole selection,
+- stream: OpenAIClient._request parsing a streamed reply from the mock server,
+- debug: the whole `debug` command against the mock server, output discarded.
+
+The completions come from benchmarks.mock_server, started in-process. Results
+are written as JSON together with the current commit, so runs on different
+commits can be compared.
+
+Usage:
+    python -m benchmarks.bench_suite [--sizes 10,100,1000,10000] [--repeat 3]
+        [--tokens 500] [--token-rate 0] [--latency 0] [--output bench_results.json]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import platform
+import subprocess
+import contextlib
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.mock_server import MockServer
+
+DEFAULT_SIZES = "10,100,1000,10000"
+
+MODULE_TEMPLATE = '''"""Synthetic module {index} for the aidebug benchmark suite."""
+import os
+
+
+class Record{index}:
+    def __init__(self, name, values):
+        self.name = name
+        self.values = list(values)
+
+    def total(self):
+        return sum(value * {index} for value in self.values)
+
+    def describe(self):
+        return f"{{self.name}}: {{self.total()}} over {{len(self.values)}} values"
+
+
+def load_{index}(path):
+    with open(path) as f:
+        return Record{index}(os.path.basename(path), (int(line) for line in f if line.strip()))
+'''
+
+
+def make_project(directory: str, size: int) -> List[str]:
+    """Write `size` modules into `directory`, spread over subpackages of 100."""
+    paths = []
+    for index in range(size):
+        package = os.path.join(directory, f"pkg{index // 100}")
+        os.makedirs(package, exist_ok=True)
+        path = os.path.join(package, f"module_{index}.py")
+        with open(path, "w") as f:
+            f.write(MODULE_TEMPLATE.format(index=index))
+        paths.append(path)
+    return paths
+
+
+def sample_error(paths: List[str]) -> str:
+    """A traceback through the middle of the project, as `project run` would capture it."""
+    target = paths[len(paths) // 2]
+    index = len(paths) // 2
+    return (
+        "Traceback (most recent call last):\n"
+        f'  File "{target}", line 20, in load_{index}\n'
+        f"    return Record{index}(os.path.basename(path), (int(line) for line in f if line.strip()))\n"
+        f'  File "{target}", line 11, in total\n'
+        f"    return sum(value * {index} for value in self.values)\n"
+        "ValueError: invalid literal for int() with base 10: 'x'\n"
+    )
+
+
+def best_of(run: Callable[[], object], repeat: int) -> float:
+    """Fastest of `repeat` timed calls, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def commit() -> Optional[str]:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def bench_size(size: int, server: MockServer, repeat: int) -> Dict:
+    from aidebug.aidebug import CodeDebuggerShell
+    from aidebug.core.utils.files_data import scrape_contents
+    from aidebug.core.utils.context_packer import estimate_tokens
+
+    project = tempfile.mkdtemp(prefix="aidebug-bench-")
+    cwd = os.getcwd()
+    try:
+        paths = make_project(project, size)
+        total_bytes = sum(os.path.getsize(path) for path in paths)
+        error = sample_error(paths)
+        # The shell keeps its index and cache under the working directory
+        os.chdir(project)
+
+        scrape = best_of(lambda: scrape_contents(paths), repeat)
+
+        shell = CodeDebuggerShell()
+        shell.use_cache = False
+        shell.files = paths
+        shell.refresh_codebase()
+        quiet = lambda *args: None
+        prompt = best_of(lambda: shell.debug_messages(error, report=quiet), repeat)
+        packed = best_of(lambda: shell.debug_messages("Results are off by one for load_1", report=quiet), repeat)
+        messages = shell.debug_messages(error, report=quiet)
+        prompt_tokens = sum(estimate_tokens(message["content"]) for message in messages)
+
+        client = shell.client
+        stream = best_of(lambda: list(client._request(messages, shell.openai_model, 0.5, 1.0)), repeat)
+
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            debug = best_of(lambda: shell.do_debug(error), repeat)
+        client.close()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(project, ignore_errors=True)
+
+    return {
+        "files": size,
+        "bytes": total_bytes,
+        "scrape_seconds": scrape,
+        "scrape_files_per_second": size / scrape,
+        "scrape_mb_per_second": total_bytes / scrape / 1e6,
+        "prompt_seconds": prompt,
+        "prompt_tokens": prompt_tokens,
+        "prompt_packed_seconds": packed,
+        "stream_seconds": stream,
+        "stream_tokens_per_second": server.httpd.tokens / stream,
+        "debug_seconds": debug,
+    }
+
+
+def main(argv=None) -> Dict:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma separated project sizes in files")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tokens", type=int, default=500, help="tokens in every mock reply")
+    parser.add_argument("--token-rate", type=float, default=0, help="mock tokens per second (0 for unlimited)")
+    parser.add_argument("--latency", type=float, default=0, help="mock seconds before each reply starts")
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+
+    results = []
+    with MockServer(tokens=args.tokens, token_rate=args.token_rate, latency=args.latency) as server:
+        os.environ["OPENAI_API_HOST"] = server.url
+        os.environ.setdefault("OPENAI_API_KEY", "mock")
+        print(f"{'files':>7} {'scrape files/s':>15} {'prompt ms':>10} {'tokens':>7} {'packed ms':>10} {'stream tok/s':>13} {'debug ms':>9}")
+        for size in sizes:
+            result = bench_size(size, server, args.repeat)
+            results.append(result)
+            print(f"{size:>7} {result['scrape_files_per_second']:>15,.0f} {result['prompt_seconds'] * 1000:>10.1f} "
+                  f"{result['prompt_tokens']:>7} {result['prompt_packed_seconds'] * 1000:>10.1f} {result['stream_tokens_per_second']:>13,.0f} {result['debug_seconds'] * 1000:>9.1f}")
+
+    report = {
+        "commit": commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "mock": {"tokens": args.tokens, "token_rate": args.token_rate, "latency": args.latency},
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
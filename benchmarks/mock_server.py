@@ -0,0 +1,153 @@
+"""Local mock of the OpenAI /v1/chat/completions endpoint.
+
+Answers streaming (SSE, chunked) and non-streaming requests with a fixed
+reply, after a configurable latency and at a configurable token rate, so the
+client and the whole debug path can be measured without network noise.
+
+Usage:
+    python -m benchmarks.mock_server [--port 8765] [--tokens 200] [--token-rate 0] [--latency 0]
+    OPENAI_API_HOST=http://127.0.0.1:8765 OPENAI_API_KEY=mock aidebug
+"""
+import sys
+import json
+import socket
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+WORDS = ["The", " error", " is", " raised", " because", " `files", "_and", "_content`", " is", " empty", ".", "\n\n", "```python", "\n", "return", " self", ".files", "\n", "```", "\n"]
+
+
+def reply_tokens(count: int):
+    return [WORDS[index % len(WORDS)] for index in range(count)]
+
+
+class MockCompletionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self) -> None:
+        super().setup()
+        # Stream events are small writes; without this Nagle's algorithm holds them for the client's delayed ACK
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.server.connections += 1
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        server = self.server
+        server.requests += 1
+        server.models.append(request.get("model"))
+        server.request_bytes += length
+
+        time.sleep(server.latency)
+        tokens = reply_tokens(server.tokens)
+        if request.get("stream"):
+            self.stream(tokens, request.get("model", "mock"))
+        else:
+            body = json.dumps({
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "model": request.get("model", "mock"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)}, "finish_reason": "stop"}],
+            }).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def stream(self, tokens, model: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        interval = 1 / self.server.token_rate if self.server.token_rate else 0
+        for token in tokens:
+            payload = {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion.chunk",
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+            }
+            self.write_chunk(b"data: " + json.dumps(payload).encode("utf-8") + b"\n\n")
+            if interval:
+                time.sleep(interval)
+        self.write_chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+
+
+class MockServer:
+    """Run the mock endpoint on a background thread.
+
+    `tokens` is the length of every reply, `token_rate` the tokens streamed per
+    second (0 for as fast as possible) and `latency` the seconds before the
+    response starts. `httpd.connections` counts the TCP connections accepted
+    and `httpd.models` lists the model each request asked for.
+    """
+
+    def __init__(self, port: int = 0, tokens: int = 200, token_rate: float = 0, latency: float = 0) -> None:
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), MockCompletionHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.tokens = tokens
+        self.httpd.token_rate = token_rate
+        self.httpd.latency = latency
+        self.httpd.connections = 0
+        self.httpd.requests = 0
+        self.httpd.models = []
+        self.httpd.request_bytes = 0
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "MockServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--tokens", type=int, default=200, help="tokens in every reply")
+    parser.add_argument("--token-rate", type=float, default=0, help="tokens streamed per second (0 for unlimited)")
+    parser.add_argument("--latency", type=float, default=0, help="seconds before the response starts")
+    args = parser.parse_args(argv)
+
+    server = MockServer(args.port, args.tokens, args.token_rate, args.latency)
+    print(f"Mock completions server on {server.url}; use OPENAI_API_HOST={server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
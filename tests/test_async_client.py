@@ -0,0 +1,42 @@
+import time
+import asyncio
+
+import pytest
+import requests
+
+from benchmarks.mock_server import MockServer, reply_tokens
+from aidebug.core.clientv2.async_client import AsyncOpenAIClient, fan_out
+
+
+def prompts(count):
+    return [[{"role": "user", "content": f"Debug command {index}"}] for index in range(count)]
+
+
+def test_fan_out_streams_prompts_concurrently_within_the_limit():
+    latency = 0.3
+    chunks = {}
+
+    def on_chunk(index, chunk):
+        chunks.setdefault(index, []).append(chunk)
+
+    with MockServer(tokens=10, latency=latency) as server:
+        client = AsyncOpenAIClient(server.url, "test-key")
+        started = time.monotonic()
+        replies = asyncio.run(fan_out(client, prompts(6), concurrency=3, on_chunk=on_chunk, model="gpt-4o"))
+        elapsed = time.monotonic() - started
+        client.client.close()
+
+    expected = "".join(reply_tokens(10))
+    assert replies == [expected] * 6
+    assert sorted(chunks) == list(range(6))
+    assert all(len(parts) == 10 for parts in chunks.values())
+    # Two waves of three: well under six sequential requests, but not all six at once
+    assert 2 * latency <= elapsed < 6 * latency
+
+
+def test_fan_out_raises_when_a_prompt_fails():
+    with MockServer(tokens=10) as server:
+        client = AsyncOpenAIClient(server.url + "/missing", "test-key")
+        with pytest.raises(requests.HTTPError):
+            asyncio.run(fan_out(client, prompts(3), concurrency=2, model="gpt-4o"))
+        client.client.close()
@@ -0,0 +1,65 @@
+import json
+import time
+
+import pytest
+
+from benchmarks.mock_server import MockServer, reply_tokens
+from aidebug.aidebug import CodeDebuggerShell
+from aidebug.core.commands.batch import load_jobs, run_batch
+
+
+def write_jobs(path, jobs):
+    path.write_text("".join(json.dumps(job) + "\n" for job in jobs))
+    return str(path)
+
+
+def test_jobs_get_default_ids(tmp_path):
+    jobs = load_jobs(write_jobs(tmp_path / "jobs.jsonl", [{"type": "debug"}, {"type": "readme", "id": "docs"}]))
+    assert [job["id"] for job in jobs] == ["job-1", "docs"]
+
+
+@pytest.mark.parametrize("ids", [("a", "a"), ("a/b", "a_b"), ("Docs", "docs"), ("job-2", None)])
+def test_jobs_whose_output_files_clash_are_rejected(tmp_path, ids):
+    jobs = [{"type": "debug", "id": job_id} if job_id else {"type": "debug"} for job_id in ids]
+    with pytest.raises(ValueError, match="clashes with the job on line 1"):
+        load_jobs(write_jobs(tmp_path / "jobs.jsonl", jobs))
+
+
+def test_jobs_run_concurrently_on_one_session_and_fail_alone(tmp_path, monkeypatch, capsys):
+    latency = 0.3
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "app.py").write_text("print(total)\n")
+    jobs = [{"type": "debug", "id": f"crash-{index}", "error": "NameError: total"} for index in range(5)]
+    jobs.insert(2, {"type": "readme", "id": "docs"})
+    write_jobs(tmp_path / "jobs.jsonl", jobs)
+
+    def broken(self, request, report=print):
+        raise RuntimeError("no README today")
+
+    monkeypatch.setattr(CodeDebuggerShell, "readme_messages", broken)
+    with MockServer(tokens=10, latency=latency) as server:
+        monkeypatch.setenv("OPENAI_API_HOST", server.url)
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        started = time.monotonic()
+        status = run_batch(["jobs.jsonl", "--files", "app.py", "--concurrency", "3", "--output-dir", "out", "--no-cache"])
+        elapsed = time.monotonic() - started
+        connections = server.httpd.connections
+
+    assert status == 1
+    summary = json.loads((tmp_path / "out" / "summary.json").read_text())
+    assert [(job["job_id"], job["status"]) for job in summary["jobs"]] == [
+        ("crash-0", "ok"), ("crash-1", "ok"), ("docs", "failed"), ("crash-2", "ok"), ("crash-3", "ok"), ("crash-4", "ok")]
+    assert summary["jobs"][2]["error"] == "RuntimeError: no README today"
+    answer = "".join(reply_tokens(10))
+    assert all((tmp_path / "out" / f"crash-{index}.md").read_text().endswith(answer) for index in range(5))
+    # Five requests three at a time: two waves, over at most three pooled connections
+    assert 2 * latency <= elapsed < 5 * latency
+    assert connections <= 3
+    assert "5/6 jobs succeeded" in capsys.readouterr().out
+
+
+def test_an_unreadable_jobs_file_is_a_usage_error(tmp_path, capsys):
+    with pytest.raises(SystemExit) as exit:
+        run_batch([str(tmp_path / "missing.jsonl")])
+    assert exit.value.code == 2
+    assert f"error: cannot read {tmp_path / 'missing.jsonl'}: No such file or directory" in capsys.readouterr().err
@@ -0,0 +1,102 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from aidebug.core.utils import git_context
+from aidebug.core.utils.file_index import content_hash
+from aidebug.core.utils.git_context import SNAPSHOT_INDEX, head_changes, save_snapshot, snapshot_changes, split_diff
+
+
+class CountingContents(dict):
+    """A contents mapping that records which files were read."""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.reads = []
+
+    def __getitem__(self, path):
+        self.reads.append(path)
+        return super().__getitem__(path)
+
+
+def hashes_of(contents):
+    return {path: content_hash(content) for path, content in dict.items(contents)}
+
+
+def blobs(snapshot_dir):
+    return sorted(name for name in os.listdir(snapshot_dir) if name != SNAPSHOT_INDEX)
+
+
+def test_no_snapshot_yet(tmp_path):
+    contents = CountingContents({'a.py': 'x = 1\n'})
+    assert snapshot_changes(contents, hashes_of(contents), snapshot_dir=str(tmp_path / 'missing')) is None
+
+
+def test_only_changed_files_are_read_diffed_and_rewritten(tmp_path):
+    snapshot_dir = str(tmp_path / 'last_run')
+    before = CountingContents({'a.py': 'x = 1\ny = 2\n', 'b.py': 'z = 3\n', 'copy.py': 'z = 3\n'})
+    save_snapshot(before, hashes_of(before), snapshot_dir)
+    # Identical contents are stored once
+    assert len(blobs(snapshot_dir)) == 2
+
+    after = CountingContents({'a.py': 'x = 1\ny = 20\n', 'b.py': 'z = 3\n', 'copy.py': 'z = 3\n', 'new.py': 'w = 4\n'})
+    changes = snapshot_changes(after, hashes_of(after), snapshot_dir=snapshot_dir)
+    assert after.reads == ['a.py']
+    assert set(changes) == {'a.py', 'new.py'}
+    assert '-y = 2' in changes['a.py'] and '+y = 20' in changes['a.py']
+    assert changes['new.py'].startswith('(new file')
+
+    after.reads.clear()
+    save_snapshot(after, hashes_of(after), snapshot_dir)
+    assert sorted(after.reads) == ['a.py', 'new.py']
+    # The old version of a.py is no longer referenced and is dropped
+    assert blobs(snapshot_dir) == sorted({content_hash(content) for content in dict.values(after)})
+    assert snapshot_changes(after, hashes_of(after), snapshot_dir=snapshot_dir) == {}
+
+
+def git(*args, cwd):
+    subprocess.run(['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com'] + list(args),
+                   cwd=cwd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+@pytest.mark.skipif(shutil.which('git') is None, reason="needs the git binary")
+def test_head_changes_diffs_only_the_selected_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name in ('a.py', 'b.py'):
+        (tmp_path / name).write_text('x = 1\n')
+    git('init', '-q', cwd=tmp_path)
+    git('add', '.', cwd=tmp_path)
+    git('commit', '-q', '-m', 'start', cwd=tmp_path)
+    (tmp_path / 'a.py').write_text('x = 2\n')
+    (tmp_path / 'b.py').write_text('x = 3\n')
+    (tmp_path / 'new.py').write_text('y = 1\n')
+    (tmp_path / 'other.py').write_text('z = 1\n')
+
+    calls = []
+    run = git_context._git
+    monkeypatch.setattr(git_context, '_git', lambda args, cwd=None: calls.append(args) or run(args, cwd))
+    changes = head_changes(['a.py', 'new.py', str(tmp_path.parent / 'outside.py')])
+
+    assert set(changes) == {'a.py', 'new.py'}
+    assert '+x = 2' in changes['a.py']
+    assert changes['new.py'].startswith('(new file')
+    # Both git calls were limited to the selection inside the repository
+    assert [args[args.index('--') + 1:] for args in calls if '--' in args] == [['a.py', 'new.py'], ['a.py', 'new.py']]
+
+
+def test_content_lines_that_look_like_file_headers_stay_in_the_hunk():
+    diff = "\n".join([
+        "diff --git a/notes.txt b/notes.txt",
+        "index 1111111..2222222 100644",
+        "--- a/notes.txt",
+        "+++ b/notes.txt",
+        "@@ -1,2 +1,2 @@",
+        "--- old heading",
+        "+++ new heading",
+        " kept",
+    ])
+    sections = split_diff(diff, '/repo')
+    assert list(sections) == [os.path.normpath('/repo/notes.txt')]
+    assert sections[os.path.normpath('/repo/notes.txt')].splitlines()[1:] == ["--- old heading", "+++ new heading", " kept"]
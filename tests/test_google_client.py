@@ -0,0 +1,124 @@
+import sys
+import types
+
+import pytest
+
+from aidebug.core.commands.chat import ChatSession
+from aidebug.core.clientv2.google_client import GoogleClient
+
+HEADER = [
+    {"role": "system", "content": "You are an AI coding assistant."},
+    {"role": "user", "content": "Project Language: Python"},
+]
+FILES = [{"role": "user", "content": "File: app.py Content: print(total)"}]
+
+
+class FakeSDK:
+    """Records what a google.generativeai stand-in was asked to do."""
+
+    def __init__(self):
+        self.started = []
+        self.sent = []
+        self.generated = []
+
+    def module(self):
+        sdk = self
+        genai = types.ModuleType("google.generativeai")
+        genai.configure = lambda api_key=None: None
+
+        class Chat:
+            def __init__(self, history):
+                self.history = list(history)
+
+            def send_message(self, content, **options):
+                sdk.sent.append(content)
+                reply = f"answer {len(sdk.sent)}"
+                self.history += [content, {"role": "model", "parts": [reply]}]
+                return [types.SimpleNamespace(text=part) for part in (reply[:6], reply[6:])]
+
+        class GenerativeModel:
+            def __init__(self, name, system_instruction=None):
+                self.name = name
+                self.system_instruction = system_instruction
+
+            def start_chat(self, history):
+                sdk.started.append(history)
+                return Chat(history)
+
+            def generate_content(self, contents, **options):
+                sdk.generated.append(contents)
+                return [types.SimpleNamespace(text="once")]
+
+        genai.GenerativeModel = GenerativeModel
+        return genai
+
+
+@pytest.fixture
+def sdk(monkeypatch):
+    fake = FakeSDK()
+    google = types.ModuleType("google")
+    google.generativeai = fake.module()
+    monkeypatch.setitem(sys.modules, "google", google)
+    monkeypatch.setitem(sys.modules, "google.generativeai", google.generativeai)
+    return fake
+
+
+def chat(client):
+    return ChatSession(HEADER, FILES, lambda messages: client.get_completion(messages, is_chat=True))
+
+
+def ask(session, client, question):
+    answer = "".join(client.get_completion(session.prepare(question), is_chat=True))
+    session.record(question, answer)
+    return answer
+
+
+def test_chat_turns_continue_one_sdk_chat(sdk):
+    client = GoogleClient("key")
+    session = chat(client)
+    answers = [ask(session, client, question) for question in ("Why?", "And then?", "Fix it")]
+
+    assert answers == ["answer 1", "answer 2", "answer 3"]
+    assert len(sdk.started) == 1
+    # The files went out once, with the first question
+    assert sdk.started[0] == []
+    assert sdk.sent[0]["parts"] == ["Project Language: Python", "File: app.py Content: print(total)", "Why?"]
+    assert sdk.sent[1:] == [{"role": "user", "parts": ["And then?"]}, {"role": "user", "parts": ["Fix it"]}]
+
+
+def test_a_new_session_starts_a_new_chat_with_its_files(sdk):
+    client = GoogleClient("key")
+    ask(chat(client), client, "Why?")
+    second = chat(client)
+    ask(second, client, "Why?")
+    ask(second, client, "And then?")
+
+    assert len(sdk.started) == 2
+    assert "File: app.py Content: print(total)" in sdk.sent[1]["parts"]
+    assert sdk.sent[2] == {"role": "user", "parts": ["And then?"]}
+
+
+def test_edited_history_restarts_the_chat(sdk):
+    client = GoogleClient("key")
+    session = chat(client)
+    ask(session, client, "Why?")
+    ask(session, client, "And then?")
+    # A compacted history no longer matches the turns the chat holds
+    session.turns = session.turns[-2:]
+    session.summary = "We discussed app.py."
+    ask(session, client, "Fix it")
+
+    assert len(sdk.started) == 2
+    history = sdk.started[1]
+    assert history[-1] == {"role": "model", "parts": ["answer 2"]}
+
+
+def test_single_requests_do_not_touch_the_chat(sdk):
+    client = GoogleClient("key")
+    session = chat(client)
+    ask(session, client, "Why?")
+    assert "".join(client.get_completion(HEADER + [{"role": "user", "content": "Readme"}])) == "once"
+    ask(session, client, "And then?")
+
+    assert len(sdk.started) == 1
+    assert sdk.generated == [[{"role": "user", "parts": ["Project Language: Python", "Readme"]}]]
@@ -0,0 +1,55 @@
+import time
+
+import pytest
+
+from benchmarks.mock_server import MockServer, reply_tokens
+from aidebug.core.clientv2.hedged_client import HedgedClient, parse_backend
+
+MESSAGES = [{"role": "user", "content": "Why does this fail?"}]
+
+
+def measured(spec, seconds):
+    """A backend with enough history that it is ranked, and hedged, by `seconds`."""
+    backend = parse_backend(spec)
+    for _ in range(5):
+        backend.record(seconds)
+    return backend
+
+
+def test_a_stalled_backend_is_hedged_and_its_request_aborted():
+    with MockServer(tokens=10, latency=5) as slow, MockServer(tokens=10) as fast:
+        client = HedgedClient([measured(f"openai@{slow.url}", 0.1), measured(f"openai@{fast.url}", 0.2)])
+        attempts = []
+        start = client._start
+        client._start = lambda *args: attempts.append(start(*args)) or attempts[-1]
+        try:
+            started = time.monotonic()
+            reply = "".join(client.get_completion(MESSAGES, model="gpt-4o"))
+            assert reply == "".join(reply_tokens(10))
+            assert time.monotonic() - started < 1
+            assert [attempt.backend.name for attempt in attempts] == [f"openai@{slow.url}", f"openai@{fast.url}"]
+
+            # The loser was blocked waiting for the slow server's headers; cancelling it closed the socket
+            attempts[0].thread.join(1)
+            assert not attempts[0].thread.is_alive()
+            assert slow.httpd.requests == 1 and fast.httpd.requests == 1
+        finally:
+            client.close()
+
+
+def test_backends_without_a_model_use_the_one_asked_for():
+    with MockServer(tokens=3) as server:
+        default = HedgedClient([parse_backend(f"openai@{server.url}")])
+        pinned = HedgedClient([parse_backend(f"openai:llama3@{server.url}")])
+        try:
+            "".join(default.get_completion(MESSAGES, model="gpt-4o", temperature=0.2))
+            "".join(pinned.get_completion(MESSAGES, model="gpt-4o"))
+        finally:
+            default.close()
+            pinned.close()
+        assert server.httpd.models == ["gpt-4o", "llama3"]
+
+
+def test_a_host_for_a_backend_that_is_not_openai_compatible_is_rejected():
+    with pytest.raises(ValueError, match="'google@http://localhost:8000': a host can only be given for OpenAI-compatible backends"):
+        parse_backend("google@http://localhost:8000")
@@ -0,0 +1,25 @@
+import pytest
+
+from aidebug.core.utils.metrics import Metrics, percentile
+
+
+@pytest.mark.parametrize("values, quantile, expected", [
+    ([1.0, 2.0], 0.5, 1.0),
+    ([1.0, 2.0, 3.0, 4.0], 0.5, 2.0),
+    ([1.0, 2.0, 3.0], 0.5, 2.0),
+    ([float(value) for value in range(1, 21)], 0.95, 19.0),
+    ([float(value) for value in range(1, 101)], 0.95, 95.0),
+    ([5.0], 0.95, 5.0),
+    ([3.0, 1.0, 2.0], 0.0, 1.0),
+    ([3.0, 1.0, 2.0], 1.0, 3.0),
+])
+def test_percentile_is_nearest_rank(values, quantile, expected):
+    assert percentile(values, quantile) == expected
+
+
+def test_summary_of_two_samples_reports_the_lower_as_median():
+    metrics = Metrics()
+    metrics.observe("request_seconds", 1.0)
+    metrics.observe("request_seconds", 3.0)
+    summary = metrics.summary()["request_seconds"]
+    assert (summary["p50"], summary["p95"]) == (1.0, 3.0)
@@ -0,0 +1,63 @@
+from aidebug.aidebug import CodeDebuggerShell
+from aidebug.core.utils.context_packer import pack_context
+from aidebug.core.utils.minifier import MARKER_NOTE, Minifier, minify
+
+SOURCE = '''"""Totals.
+
+Adds things up.
+"""
+# Running total
+TOTAL = 0
+
+
+def add(value):
+    # Keep the running total
+    return TOTAL + value
+'''
+
+
+def test_minified_chat_follow_ups_list_only_the_shared_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "app.py").write_text(SOURCE)
+    shell = CodeDebuggerShell()
+    shell.project_minify = True
+    shell.do_project("select app.py")
+    sent = []
+
+    def complete(messages, chat=False):
+        sent.append(messages)
+        yield "ok"
+
+    monkeypatch.setattr(shell, "completion_chunks", complete)
+    shell.do_chat("Why is add wrong?")
+    shell.do_chat("And then?")
+
+    first, follow_up = sent
+    assert first[0]["role"] == "system" and first[0]["content"].endswith(MARKER_NOTE)
+    assert [message["content"].split(" Content:")[0] for message in first[2:-1]] == ["File: app.py"]
+    assert "# Running total" not in first[2]["content"]
+    assert {"role": "user", "content": "The project files shared earlier in this conversation were: app.py."} in follow_up
+    assert not any(MARKER_NOTE in message["content"] for message in follow_up[1:])
+
+
+def test_only_packed_files_are_minified():
+    files = {f"module_{index}.py": SOURCE * 40 for index in range(5)}
+    minified = []
+
+    def record(path, content):
+        minified.append(path)
+        return minify(path, content)
+
+    packed = pack_context(files, "add", 250, minify=record)
+    assert packed.dropped
+    assert sorted(minified) == sorted(file.path for file in packed.included)
+
+
+def test_the_cache_is_bounded_by_bytes():
+    minifier = Minifier(max_bytes=4096)
+    for index in range(50):
+        minifier.minify(f"module_{index}.py", SOURCE.replace("TOTAL = 0", f"TOTAL = {index}") * 5)
+    assert 0 < minifier.resident_bytes <= 4096
+    # A repeat of a cached file is served from the cache
+    content = SOURCE.replace("TOTAL = 0", "TOTAL = 49") * 5
+    assert minifier.minify("other.py", content) is minifier.minify("module_49.py", content)
@@ -0,0 +1,183 @@
+import sys
+import time
+import queue
+import types
+import contextlib
+
+import pytest
+
+from aidebug.core.clientv2.open_source_client import LoadedModel, ModelCache, OpenSourceClient
+
+MESSAGES = [{"role": "system", "content": "Be brief."}, {"role": "user", "content": "Why does it fail?"}]
+WORDS = ["The", " list", " is", " empty", "."]
+
+
+class FakeIds:
+    """Just enough of a 2-D tensor of token ids for the client."""
+
+    device = "cpu"
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    @property
+    def shape(self):
+        return (len(self.rows), len(self.rows[0]))
+
+    def __getitem__(self, index):
+        _, columns = index
+        return FakeIds([row[columns] for row in self.rows])
+
+
+class FakeStreamer:
+    """Queue-backed stand-in for transformers.TextIteratorStreamer."""
+
+    def __init__(self, tokenizer, skip_prompt=False, **kwargs):
+        self.queue = queue.Queue()
+
+    def put(self, text):
+        self.queue.put(text)
+
+    def end(self):
+        self.queue.put(None)
+
+    def __iter__(self):
+        while True:
+            text = self.queue.get()
+            if text is None:
+                return
+            yield text
+
+
+def fake_modules():
+    torch = types.ModuleType("torch")
+    torch.bool = bool
+    torch.set_num_threads = lambda count: None
+    torch.full = lambda shape, value, dtype=None, device=None: [value] * shape[0]
+    torch.ones_like = lambda ids: FakeIds([[1] * len(row) for row in ids.rows])
+    torch.inference_mode = contextlib.nullcontext
+
+    transformers = types.ModuleType("transformers")
+    transformers.StoppingCriteria = object
+    transformers.StoppingCriteriaList = list
+    transformers.TextIteratorStreamer = FakeStreamer
+    return {"torch": torch, "transformers": transformers}
+
+
+class FakeTokenizer:
+    pad_token_id = None
+    eos_token_id = 0
+
+    def __init__(self, chat_template=None):
+        self.chat_template = chat_template
+        self.calls = []
+
+    def apply_chat_template(self, messages, **kwargs):
+        self.calls.append(("chat", messages, kwargs))
+        return {"input_ids": FakeIds([list(range(len(messages) * 10))])}
+
+    def __call__(self, prompt, return_tensors=None):
+        self.calls.append(("plain", prompt, return_tensors))
+        return types.SimpleNamespace(input_ids=FakeIds([list(range(len(prompt.split())))]))
+
+
+class FakeModel:
+    """Streams WORDS through the streamer, checking the stopping criteria before each token."""
+
+    def __init__(self, context_length=1024, delay=0.0, error=None):
+        self.config = types.SimpleNamespace(max_position_embeddings=context_length)
+        self.delay = delay
+        self.error = error
+        self.kwargs = None
+        self.generated = 0
+
+    def generate(self, **kwargs):
+        self.kwargs = kwargs
+        if self.error is not None:
+            raise self.error
+        streamer = kwargs["streamer"]
+        for step in range(kwargs["max_new_tokens"]):
+            if any(all(criterion(kwargs["input_ids"], None)) for criterion in kwargs["stopping_criteria"]):
+                break
+            streamer.put(WORDS[step % len(WORDS)])
+            self.generated += 1
+            time.sleep(self.delay)
+        streamer.end()
+
+
+def make_client(monkeypatch, model, tokenizer=None, **kwargs):
+    for name, module in fake_modules().items():
+        monkeypatch.setitem(sys.modules, name, module)
+    cache = ModelCache()
+    cache._models[("tiny", False)] = LoadedModel(tokenizer or FakeTokenizer(), model, 1)
+    return OpenSourceClient(default_model="tiny", cache=cache, **kwargs)
+
+
+def test_reply_is_streamed_token_by_token(monkeypatch):
+    model = FakeModel()
+    client = make_client(monkeypatch, model, max_new_tokens=5)
+    assert list(client.get_completion(MESSAGES, temperature=0)) == WORDS
+    assert model.kwargs["do_sample"] is False
+    assert "temperature" not in model.kwargs
+    assert model.kwargs["pad_token_id"] == 0
+
+
+def test_sampling_settings_are_passed_through(monkeypatch):
+    model = FakeModel()
+    client = make_client(monkeypatch, model, max_new_tokens=2)
+    assert "".join(client.get_completion(MESSAGES, temperature=0.7, top_probability=0.9)) == "The list"
+    assert (model.kwargs["do_sample"], model.kwargs["temperature"], model.kwargs["top_p"]) == (True, 0.7, 0.9)
+
+
+def test_chat_templates_are_applied_and_the_prompt_fits_beside_the_reply(monkeypatch):
+    tokenizer = FakeTokenizer(chat_template="{{ messages }}")
+    model = FakeModel(context_length=12)
+    client = make_client(monkeypatch, model, tokenizer, max_new_tokens=5)
+    list(client.get_completion(MESSAGES))
+    kind, messages, kwargs = tokenizer.calls[0]
+    assert (kind, messages) == ("chat", MESSAGES)
+    assert kwargs == {"add_generation_prompt": True, "return_tensors": "pt", "return_dict": True}
+    # 20 prompt tokens cut to the last 12 - 5
+    assert model.kwargs["input_ids"].rows == [list(range(13, 20))]
+
+
+def test_plain_tokenizers_get_the_joined_messages(monkeypatch):
+    tokenizer = FakeTokenizer()
+    client = make_client(monkeypatch, FakeModel(), tokenizer, max_new_tokens=1)
+    list(client.get_completion(MESSAGES))
+    assert tokenizer.calls == [("plain", "Be brief.\n\nWhy does it fail?", "pt")]
+
+
+def test_abandoning_the_stream_stops_generation(monkeypatch):
+    model = FakeModel(delay=0.01)
+    client = make_client(monkeypatch, model, max_new_tokens=1000)
+    stream = client.get_completion(MESSAGES)
+    assert [next(stream), next(stream)] == WORDS[:2]
+    stream.close()
+    generated = model.generated
+    assert generated < 1000
+    time.sleep(0.05)
+    # close() joined the generation thread, so nothing more is produced
+    assert model.generated == generated
+
+
+def test_generation_errors_reach_the_caller(monkeypatch):
+    client = make_client(monkeypatch, FakeModel(error=RuntimeError("out of memory")))
+    with pytest.raises(RuntimeError, match="out of memory"):
+        list(client.get_completion(MESSAGES))
+
+
+def test_tiny_model_streams_offline(monkeypatch):
+    """Runs a real tiny model when transformers and a cached copy of it are available."""
+    monkeypatch.setenv("HF_HUB_OFFLINE", "1")
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    name = "hf-internal-testing/tiny-random-gpt2"
+    cache = ModelCache()
+    try:
+        cache.get(name)
+    except OSError:
+        pytest.skip(f"{name} is not cached")
+    client = OpenSourceClient(default_model=name, max_new_tokens=8, cache=cache)
+    chunks = list(client.get_completion(MESSAGES, temperature=0))
+    assert chunks and all(isinstance(chunk, str) for chunk in chunks)
@@ -0,0 +1,48 @@
+import threading
+
+from benchmarks.mock_server import MockServer
+from aidebug.core.clientv2.openai_client import OpenAIClient
+
+MESSAGES = [{"role": "user", "content": "Why does this fail?"}]
+
+
+def complete(client):
+    return "".join(client.get_completion(MESSAGES, model="gpt-4o"))
+
+
+def test_sequential_requests_reuse_one_connection():
+    with MockServer(tokens=20) as server:
+        client = OpenAIClient(server.url, "test-key")
+        try:
+            replies = [complete(client) for _ in range(20)]
+        finally:
+            client.close()
+        assert server.httpd.requests == 20
+        assert server.httpd.connections == 1
+    assert len(set(replies)) == 1 and replies[0]
+
+
+def test_concurrent_requests_stay_within_the_pool():
+    pool_size = 4
+    with MockServer(tokens=20, latency=0.05) as server:
+        client = OpenAIClient(server.url, "test-key", pool_size=pool_size)
+        errors = []
+
+        def worker():
+            try:
+                for _ in range(5):
+                    complete(client)
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=worker) for _ in range(pool_size)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            client.close()
+        assert not errors
+        assert server.httpd.requests == 20
+        assert server.httpd.connections <= pool_size
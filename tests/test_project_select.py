@@ -0,0 +1,45 @@
+import os
+
+from aidebug.aidebug import CodeDebuggerShell
+from aidebug.core.utils.file_walker import glob_root, select_files
+
+
+def make_tree(root):
+    for path in ('src/a.py', 'src/pkg/b.py', 'docs/guide.md', 'README.md'):
+        full = root / path
+        full.parent.mkdir(parents=True, exist_ok=True)
+        full.write_text(f"# {path}\n")
+
+
+def test_glob_root_keeps_the_absolute_root():
+    assert glob_root('/tmp/wt/src/**/*.py') == os.path.join(os.sep, 'tmp', 'wt', 'src')
+    assert glob_root('/*.py') == os.sep
+    assert glob_root('src/**/*.py') == 'src'
+    assert glob_root('*.py') == ''
+
+
+def test_absolute_globs_match(tmp_path):
+    make_tree(tmp_path)
+    matched = sorted(select_files([f"{tmp_path}/src/**/*.py"]))
+    assert matched == [str(tmp_path / 'src' / 'a.py'), str(tmp_path / 'src' / 'pkg' / 'b.py')]
+
+
+def test_quoted_globs_select_files(tmp_path, monkeypatch):
+    make_tree(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    shell = CodeDebuggerShell()
+    shell.do_project("select src '**/*.md'")
+    assert sorted(shell.files) == ['README.md', os.path.join('docs', 'guide.md'),
+                                   os.path.join('src', 'a.py'), os.path.join('src', 'pkg', 'b.py')]
+
+
+def test_a_pattern_matching_nothing_keeps_the_selection(tmp_path, monkeypatch, capsys):
+    make_tree(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    shell = CodeDebuggerShell()
+    shell.do_project('select src')
+    selected = list(shell.files)
+    shell.do_project("select 'nothing/**/*.rs'")
+    shell.do_project("deselect 'nothing/**/*.rs'")
+    assert shell.files == selected
+    assert capsys.readouterr().out.count('No files matched nothing/**/*.rs; the selection is unchanged.') == 2
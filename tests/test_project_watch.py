@@ -0,0 +1,124 @@
+import sys
+import time
+import threading
+
+import pytest
+
+from aidebug.aidebug import CodeDebuggerShell
+
+# Logs when each run starts and ends, taking long enough for runs to overlap if they could
+RUN = """import sys, time
+log = open('runs.log', 'a')
+log.write('start\\n'); log.flush()
+time.sleep(0.3)
+log.write('end\\n')
+"""
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+@pytest.fixture
+def shell(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "main.py").write_text(RUN)
+    (tmp_path / "util.py").write_text("VALUE = 1\n")
+    shell = CodeDebuggerShell()
+    shell.project_run_command = f'"{sys.executable}" main.py'
+    shell.do_project("select main.py util.py")
+    yield shell
+    shell.stop_watch()
+
+
+def runs(tmp_path):
+    path = tmp_path / "runs.log"
+    return path.read_text().split() if path.exists() else []
+
+
+def test_watch_needs_a_run_command(shell, capsys):
+    shell.project_run_command = ""
+    shell.do_project("watch")
+    assert "Use 'config project run' first." in capsys.readouterr().out
+    assert shell.watcher is None
+
+
+def test_saves_rerun_the_project_with_only_the_changed_files_refreshed(shell, tmp_path, capsys):
+    shell.do_project("watch")
+    (tmp_path / "util.py").write_text("VALUE = 2\n")
+    assert wait_for(lambda: runs(tmp_path) == ["start", "end"])
+    output = []
+    assert wait_for(lambda: output.append(capsys.readouterr().out) or "Command completed successfully." in "".join(output)), output
+    assert "0 added, 1 changed, 0 removed, 0 skipped.\n  changed: util.py" in "".join(output)
+    assert shell.file_store["util.py"].strip() == "VALUE = 2"
+
+
+def test_watched_and_shell_runs_do_not_overlap(shell, tmp_path):
+    shell.do_project("watch")
+    (tmp_path / "util.py").write_text("VALUE = 2\n")
+    assert wait_for(lambda: runs(tmp_path)[:1] == ["start"])
+    shell_run = threading.Thread(target=shell.run_project)
+    shell_run.start()
+    shell_run.join(10)
+    assert wait_for(lambda: len(runs(tmp_path)) == 4)
+    assert runs(tmp_path) == ["start", "end", "start", "end"]
+
+
+@pytest.fixture
+def stalled_debug(shell, tmp_path):
+    """A watch whose runs fail, debugged automatically by a server that has not answered yet."""
+    from benchmarks.mock_server import MockServer
+    from aidebug.core.clientv2.openai_client import OpenAIClient
+
+    with MockServer(tokens=5, latency=10) as server:
+        shell.client = OpenAIClient(server.url, "test-key")
+        shell.use_cache = False
+        shell.project_run_command = f'"{sys.executable}" -c "raise SystemExit(1)"'
+        shell.do_project("watch auto")
+        (tmp_path / "util.py").write_text("VALUE = 2\n")
+        assert wait_for(lambda: server.httpd.requests == 1)
+        thread, _ = shell.auto_debug_task
+        yield thread
+        shell.client.close()
+
+
+def test_stopping_the_watch_cancels_an_automatic_debug(shell, stalled_debug):
+    started = time.monotonic()
+    shell.do_project("watch stop")
+    assert time.monotonic() - started < 2
+    assert not stalled_debug.is_alive()
+
+
+def test_a_command_takes_over_from_an_automatic_debug(shell, stalled_debug, capsys):
+    started = time.monotonic()
+    shell.onecmd(shell.precmd("project files paths"))
+    assert time.monotonic() - started < 2
+    assert not stalled_debug.is_alive()
+    assert "Automatic debug cancelled." in capsys.readouterr().out
+    # The watch itself carries on
+    assert shell.watcher is not None
+
+
+def test_other_files_in_the_directory_do_not_cut_the_debounce_short(tmp_path):
+    from aidebug.core.utils.file_watcher import FileWatcher
+
+    watched = [str(tmp_path / "a.py"), str(tmp_path / "b.py")]
+    for path in watched:
+        open(path, "w").close()
+    calls = []
+    watcher = FileWatcher(watched, calls.append, debounce=0.5).start()
+    try:
+        time.sleep(0.1)
+        (tmp_path / "a.py").write_text("A = 1\n")
+        time.sleep(0.1)
+        (tmp_path / "notes.txt").write_text("unrelated\n")
+        time.sleep(0.2)
+        (tmp_path / "b.py").write_text("B = 1\n")
+        assert wait_for(lambda: calls)
+        time.sleep(0.7)
+    finally:
+        watcher.stop()
+    assert calls == [set(watched)]
@@ -0,0 +1,50 @@
+import pytest
+
+from aidebug.core.clientv2.sse import SSEParser
+
+
+def parse(*chunks):
+    parser = SSEParser()
+    events = [event for chunk in chunks for event in parser.feed(chunk)]
+    return events + parser.close()
+
+
+def test_single_line_events_split_anywhere_are_parsed():
+    body = b'data: {"a": 1}\n\ndata: caf\xc3\xa9\n\ndata: [DONE]\n\n'
+    expected = ['{"a": 1}', 'café', '[DONE]']
+    for size in (1, 2, 3, 7, len(body)):
+        events = parse(*(body[start:start + size] for start in range(0, len(body), size)))
+        assert [event.data for event in events] == expected
+        assert all(event.event == 'message' and event.id is None for event in events)
+
+
+def test_multi_line_data_is_joined_with_newlines():
+    events = parse(b'data: first\ndata:second\ndata: \n\n', b'data: one\n\n')
+    assert [event.data for event in events] == ['first\nsecond\n', 'one']
+
+
+def test_comment_lines_are_ignored():
+    events = parse(b': keep-alive\n\ndata: a\n: comment between fields\ndata: b\n\n:\n\ndata: c\n\n')
+    assert [event.data for event in events] == ['a\nb', 'c']
+
+
+@pytest.mark.parametrize("chunks", [
+    (b'data: a\r', b'\n\r\ndata: b\r\n\r\n'),
+    (b'data: a\r\n\r', b'\ndata: b\r\n\r', b'\n'),
+    (b'data: a\r\r', b'data: b\r\r'),
+])
+def test_crlf_and_cr_line_endings_split_across_chunks(chunks):
+    assert [event.data for event in parse(*chunks)] == ['a', 'b']
+
+
+def test_event_and_id_fields_apply_to_their_event():
+    events = parse(b'event: status\nid: 7\ndata: busy\n\ndata: a\n\ndata: b\n\n')
+    assert [(event.event, event.data, event.id) for event in events] == [
+        ('status', 'busy', '7'), ('message', 'a', '7'), ('message', 'b', '7')]
+
+
+def test_close_flushes_an_unterminated_event():
+    parser = SSEParser()
+    assert [event.data for event in parser.feed(b'data: a\n\ndata: b')] == ['a']
+    assert [event.data for event in parser.close()] == ['b']
+    assert parser.close() == []
@@ -0,0 +1,14 @@
+from aidebug.core.utils.traceback_parser import Frame, resolve_frames
+
+SELECTED = ['/srv/app/.hidden/x.py', '/srv/app/src/main.py']
+
+
+def test_dot_directories_keep_their_leading_dot():
+    resolved = resolve_frames([Frame('.hidden/x.py', 3)], SELECTED)
+    assert list(resolved) == ['/srv/app/.hidden/x.py']
+
+
+def test_relative_prefixes_are_stripped_before_suffix_matching():
+    frames = [Frame('./src/main.py', 1), Frame('../src/main.py', 2), Frame('./../src/main.py', 3)]
+    resolved = resolve_frames(frames, SELECTED)
+    assert [frame.line for frame in resolved['/srv/app/src/main.py']] == [1, 2, 3]
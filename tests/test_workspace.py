@@ -0,0 +1,97 @@
+import sqlite3
+
+from aidebug.core.utils import file_store
+from aidebug.core.utils.file_index import FileIndex
+from aidebug.core.utils.file_store import FileStore
+from aidebug.core.utils.workspace import Workspace
+
+ENTRY = {"mtime_ns": 1, "size": 6, "hash": "abc"}
+
+
+def test_files_round_trip_as_metadata_only(tmp_path):
+    workspace = Workspace(str(tmp_path / "workspace.db"))
+    workspace.save_files(["a.py", "b.py"], {"a.py": ENTRY, "b.py": ENTRY}, [])
+    workspace.save_files(["a.py"], {}, ["b.py"])
+    assert workspace.load_selection() == ["a.py"]
+    assert workspace.load_entries(["a.py", "b.py"]) == {"a.py": ENTRY}
+    workspace.close()
+
+
+def test_only_changes_are_written(tmp_path):
+    workspace = Workspace(str(tmp_path / "workspace.db"))
+    workspace.save_files(["a.py", "b.py"], {"a.py": ENTRY, "b.py": ENTRY}, [])
+    statements = []
+    workspace.db.set_trace_callback(statements.append)
+    workspace.save_files(["a.py", "b.py"], {}, [])
+    assert statements == []
+    workspace.save_files(["a.py", "b.py"], {"b.py": dict(ENTRY, hash="def")}, [])
+    assert not any("selection" in statement for statement in statements)
+    assert [statement for statement in statements if "snapshot" in statement] == [
+        "INSERT OR REPLACE INTO snapshot (path, mtime_ns, size, hash) VALUES ('b.py', 1, 6, 'def')"]
+    workspace.close()
+
+
+def test_refresh_writes_only_the_files_that_changed(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name in ("a.py", "b.py"):
+        (tmp_path / name).write_text(f"{name[0].upper()} = 1\n")
+    store, index = FileStore(), FileIndex()
+    store.refresh(["a.py", "b.py"], index)
+    assert set(index.take_dirty()[0]) == {"a.py", "b.py"}
+
+    store.refresh(["a.py", "b.py"], index)
+    assert index.take_dirty() == ({}, set())
+
+    (tmp_path / "b.py").write_text("B = 2\n")
+    store.refresh(["a.py", "b.py"], index)
+    updated, removed = index.take_dirty()
+    assert (list(updated), removed) == (["b.py"], set())
+    store.refresh(["a.py"], index)
+    assert index.take_dirty() == ({}, {"b.py"})
+
+
+def test_a_file_that_becomes_binary_is_removed_once_and_not_read_again(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "blob.dat").write_text("text for now\n")
+    store, index = FileStore(), FileIndex()
+    assert store.refresh(["blob.dat"], index)["added"] == ["blob.dat"]
+
+    (tmp_path / "blob.dat").write_bytes(b"\0\1\2" * 100)
+    changes = store.refresh(["blob.dat"], index)
+    assert (changes["removed"], changes["skipped"]) == (["blob.dat"], [])
+    assert "blob.dat" not in store and "blob.dat" not in index.entries
+
+    reads = []
+    monkeypatch.setattr(file_store, "read_files", lambda paths, **kwargs: reads.append(paths) or ({}, {}))
+    for _ in range(3):
+        assert not any(store.refresh(["blob.dat"], index).values())
+    assert reads == [[], [], []]
+
+
+def test_new_unreadable_files_are_reported_as_skipped_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "blob.dat").write_bytes(b"\0\1\2" * 100)
+    store, index = FileStore(), FileIndex()
+    assert store.refresh(["blob.dat"], index)["skipped"] == ["blob.dat"]
+    assert not any(store.refresh(["blob.dat"], index).values())
+    # Once it is text again it is added
+    (tmp_path / "blob.dat").write_text("text again\n")
+    assert store.refresh(["blob.dat"], index)["added"] == ["blob.dat"]
+
+
+def test_older_workspaces_lose_their_content_column(tmp_path):
+    path = str(tmp_path / "workspace.db")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE snapshot (path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, "
+               "hash TEXT NOT NULL, content TEXT NOT NULL)")
+    db.execute("INSERT INTO snapshot VALUES ('a.py', 1, 6, 'abc', 'x = 1\n')")
+    db.commit()
+    db.close()
+
+    workspace = Workspace(path)
+    columns = [row[1] for row in workspace.db.execute("PRAGMA table_info(snapshot)")]
+    assert columns == ["path", "mtime_ns", "size", "hash"]
+    # SQLite before 3.35 cannot drop a column, so the table is rebuilt empty there
+    kept = {"a.py": ENTRY} if sqlite3.sqlite_version_info >= (3, 35) else {}
+    assert workspace.load_entries(["a.py"]) == kept
+    workspace.close()
@@ -0,0 +1,54 @@
+import pytest
+
+
+@pytest.fixture
+def shell_module(tmp_path, monkeypatch):
+    import aidebug.aidebug as shell_module
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(shell_module, "DISABLE_WORKSPACE", False)
+    return shell_module
+
+
+def open_shell(shell_module):
+    shell = shell_module.CodeDebuggerShell()
+    shell.restore_workspace()
+    return shell
+
+
+def stored(shell):
+    return shell.workspace.load_settings()
+
+
+def test_defaults_are_not_saved(shell_module):
+    shell = open_shell(shell_module)
+    shell.postcmd(False, "help")
+    assert stored(shell) == {}
+
+
+def test_changed_settings_are_saved_and_restored(shell_module):
+    shell = open_shell(shell_module)
+    shell.project_run_command = "python main.py"
+    shell.context_budgets[shell.openai_model] = 1000
+    shell.postcmd(False, "config")
+    # Changed in place after the first save
+    shell.context_budgets[shell.openai_model] = 2000
+    shell.postcmd(False, "config")
+    shell.workspace.close()
+
+    restored = open_shell(shell_module)
+    assert restored.project_run_command == "python main.py"
+    assert restored.context_budgets == {restored.openai_model: 2000}
+    assert set(stored(restored)) == {"project_run_command", "context_budgets"}
+
+
+def test_settings_set_back_to_default_follow_the_environment_again(shell_module, monkeypatch):
+    shell = open_shell(shell_module)
+    shell.use_cache = not shell.use_cache
+    shell.postcmd(False, "cache off")
+    shell.use_cache = not shell.use_cache
+    shell.postcmd(False, "cache on")
+    assert "use_cache" not in stored(shell)
+    shell.workspace.close()
+
+    monkeypatch.setattr(shell_module, "DISABLE_CACHE", True)
+    assert open_shell(shell_module).use_cache is False